@@ -1,4 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server'
+import { randomUUID } from 'crypto'
 import { analyzePrompt } from '@/utils/analyzePrompt'
 import { getUserTwin } from '@/utils/getUserTwin'
 import { scoreProducts } from '@/utils/scoreProducts'
@@ -45,8 +46,11 @@ export async function POST(req: NextRequest) {
         // Step 5: Pass these product links to Crawl4AI for detailed scraping
         console.log(`�️ Sending ${serperProducts.length} product links to Crawl4AI...`)
         
-        const scrapedProductData = await crawl4aiService.scrapeSerperProducts(serperProducts)
-        console.log(`📦 Crawl4AI extracted data for ${scrapedProductData.length} products`)
+        // Crawl4AI echoes the trace id with per-stage timings for every URL
+        const traceId = randomUUID().replace(/-/g, '').slice(0, 16)
+        const scrapeStartedAt = Date.now()
+        const scrapedProductData = await crawl4aiService.scrapeSerperProducts(serperProducts, traceId)
+        console.log(`📦 Crawl4AI extracted data for ${scrapedProductData.length} products in ${Date.now() - scrapeStartedAt}ms (trace ${traceId})`)
 
         if (scrapedProductData.length > 0) {
           // TODO: Next step - Store these products in Supabase
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from content_reducer import count_tokens
+
+class PageBatcher:
+    """Groups pages submitted one at a time into multi-page LLM calls.
+
+    ``submit`` returns when the page's own result is ready, so callers keep a
+    per-page flow (pipelining, streaming) while pages share prompts. A batch is
+    sent when adding the next page would exceed ``token_budget``, when it holds
+    ``max_pages`` pages, or ``linger`` seconds after its first page arrived.
+    """
+
+    def __init__(self, extract_batch: Callable[[List[str]], Awaitable[list]], prepare: Callable[[str], str],
+                 token_budget: int, max_pages: int = 5, linger: float = 0.3, overhead_tokens: int = 0):
+        self.extract_batch = extract_batch
+        self.prepare = prepare
+        self.token_budget = token_budget
+        self.max_pages = max(1, max_pages)
+        self.linger = linger
+        self.overhead_tokens = overhead_tokens
+        self.batches_sent = 0
+        self._pending: List[tuple] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, content: str):
+        prepared = self.prepare(content)
+        tokens = count_tokens(prepared) + 20  # page delimiter
+        if self._pending and self.overhead_tokens + self._pending_tokens + tokens > self.token_budget:
+            self.flush()
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((prepared, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_pages:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.linger, self.flush)
+        return await future
+
+    def flush(self):
+        """Send whatever is pending as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]):
+        self.batches_sent += 1
+        futures = [future for _, future in batch]
+        try:
+            results = list(await self.extract_batch([prepared for prepared, _ in batch]))
+            for index, future in enumerate(futures):
+                if future.done():
+                    continue
+                if index < len(results):
+                    future.set_result(results[index])
+                else:
+                    future.set_exception(RuntimeError(f"Batch extraction returned no result for page {index}"))
+        except asyncio.CancelledError:
+            # close() cancelled the batch; pages waiting on it must not hang
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+
+    def close(self):
+        """Cancel batches still in flight (request finished or client went away)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            if not future.done():
+                future.cancel()
+        self._pending = []
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,94 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (host pattern, path pattern, fixture file); first match wins
+FIXTURE_ROUTES: List[Tuple[str, str, str]] = [
+    (r"(www\.)?google\.com", r"/shopping/consent", "google_consent.html"),
+    (r"(www\.)?google\.com", r"/shopping/product/", "google_shopping_product.html"),
+    (r"(www\.)?amazon\.in", r"/(.+/)?dp/", "amazon_product.html"),
+    (r"(www\.)?flipkart\.com", r"/.+/p/itm", "flipkart_product.html"),
+    (r"(www\.)?myntra\.com", r"/.+/\d{6,}", "myntra_product.html"),
+]
+
+def fixture_for(url: str) -> Optional[str]:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    for host_pattern, path_pattern, filename in FIXTURE_ROUTES:
+        if re.fullmatch(host_pattern, host) and re.match(path_pattern, parts.path):
+            return filename
+    return None
+
+class FixtureServer:
+    """Serves the recorded pages, either directly or as a plain-HTTP forward proxy.
+
+    The server under test gets ``BROWSER_PROXY`` and ``HTTP_PROXY`` pointing here,
+    so real retailer URLs (http://www.amazon.in/dp/...) keep their hostnames for
+    politeness, domain strategies and deep-scrape URL matching, but never leave
+    the machine. Assets and unknown URLs get an empty 404.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.pages = {}
+        for filename in os.listdir(FIXTURES_DIR):
+            with open(os.path.join(FIXTURES_DIR, filename), "rb") as f:
+                self.pages[filename] = f.read()
+        self.stats = {"served": 0, "not_found": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                # Proxied requests carry the absolute URL; direct ones only a path
+                url = self.path if self.path.startswith("http") else f"http://{self.headers.get('Host', '')}{self.path}"
+                filename = fixture_for(url)
+                if filename is None:
+                    server.stats["not_found"] += 1
+                    self._reply(404, b"", "text/plain")
+                    return
+                server.stats["served"] += 1
+                self._reply(200, server.pages[filename], "text/html; charset=utf-8")
+
+            def do_CONNECT(self):
+                # HTTPS cannot be served from fixtures; fail fast instead of hanging the browser
+                self._reply(502, b"", "text/plain")
+
+            def _reply(self, status: int, body: bytes, content_type: str):
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The caller gave up (cancelled extraction, deadline, shutdown)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
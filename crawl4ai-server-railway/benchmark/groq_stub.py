@@ -0,0 +1,130 @@
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HEADING = re.compile(r"^#{1,3}\s+(.+)$", re.MULTILINE)
+PRICE = re.compile(r"₹\s?([0-9][0-9,]*)")
+PAGE_HEADER = re.compile(r"### PAGE (\d+) ###")
+
+def _fields(content: str) -> dict:
+    """Plausible extraction result for one page of markdown"""
+    heading = HEADING.search(content)
+    price = PRICE.search(content)
+    return {
+        "title": heading.group(1).strip()[:200] if heading else "Benchmark Product",
+        "brand": "boAt",
+        "price": float(price.group(1).replace(",", "")) if price else None,
+        "image_urls": [],
+        "description": "Wireless on-ear headphones with 40mm drivers and 15 hours of playback.",
+        "features": ["40mm drivers", "15 hours playback", "Bluetooth 5.0"],
+        "average_rating": 4.1,
+        "total_reviews": 45210,
+        "specifications": {"Connectivity": "Bluetooth"},
+    }
+
+def stub_reply(prompt: str) -> str:
+    pages = PAGE_HEADER.split(prompt)
+    if len(pages) > 1:
+        # Batched prompt: ["header", "0", "page 0 text", "1", "page 1 text", ...]
+        return json.dumps([dict(_fields(text), page=int(n)) for n, text in zip(pages[1::2], pages[2::2])])
+    return json.dumps(_fields(prompt.split("Content:", 1)[-1]))
+
+class GroqStub:
+    """OpenAI-compatible chat completions endpoint standing in for Groq.
+
+    Point the server at it with ``GROQ_BASE_URL``. Every call sleeps
+    ``latency_ms`` plus up to ``jitter_ms``, and ``malformed_rate`` of replies are
+    cut off mid-JSON to exercise the parse-failure paths.
+    """
+
+    def __init__(self, latency_ms: float = 800, jitter_ms: float = 200, malformed_rate: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "malformed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def complete(self, request: dict) -> dict:
+        prompt = "".join(m.get("content") or "" for m in request.get("messages", []))
+        with self.lock:
+            delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+            malformed = self.random.random() < self.malformed_rate
+        time.sleep(delay / 1000)
+
+        content = stub_reply(prompt)
+        if malformed:
+            content = content[:len(content) // 2]
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["malformed"] += int(malformed)
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["completion_tokens"] += completion_tokens
+        return {
+            "id": f"chatcmpl-bench-{self.stats['calls']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "length" if malformed else "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._reply(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                self._reply(200, stub.complete(request))
+
+            def _reply(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The caller gave up (cancelled extraction, deadline, shutdown)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "GroqStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
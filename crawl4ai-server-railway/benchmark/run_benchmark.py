@@ -0,0 +1,374 @@
+"""Offline load benchmark for the crawl server.
+
+Serves recorded pages from a local fixture server (acting as the browser's and
+httpx's HTTP proxy), replaces Groq with a stub of configurable latency, starts the
+server with that wiring, drives /scrape, /bulk-scrape and /scrape-google-shopping
+at each requested concurrency and writes one JSON report.
+
+    python benchmark/run_benchmark.py --requests 40 --concurrency 1,4,16 --output run.json
+    python benchmark/run_benchmark.py --baseline run.json   # prints deltas against an earlier run
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from fixture_server import FixtureServer
+from groq_stub import GroqStub
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("scrape", "bulk-scrape", "scrape-google-shopping")
+
+# Retailer pages routed to fixtures; keep in sync with FIXTURE_ROUTES
+PRODUCT_URLS = (
+    "http://www.amazon.in/boAt-Rockerz-450-Bluetooth-Headphones/dp/B07PR1CL3S",
+    "http://www.flipkart.com/boat-rockerz-450-bluetooth-headset/p/itm8a7f3bench01",
+    "http://www.myntra.com/headphones/boat/boat-rockerz-450-wireless-on-ear-headphones/12345678/buy",
+)
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return round(ordered[min(rank, len(ordered)) - 1], 1)
+
+def process_tree(root_pid: int) -> List[int]:
+    """root_pid and all its descendants, read from /proc"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+def sample_process_tree(root_pid: int) -> dict:
+    """Total RSS of the server and its Chromium children, plus how many browsers are running"""
+    rss_kb, browsers = 0, 0
+    for pid in process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                        break
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        # Renderer, GPU and utility processes carry --type=; the browser process itself does not
+        if "chrom" in cmdline.lower() and "--type=" not in cmdline:
+            browsers += 1
+    return {"rss_mb": round(rss_kb / 1024, 1), "browsers": browsers}
+
+class Sampler:
+    """Polls RSS, browser processes and pool occupancy while a scenario runs"""
+
+    def __init__(self, client: httpx.AsyncClient, server_pid: Optional[int], interval: float = 0.5):
+        self.client = client
+        self.server_pid = server_pid
+        self.interval = interval
+        self.samples: List[dict] = []
+        self._task = None
+
+    async def _sample(self) -> dict:
+        sample = sample_process_tree(self.server_pid) if self.server_pid else {}
+        try:
+            pool = (await self.client.get("/health", timeout=5)).json()["browser_pool"]
+            sample["warm_browsers"] = pool["warm_browsers"]
+            sample["active_leases"] = pool["active_leases"]
+        except Exception:
+            pass
+        return sample
+
+    async def _run(self):
+        while True:
+            self.samples.append(await self._sample())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        self.samples.append(await self._sample())
+
+        def series(key):
+            return [s[key] for s in self.samples if key in s]
+
+        rss, browsers = series("rss_mb"), series("browsers")
+        return {
+            "rss_mb": {"start": rss[0], "peak": max(rss), "end": rss[-1]} if rss else None,
+            "browser_processes": {"peak": max(browsers), "end": browsers[-1]} if browsers else None,
+            "warm_browsers_end": (series("warm_browsers") or [None])[-1],
+            "peak_active_leases": max(series("active_leases"), default=None),
+        }
+
+def build_request(scenario: str, index: int, args) -> dict:
+    """Request body for the index-th call; a per-call query string keeps identical requests from coalescing"""
+    base = {"extract_structured_data": True, "cache": args.cache}
+    if scenario == "scrape":
+        url = PRODUCT_URLS[index % len(PRODUCT_URLS)]
+        return {**base, "url": f"{url}?bench={index}"}
+    if scenario == "bulk-scrape":
+        urls = itertools.islice(itertools.cycle(PRODUCT_URLS), index, index + args.bulk_size)
+        return {**base, "urls": [f"{url}?bench={index}-{n}" for n, url in enumerate(urls)]}
+    consent = args.random.random() < args.consent_rate
+    path = "consent" if consent else "product"
+    return {**base, "url": f"http://www.google.com/shopping/{path}/{index}?bench={index}"}
+
+def response_succeeded(scenario: str, body: dict) -> bool:
+    if scenario == "bulk-scrape":
+        return body.get("failed_scrapes") == 0
+    return bool(body.get("success"))
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, concurrency: int, args, server_pid: Optional[int]) -> dict:
+    # Warm-up calls are not measured: they pay for first-use costs like browser page setup
+    for index in range(args.warmup):
+        await client.post(f"/{scenario}", json=build_request(scenario, 10_000_000 + index, args))
+
+    latencies, statuses, successes = [], {}, 0
+    counter = itertools.count()
+    sampler = Sampler(client, server_pid)
+    sampler.start()
+
+    async def worker():
+        nonlocal successes
+        while True:
+            index = next(counter)
+            if index >= args.requests:
+                return
+            body = build_request(scenario, index, args)
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/{scenario}", json=body)
+                status = str(response.status_code)
+                if response.status_code == 200 and response_succeeded(scenario, response.json()):
+                    successes += 1
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - started
+    resources = await sampler.stop()
+
+    urls_per_request = args.bulk_size if scenario == "bulk-scrape" else 1
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "statuses": statuses,
+        "successful": successes,
+        "wall_s": round(wall_s, 2),
+        "throughput_rps": round(args.requests / wall_s, 2),
+        "urls_per_s": round(args.requests * urls_per_request / wall_s, 2),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "max": round(max(latencies), 1) if latencies else None,
+        },
+        **resources,
+    }
+
+def server_env(args, fixtures: FixtureServer, stub: GroqStub, state_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(args.port),
+        "GROQ_API_KEY": "benchmark",
+        "GROQ_BASE_URL": stub.url,
+        # Chromium and the plain-HTTP tier fetch every page through the fixture server
+        "BROWSER_PROXY": fixtures.url,
+        "HTTP_PROXY": fixtures.url,
+        "http_proxy": fixtures.url,
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+        "CRAWL_CACHE_PATH": os.path.join(state_dir, "crawl_cache.sqlite3"),
+        "EXTRACTION_CACHE_PATH": os.path.join(state_dir, "extraction_cache.sqlite3"),
+        "DOMAIN_STATS_PATH": os.path.join(state_dir, "domain_stats.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(state_dir, "jobs.sqlite3"),
+    })
+    if args.cache != "use":
+        env["EXTRACTION_CACHE_ENABLED"] = "false"
+    if not args.polite:
+        # Every fixture host is local; per-host rate limits would measure the limiter, not the server
+        env.update({"POLITENESS_HOST_RATE": "0", "POLITENESS_HOST_CONCURRENCY": "64", "POLITENESS_DOMAIN_LIMITS": ""})
+    for item in args.server_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+async def wait_until_ready(client: httpx.AsyncClient, process: Optional[subprocess.Popen], timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} during startup")
+        try:
+            health = (await client.get("/health", timeout=5)).json()
+            if health.get("browser_pool", {}).get("ready"):
+                return time.perf_counter() - started
+        except (httpx.HTTPError, ValueError):
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"Server not ready after {timeout:.0f}s")
+
+def compare(report: dict, baseline: dict) -> List[str]:
+    """Throughput and tail-latency change per scenario and concurrency"""
+    previous = {(run["scenario"], run["concurrency"]): run for run in baseline.get("runs", [])}
+    lines = []
+    for run in report["runs"]:
+        before = previous.get((run["scenario"], run["concurrency"]))
+        if before is None:
+            continue
+
+        def delta(new, old):
+            return f"{(new - old) / old * 100:+.1f}%" if new is not None and old else "n/a"
+
+        lines.append(
+            f"{run['scenario']:<24} c={run['concurrency']:<3} "
+            f"throughput {before['throughput_rps']} -> {run['throughput_rps']} rps ({delta(run['throughput_rps'], before['throughput_rps'])}), "
+            f"p95 {before['latency_ms']['p95']} -> {run['latency_ms']['p95']} ms ({delta(run['latency_ms']['p95'], before['latency_ms']['p95'])})"
+        )
+    return lines
+
+async def main(args) -> dict:
+    args.random = random.Random(args.seed)
+    fixtures = FixtureServer().start()
+    stub = GroqStub(args.llm_latency_ms, args.llm_jitter_ms, args.llm_malformed_rate, seed=args.seed).start()
+    state_dir = tempfile.mkdtemp(prefix="crawl4ai-bench-")
+    process, log_path = None, None
+    base_url = args.server_url or f"http://127.0.0.1:{args.port}"
+
+    if not args.server_url:
+        log_path = os.path.join(state_dir, "server.log")
+        log = open(log_path, "w")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port)],
+            cwd=SERVER_DIR, env=server_env(args, fixtures, stub, state_dir), stdout=log, stderr=subprocess.STDOUT
+        )
+        print(f"🚀 Started server (pid {process.pid}), log: {log_path}", file=sys.stderr)
+
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits, trust_env=False) as client:
+            startup_s = await wait_until_ready(client, process, args.startup_timeout)
+            print(f"✅ Server ready in {startup_s:.1f}s", file=sys.stderr)
+
+            runs = []
+            for scenario in args.scenarios:
+                for concurrency in args.concurrency:
+                    run = await run_scenario(client, scenario, concurrency, args, process.pid if process else args.server_pid)
+                    runs.append(run)
+                    print(
+                        f"📊 {scenario} c={concurrency}: {run['throughput_rps']} rps, "
+                        f"p50 {run['latency_ms']['p50']} / p95 {run['latency_ms']['p95']} / p99 {run['latency_ms']['p99']} ms, "
+                        f"{run['successful']}/{run['requests']} ok, peak RSS {(run['rss_mb'] or {}).get('peak')} MB",
+                        file=sys.stderr
+                    )
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        fixtures.close()
+        stub.close()
+
+    return {
+        "version": 1,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "scenarios": args.scenarios,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "bulk_size": args.bulk_size,
+            "consent_rate": args.consent_rate,
+            "cache": args.cache,
+            "polite": args.polite,
+            "llm_latency_ms": args.llm_latency_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "llm_malformed_rate": args.llm_malformed_rate,
+            "server_env": args.server_env,
+            "server_url": args.server_url,
+        },
+        "server": {"startup_s": round(startup_s, 2), "log": log_path},
+        "groq_stub": stub.stats,
+        "fixtures": fixtures.stats,
+        "runs": runs,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark with recorded pages and a stubbed Groq")
+    parser.add_argument("--scenarios", type=lambda s: [x for x in s.split(",") if x], default=list(SCENARIOS),
+                        help="Comma-separated endpoints to drive (default: all)")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[4],
+                        help="Comma-separated concurrency levels, each run separately (default: 4)")
+    parser.add_argument("--requests", type=int, default=40, help="Measured requests per scenario and concurrency")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before each run")
+    parser.add_argument("--bulk-size", type=int, default=6, help="URLs per /bulk-scrape request")
+    parser.add_argument("--consent-rate", type=float, default=0.1, help="Share of Google requests served the consent page")
+    parser.add_argument("--cache", choices=["use", "refresh", "bypass"], default="bypass",
+                        help="Cache policy sent with each request; anything but 'use' also disables the extraction cache")
+    parser.add_argument("--polite", action="store_true", help="Keep the server's per-host politeness limits")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="Share of stub replies cut off mid-JSON")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the spawned server, e.g. BROWSER_POOL_SIZE=4")
+    parser.add_argument("--server-url", help="Benchmark an already running server instead of spawning one "
+                                             "(it must use this run's GROQ_BASE_URL/BROWSER_PROXY to stay offline)")
+    parser.add_argument("--server-pid", type=int, help="PID of --server-url's process, for RSS and browser counts")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--request-timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            for line in compare(report, json.load(f)):
+                print(f"📈 {line}", file=sys.stderr)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"💾 Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
@@ -0,0 +1,234 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+
+import metrics
+import request_timing
+
+# Error fragments Playwright/crawl4ai report when the underlying Chromium died
+BROWSER_CRASH_MARKERS = (
+    "target page, context or browser has been closed",
+    "browser has been closed",
+    "browser has disconnected",
+    "browser closed",
+    "connection closed",
+)
+
+def is_browser_crash(error_message: Optional[str]) -> bool:
+    """Check whether a crawl error means the browser itself is gone"""
+    if not error_message:
+        return False
+    message = error_message.lower()
+    return any(marker in message for marker in BROWSER_CRASH_MARKERS)
+
+class _BrowserSlot:
+    """One warm Chromium instance in the pool"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.crawler: Optional[AsyncWebCrawler] = None
+        self.active = 0
+        self.pages_served = 0
+        self.launched_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+class BrowserPool:
+    """Pool of long-lived AsyncWebCrawler instances shared by every endpoint.
+
+    Each browser serves up to ``max_pages_per_browser`` concurrent leases and is
+    recycled after ``recycle_after`` pages or as soon as it crashes. Recycled
+    browsers are drained: in-flight leases finish on the old instance while new
+    leases get a freshly launched one. ``hooks`` are crawl4ai strategy hooks
+    installed on every browser the pool launches.
+    """
+
+    def __init__(
+        self,
+        browser_config: BrowserConfig,
+        size: int = 2,
+        max_pages_per_browser: int = 4,
+        recycle_after: int = 100,
+        launch_timeout: float = 60.0,
+        hooks: Optional[Dict[str, Callable]] = None,
+    ):
+        self.browser_config = browser_config
+        self.hooks = hooks or {}
+        self.size = max(1, size)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.recycle_after = recycle_after
+        self.launch_timeout = launch_timeout
+        self.started = False
+        self.stats = {"leases": 0, "launches": 0, "recycles": 0, "crashes": 0}
+        self._slots = [_BrowserSlot(i) for i in range(self.size)]
+        self._capacity = asyncio.Semaphore(self.size * self.max_pages_per_browser)
+        self._draining: Dict[int, List] = {}
+        self._crashed: set = set()
+
+    async def start(self):
+        """Launch every browser up front so the first requests hit warm instances"""
+        started_at = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(self._ensure_started(slot) for slot in self._slots),
+            return_exceptions=True
+        )
+        for slot, outcome in zip(self._slots, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"❌ Browser {slot.index} failed to launch: {outcome}")
+        self.started = True
+        print(f"🌐 Browser pool ready: {self.warm_browsers}/{self.size} warm in {time.perf_counter() - started_at:.1f}s")
+
+    async def close(self):
+        """Shut down every pooled and draining browser"""
+        crawlers = [slot.crawler for slot in self._slots if slot.crawler]
+        crawlers += [entry[0] for entry in self._draining.values()]
+        for slot in self._slots:
+            slot.crawler = None
+            slot.active = 0
+        self._draining.clear()
+        await asyncio.gather(*(self._close_crawler(c) for c in crawlers), return_exceptions=True)
+        self.started = False
+
+    @property
+    def warm_browsers(self) -> int:
+        return sum(1 for slot in self._slots if slot.crawler is not None)
+
+    @property
+    def active_leases(self) -> int:
+        return sum(slot.active for slot in self._slots) + sum(entry[1] for entry in self._draining.values())
+
+    @asynccontextmanager
+    async def lease(self):
+        """Borrow a warm crawler for one page load"""
+        acquire_started = time.perf_counter()
+        await self._capacity.acquire()
+        slot = min(self._slots, key=lambda s: s.active)
+        slot.active += 1
+        try:
+            crawler = await self._ensure_started(slot)
+        except Exception:
+            slot.active -= 1
+            self._capacity.release()
+            raise
+
+        self.stats["leases"] += 1
+        acquire_seconds = time.perf_counter() - acquire_started
+        metrics.BROWSER_ACQUIRE_SECONDS.observe(acquire_seconds)
+        request_timing.add("browser_acquire", acquire_seconds * 1000)
+        crashed = False
+        try:
+            yield crawler
+        except Exception as e:
+            crashed = is_browser_crash(str(e))
+            raise
+        finally:
+            crashed = crashed or id(crawler) in self._crashed
+            self._release(slot, crawler, crashed)
+            self._capacity.release()
+
+    def report_crash(self, crawler: AsyncWebCrawler):
+        """Flag a leased crawler as dead so it is recycled when released"""
+        self._crashed.add(id(crawler))
+
+    async def status(self, probe: bool = False, probe_timeout: float = 15.0) -> dict:
+        """Pool occupancy, optionally with a real page render as liveness probe"""
+        status = {
+            "ready": self.started and self.warm_browsers > 0,
+            "size": self.size,
+            "warm_browsers": self.warm_browsers,
+            "draining_browsers": len(self._draining),
+            "active_leases": self.active_leases,
+            "capacity": self.size * self.max_pages_per_browser,
+            "recycle_after": self.recycle_after,
+            "browsers": [
+                {
+                    "index": slot.index,
+                    "running": slot.crawler is not None,
+                    "active": slot.active,
+                    "pages_served": slot.pages_served,
+                    "uptime_seconds": round(time.time() - slot.launched_at, 1) if slot.crawler and slot.launched_at else None,
+                }
+                for slot in self._slots
+            ],
+            **self.stats,
+        }
+        if probe:
+            status["probe"] = await self.probe(timeout=probe_timeout)
+        return status
+
+    async def probe(self, timeout: float = 15.0) -> dict:
+        """Render a tiny inline page through the pool to prove Chromium responds"""
+        started_at = time.perf_counter()
+        try:
+            probe_config = CrawlerRunConfig(cache_mode=CacheMode.BYPASS, verbose=False)
+            async with self.lease() as crawler:
+                result = await asyncio.wait_for(
+                    crawler.arun(url="raw:<html><body><p>pool probe</p></body></html>", config=probe_config),
+                    timeout=timeout
+                )
+                if not result.success and is_browser_crash(result.error_message):
+                    self.report_crash(crawler)
+            return {
+                "ok": bool(result.success),
+                "latency_ms": round((time.perf_counter() - started_at) * 1000),
+                "error": None if result.success else result.error_message,
+            }
+        except Exception as e:
+            return {
+                "ok": False,
+                "latency_ms": round((time.perf_counter() - started_at) * 1000),
+                "error": str(e) or e.__class__.__name__,
+            }
+
+    async def _ensure_started(self, slot: _BrowserSlot) -> AsyncWebCrawler:
+        async with slot.lock:
+            if slot.crawler is None:
+                crawler = AsyncWebCrawler(config=self.browser_config)
+                for hook_type, hook in self.hooks.items():
+                    crawler.crawler_strategy.set_hook(hook_type, hook)
+                with metrics.BROWSER_LAUNCH_SECONDS.time():
+                    await asyncio.wait_for(crawler.start(), timeout=self.launch_timeout)
+                slot.crawler = crawler
+                slot.pages_served = 0
+                slot.launched_at = time.time()
+                self.stats["launches"] += 1
+            return slot.crawler
+
+    def _release(self, slot: _BrowserSlot, crawler: AsyncWebCrawler, crashed: bool):
+        key = id(crawler)
+        if slot.crawler is crawler:
+            slot.active -= 1
+            slot.pages_served += 1
+            if crashed:
+                self.stats["crashes"] += 1
+                print(f"💥 Browser {slot.index} crashed, recycling")
+                self._retire(slot)
+            elif self.recycle_after and slot.pages_served >= self.recycle_after:
+                print(f"♻️  Browser {slot.index} served {slot.pages_served} pages, recycling")
+                self._retire(slot)
+        elif key in self._draining:
+            self._draining[key][1] -= 1
+            if self._draining[key][1] <= 0:
+                old_crawler, _ = self._draining.pop(key)
+                self._crashed.discard(key)
+                asyncio.create_task(self._close_crawler(old_crawler))
+
+    def _retire(self, slot: _BrowserSlot):
+        crawler = slot.crawler
+        slot.crawler = None
+        self.stats["recycles"] += 1
+        if slot.active > 0:
+            # Let in-flight leases finish on the old browser
+            self._draining[id(crawler)] = [crawler, slot.active]
+        else:
+            self._crashed.discard(id(crawler))
+            asyncio.create_task(self._close_crawler(crawler))
+        slot.active = 0
+
+    async def _close_crawler(self, crawler: AsyncWebCrawler):
+        try:
+            await crawler.close()
+        except Exception as e:
+            print(f"⚠️ Error closing browser: {e}")
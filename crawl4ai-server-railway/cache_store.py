@@ -0,0 +1,215 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+class TieredCache:
+    """Two-tier key/value cache for JSON-serializable dicts.
+
+    The memory tier is an LRU bounded by the approximate size of the stored
+    values. The optional disk tier is a SQLite file that survives restarts; it is
+    bounded by entry count and evicts least recently used rows. Every entry
+    carries its own expiry.
+
+    Several worker processes can share one disk file. Every disk write or delete
+    is also logged in ``changes``; at most every ``sync_interval`` seconds a
+    lookup reads the other workers' new log rows and drops those keys from this
+    worker's memory tier, so an invalidation or refresh anywhere reaches every
+    worker within that interval.
+    """
+
+    # Change-log rows older than this are pruned; a worker idle for longer clears its memory tier instead
+    CHANGE_LOG_SECONDS = 3600
+
+    def __init__(self, name: str, max_memory_bytes: int = 64 * 1024 * 1024,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 5000, sync_interval: float = 1.0):
+        self.name = name
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.sync_interval = sync_interval
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        # Identifies this instance's own rows in the change log
+        self._writer = uuid.uuid4().hex
+        self._last_change = 0
+        self._synced_at = 0.0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0,
+                      "remote_changes": 0}
+        if disk_path:
+            self._open_disk(disk_path)
+
+    def _open_disk(self, path: str):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, writer TEXT NOT NULL, changed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            # The memory tier starts empty, so earlier changes do not matter
+            self._last_change = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM changes").fetchone()[0]
+        except Exception as e:
+            print(f"⚠️ {self.name} cache: disk store unavailable ({e}), using memory only")
+            self._db = None
+
+    async def get(self, key: str, fresh: bool = False) -> Optional[dict]:
+        """The stored value, or None. fresh checks the change log first whatever the sync interval,
+        for callers about to write back a modified copy"""
+        now = time.time()
+        if self._db is not None and (fresh or now - self._synced_at >= self.sync_interval):
+            self._synced_at = now
+            await self._sync_changes()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value, size = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            self._drop_memory(key)
+            self.stats["expired"] += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                value, expires_at = row
+                self._put_memory(key, value, expires_at)
+                self.stats["disk_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: dict, ttl: float):
+        expires_at = time.time() + ttl
+        self._put_memory(key, value, expires_at)
+        self.stats["stores"] += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+
+    async def delete(self, key: str):
+        self._drop_memory(key)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_delete, key)
+
+    async def _sync_changes(self):
+        """Drop memory entries that other workers have rewritten or deleted on disk"""
+        try:
+            oldest, keys, latest = await asyncio.to_thread(self._disk_changes, self._last_change)
+        except Exception as e:
+            print(f"⚠️ {self.name} cache: could not read the change log ({e})")
+            return
+        if oldest is not None and oldest > self._last_change + 1:
+            # Rows this worker never saw were pruned; any memory entry may be stale
+            self._memory.clear()
+            self._memory_bytes = 0
+        for changed in keys:
+            self._drop_memory(changed)
+        self.stats["remote_changes"] += len(keys)
+        self._last_change = max(self._last_change, latest or 0)
+
+    def status(self) -> dict:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "disk_path": self.disk_path if self._db is not None else None,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            **self.stats,
+        }
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _put_memory(self, key: str, value: dict, expires_at: float):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_memory_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = (expires_at, value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            oldest_key = next(iter(self._memory))
+            self._drop_memory(oldest_key)
+            self.stats["evictions"] += 1
+
+    def _drop_memory(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry[2]
+
+    def _disk_get(self, key: str, now: float):
+        with self._db_lock:
+            row = self._db.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                self.stats["expired"] += 1
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(row[0]), row[1]
+
+    def _disk_set(self, key: str, value: dict, expires_at: float):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), expires_at, time.time())
+            )
+            self._log_change(key)
+            count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            overflow = count - self.max_disk_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+                self.stats["evictions"] += overflow
+            self._db.commit()
+
+    def _disk_delete(self, key: str):
+        with self._db_lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._log_change(key)
+            self._db.commit()
+
+    def _log_change(self, key: str):
+        """Record a write or delete for the other workers; call with _db_lock held, before commit"""
+        now = time.time()
+        change_id = self._db.execute(
+            "INSERT INTO changes (key, writer, changed_at) VALUES (?, ?, ?)", (key, self._writer, now)
+        ).lastrowid
+        if change_id % 100 == 0:
+            self._db.execute("DELETE FROM changes WHERE changed_at < ?", (now - self.CHANGE_LOG_SECONDS,))
+
+    def _disk_changes(self, after: int):
+        with self._db_lock:
+            oldest, latest = self._db.execute("SELECT MIN(id), MAX(id) FROM changes").fetchone()
+            keys = [row[0] for row in self._db.execute(
+                "SELECT DISTINCT key FROM changes WHERE id > ? AND writer != ?", (after, self._writer)
+            )]
+        return oldest, keys, latest
@@ -0,0 +1,157 @@
+import re
+from typing import List
+
+import metrics
+import request_timing
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _encoding = None
+
+# Lines that are site chrome rather than product content
+BOILERPLATE_PATTERNS = re.compile(
+    r"(cookie|privacy (policy|notice)|terms (of use|& conditions|and conditions)|all rights reserved|©|"
+    r"skip to (main )?content|back to top|sign in|log ?in|create (an )?account|your account|"
+    r"download (the )?app|follow us|newsletter|subscribe|customer (care|service)|help centre|"
+    r"conditions of use|interest-based ads|accessibility|sitemap|gift cards?|careers|press releases)",
+    re.IGNORECASE
+)
+MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+PRICE_SIGNAL = re.compile(r"(₹|rs\.?\s?\d|inr|\$\s?\d|mrp|price|% off|deal of the day|emi)", re.IGNORECASE)
+REVIEW_SIGNAL = re.compile(r"(out of 5|stars?|ratings?|reviews?|customers? (say|review)|verified purchase)", re.IGNORECASE)
+SPEC_SIGNAL = re.compile(
+    r"(specifications?|technical details|product details|about this item|key features|highlights|description|"
+    r"dimensions|weight|material|warranty|in the box|model|colou?r|size|battery|connectivity|compatib)",
+    re.IGNORECASE
+)
+SELLER_SIGNAL = re.compile(r"(sold by|seller|visit site|delivery|in stock|available|compare prices)", re.IGNORECASE)
+KEY_VALUE_LINE = re.compile(r"^\s*(\|.*\||[^:|]{2,40}:\s*\S)")
+
+def count_tokens(text: str) -> int:
+    """Token count of text (cl100k via tiktoken when installed, otherwise ~4 chars per token)"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def strip_boilerplate(content: str) -> str:
+    """Drop navigation, cookie banners, footers and link-only lines"""
+    kept = []
+    for line in content.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            kept.append("")
+            continue
+        visible = MARKDOWN_LINK.sub(lambda m: m.group(1), stripped)
+        # Short chrome lines ("Sign in", "Cookie preferences", "© 2024 ...")
+        if len(visible) < 120 and BOILERPLATE_PATTERNS.search(visible) and not PRICE_SIGNAL.search(visible):
+            continue
+        # Menus: lines that are almost entirely links with little text of their own
+        links = MARKDOWN_LINK.findall(stripped)
+        if len(links) >= 3 and len(MARKDOWN_LINK.sub("", stripped).strip(" *-|•·")) < 15:
+            continue
+        kept.append(line.rstrip())
+    # Collapse runs of blank lines
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+def split_blocks(content: str) -> List[str]:
+    """Blocks separated by blank lines; a heading starts a new block and stays attached to its content"""
+    blocks, current = [], []
+
+    def has_body(lines):
+        return any(not line.lstrip().startswith("#") for line in lines)
+
+    for line in content.splitlines():
+        is_heading = line.lstrip().startswith("#")
+        if not line.strip():
+            if has_body(current):
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        if is_heading and current:
+            if has_body(current):
+                blocks.append("\n".join(current))
+            # A heading directly followed by another heading has no content of its own
+            current = []
+        current.append(line)
+    if has_body(current):
+        blocks.append("\n".join(current))
+
+    # Repeated blocks (carousels, sticky headers) only need to appear once
+    return list(dict.fromkeys(blocks))
+
+def score_block(block: str, position: int) -> float:
+    """Product relevance of a block: prices, spec tables, reviews and seller info score high"""
+    score = 0.0
+    score += 4.0 * min(len(PRICE_SIGNAL.findall(block)), 3)
+    score += 2.0 * min(len(SPEC_SIGNAL.findall(block)), 4)
+    score += 2.0 * min(len(REVIEW_SIGNAL.findall(block)), 3)
+    score += 1.5 * min(len(SELLER_SIGNAL.findall(block)), 3)
+    key_value_lines = sum(1 for line in block.splitlines() if KEY_VALUE_LINE.match(line))
+    score += 1.0 * min(key_value_lines, 8)
+    if block.lstrip().startswith("#"):
+        score += 2.0
+    # The product title and hero section live near the top of the page
+    score += max(0.0, 3.0 - position * 0.25)
+    # Penalise link-heavy blocks (recommendation carousels, menus)
+    links = len(MARKDOWN_LINK.findall(block))
+    text_length = len(MARKDOWN_LINK.sub("", block))
+    if links and text_length / max(links, 1) < 25:
+        score -= 1.5 * min(links, 6)
+    return score
+
+def reduce_content(content: str, token_budget: int) -> str:
+    """Strip boilerplate, then pack the most product-relevant blocks into token_budget, keeping page order"""
+    if not content:
+        return ""
+    with metrics.CONTENT_REDUCTION_SECONDS.time(), request_timing.stage("content_reduction"):
+        return _reduce_content(content, token_budget)
+
+def _reduce_content(content: str, token_budget: int) -> str:
+    cleaned = strip_boilerplate(content)
+    if count_tokens(cleaned) <= token_budget:
+        return cleaned
+
+    blocks = split_blocks(cleaned)
+    ranked = sorted(range(len(blocks)), key=lambda i: score_block(blocks[i], i), reverse=True)
+
+    selected, used = set(), 0
+    for index in ranked:
+        tokens = count_tokens(blocks[index]) + 1
+        if used + tokens > token_budget:
+            # Keep the head of a high-value block that is too big to fit whole
+            remaining = token_budget - used
+            if remaining > 60 and score_block(blocks[index], index) > 4:
+                blocks[index] = truncate_to_tokens(blocks[index], remaining - 1)
+                selected.add(index)
+                used = token_budget
+            continue
+        selected.add(index)
+        used += tokens
+        if used >= token_budget:
+            break
+
+    return "\n\n".join(blocks[i] for i in sorted(selected))
+
+def compact_markdown(content: str, max_chars: int) -> str:
+    """Shrink a crawled page to about max_chars before it is cached or handed to the handlers.
+
+    The top quarter is kept verbatim (title, hero section, and the login/consent text
+    the handlers look for); the rest of the page is packed by relevance like a prompt.
+    """
+    if len(content) <= max_chars:
+        return content
+    with request_timing.stage("compaction"):
+        head_end = content.rfind("\n", 0, max_chars // 4)
+        head = content[:head_end if head_end > 0 else max_chars // 4]
+        tail = _reduce_content(content[len(head):], max(1, (max_chars - len(head)) // 4))
+        return f"{head}\n\n{tail}" if tail else head
+
+def truncate_to_tokens(text: str, token_budget: int) -> str:
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        return _encoding.decode(tokens[:token_budget]) if len(tokens) > token_budget else text
+    return text[:token_budget * 4]
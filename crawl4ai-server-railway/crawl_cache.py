@@ -0,0 +1,176 @@
+import re
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cache_store import TieredCache
+
+# Query parameters that only track the click and never change the page content.
+# Parameters that pick a seller or variant (Amazon smid/psc/th, Flipkart lid/pid, Myntra skuid) must stay in the key.
+TRACKING_PARAMS = {
+    # Generic campaign / click ids
+    "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "igshid", "_ga", "ref", "ref_",
+    # Google
+    "ved", "ei", "sa", "usg", "sxsrf", "oq", "gs_lcp", "gs_lp", "sclient", "uact", "bih", "biw", "srsltid", "rlz", "sourceid",
+    # Amazon
+    "tag", "linkcode", "linkid", "camp", "creative", "creativeasin", "qid", "sr", "sprefix", "crid", "dib", "dib_tag",
+    "spla", "_encoding",
+    # Flipkart
+    "otracker", "otracker1", "fm", "iid", "ssid", "srno", "ppt", "ppn", "spotlighttagid", "affid", "affextparam1",
+    "affextparam2",
+    # Myntra / Ajio / Nykaa
+    "src", "intcmp",
+}
+TRACKING_PREFIXES = ("utm_", "pf_rd_", "pd_rd_", "ref_")
+
+# Amazon appends /ref=... path segments that do not change the product
+_AMAZON_REF_SEGMENT = re.compile(r"/ref=[^/]*$")
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for cache keys: lowercase host, no fragment, no tracking params, sorted query"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if "amazon." in host:
+        path = _AMAZON_REF_SEGMENT.sub("", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+def url_domain(url: str) -> str:
+    """Hostname without a leading www."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def parse_domain_ttls(spec: str) -> Dict[str, float]:
+    """Parse 'google.com=900,amazon.in=21600' into a domain -> seconds mapping"""
+    ttls = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        domain, seconds = item.split("=", 1)
+        try:
+            ttls[domain.strip().lower()] = float(seconds)
+        except ValueError:
+            print(f"⚠️ Ignoring invalid cache TTL entry: {item}")
+    return ttls
+
+class CrawledPage:
+    """The parts of a crawl result the handlers actually use, small enough to cache"""
+
+    def __init__(self, url: str, success: bool, markdown: Optional[str] = None, metadata: Optional[dict] = None,
+                 error_message: Optional[str] = None, status_code: Optional[int] = None, cache_status: str = "miss",
+                 structured_data: Optional[dict] = None, fetch_tier: str = "browser", links: Optional[List[dict]] = None):
+        self.url = url
+        self.success = success
+        self.markdown = markdown
+        self.metadata = metadata or {}
+        self.error_message = error_message
+        self.status_code = status_code
+        self.cache_status = cache_status
+        # Product fields recovered from JSON-LD / OpenGraph / DOM at crawl time
+        self.structured_data = structured_data or {}
+        # "http" when the plain-HTTP tier was enough, "browser" when Chromium rendered it
+        self.fetch_tier = fetch_tier
+        # Outbound retailer links ({"text", "url"}) found in the full markdown, kept when the markdown is compacted
+        self.links = links or []
+
+    @classmethod
+    def from_result(cls, url: str, result) -> "CrawledPage":
+        return cls(
+            url=url,
+            success=bool(result.success),
+            markdown=str(result.markdown) if result.markdown else None,
+            metadata=dict(result.metadata or {}),
+            error_message=result.error_message,
+            status_code=result.status_code
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "markdown": self.markdown,
+            "metadata": self.metadata,
+            "status_code": self.status_code,
+            "structured_data": self.structured_data,
+            "fetch_tier": self.fetch_tier,
+            "links": self.links,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, cache_status: str) -> "CrawledPage":
+        return cls(
+            url=data["url"],
+            success=True,
+            markdown=data.get("markdown"),
+            metadata=data.get("metadata"),
+            status_code=data.get("status_code"),
+            cache_status=cache_status,
+            structured_data=data.get("structured_data"),
+            fetch_tier=data.get("fetch_tier", "browser"),
+            links=data.get("links")
+        )
+
+class CrawlCache:
+    """Cache of successful crawls keyed by normalized URL and crawl variant"""
+
+    def __init__(self, store: TieredCache, default_ttl: float = 3600, domain_ttls: Optional[Dict[str, float]] = None,
+                 min_content_chars: int = 500):
+        self.store = store
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.min_content_chars = min_content_chars
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "bypasses": 0, "skipped_stores": 0}
+
+    def key(self, url: str, variant: str = "") -> str:
+        return f"{normalize_url(url)}|{variant}"
+
+    def ttl_for(self, url: str) -> float:
+        """Most specific configured TTL for the URL's domain (amazon.in matches www.amazon.in)"""
+        domain = url_domain(url)
+        while domain:
+            if domain in self.domain_ttls:
+                return self.domain_ttls[domain]
+            if "." not in domain:
+                break
+            domain = domain.split(".", 1)[1]
+        return self.default_ttl
+
+    async def get(self, url: str, variant: str = "", policy: str = "use") -> Optional[CrawledPage]:
+        """Cached page for the URL, honouring the request's cache policy (use / refresh / bypass)"""
+        if policy == "bypass":
+            self.stats["bypasses"] += 1
+            return None
+        if policy == "refresh":
+            self.stats["refreshes"] += 1
+            return None
+        data = await self.store.get(self.key(url, variant))
+        if data is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return CrawledPage.from_dict(data, cache_status="hit")
+
+    async def put(self, page: CrawledPage, variant: str = "", policy: str = "use"):
+        if policy == "bypass":
+            return
+        if not page.success or not page.markdown or len(page.markdown) < self.min_content_chars:
+            self.stats["skipped_stores"] += 1
+            return
+        await self.store.set(self.key(page.url, variant), page.to_dict(), self.ttl_for(page.url))
+
+    async def invalidate(self, url: str, variant: str = ""):
+        await self.store.delete(self.key(url, variant))
+
+    def status(self) -> dict:
+        return {**self.stats, "store": self.store.status()}
@@ -0,0 +1,142 @@
+import asyncio
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from crawl_cache import url_domain
+
+# Resource types the fast profile never downloads; product data lives in the DOM, not in the pixels
+HEAVY_RESOURCE_TYPES = ("image", "media", "font", "texttrack", "manifest")
+
+# Ad, analytics and session-replay hosts seen on Google Shopping and the Indian retailers
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "googleadservices.com",
+    "doubleclick.net", "adservice.google.com", "facebook.net", "connect.facebook.net", "bat.bing.com",
+    "clarity.ms", "hotjar.com", "criteo.com", "criteo.net", "amazon-adsystem.com", "scorecardresearch.com",
+    "taboola.com", "outbrain.com", "moengage.com", "webengage.com", "branch.io", "segment.io", "mixpanel.com",
+    "nr-data.net", "newrelic.com", "cloudflareinsights.com", "quantserve.com", "adsrvr.org", "appsflyer.com",
+)
+
+# Third-party hosts each retailer genuinely needs (its CDNs). On these sites every
+# other third-party script or XHR is aborted too; first-party requests always load.
+RETAILER_ALLOWLISTS = {
+    "amazon.in": ("media-amazon.com", "ssl-images-amazon.com", "amazon.com"),
+    "flipkart.com": ("flixcart.com", "flipkart.net"),
+    "myntra.com": ("myntassets.com",),
+    "ajio.com": ("ajio.com",),
+    "nykaa.com": ("nykaa.com", "nykaafashion.com"),
+    "croma.com": ("croma.com", "tatadigital.com"),
+}
+
+def parse_retailer_allowlists(spec: str) -> Dict[str, Tuple[str, ...]]:
+    """Parse 'myntra.com=myntassets.com|myntra.net,ajio.com=ajio.com' into retailer -> allowed host suffixes"""
+    allowlists = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        retailer, hosts = item.split("=", 1)
+        allowlists[retailer.strip().lower()] = tuple(h.strip().lower() for h in hosts.split("|") if h.strip())
+    return allowlists
+
+def _host_matches(host: str, suffixes: Iterable[str]) -> bool:
+    return any(host == suffix or host.endswith("." + suffix) for suffix in suffixes)
+
+class CrawlProfile:
+    """What a crawl is allowed to download, plus bandwidth and load-time counters for comparing profiles"""
+
+    def __init__(self, name: str, blocked_resource_types: Iterable[str] = (), block_trackers: bool = False,
+                 retailer_allowlists: Optional[Dict[str, Tuple[str, ...]]] = None):
+        self.name = name
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.block_trackers = block_trackers
+        self.retailer_allowlists = retailer_allowlists or {}
+        self.stats = {"pages": 0, "load_ms": 0.0, "requests": 0, "blocked_requests": 0, "bytes": 0}
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.blocked_resource_types or self.block_trackers or self.retailer_allowlists)
+
+    def retailer_allowlist(self, page_host: str) -> Optional[Tuple[str, ...]]:
+        for retailer, hosts in self.retailer_allowlists.items():
+            if _host_matches(page_host, (retailer,)):
+                return (retailer,) + hosts
+        return None
+
+    def should_block(self, resource_type: str, url: str, page_url: str) -> bool:
+        if resource_type == "document":
+            return False
+        if resource_type in self.blocked_resource_types:
+            return True
+        host = (urlsplit(url).hostname or "").lower()
+        if not host:
+            return False  # data: and blob: URLs
+        if self.block_trackers and _host_matches(host, TRACKER_HOSTS):
+            return True
+        allowlist = self.retailer_allowlist(url_domain(page_url)) if page_url.startswith("http") else None
+        if allowlist and resource_type in ("script", "xhr", "fetch", "websocket", "eventsource", "other"):
+            return not _host_matches(host, allowlist)
+        return False
+
+    async def attach(self, page):
+        """Install request interception and byte counting on a fresh Playwright page"""
+        if self.intercepts:
+            async def handle(route):
+                request = route.request
+                try:
+                    if self.should_block(request.resource_type, request.url, page.url):
+                        self.stats["blocked_requests"] += 1
+                        await route.abort()
+                    else:
+                        await route.continue_()
+                except Exception:
+                    pass  # Page closed while the request was in flight
+
+            await page.route("**/*", handle)
+
+        async def count_bytes(request):
+            try:
+                sizes = await request.sizes()
+                self.stats["bytes"] += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+            except Exception:
+                pass
+
+        def on_request_finished(request):
+            self.stats["requests"] += 1
+            asyncio.ensure_future(count_bytes(request))
+
+        page.on("requestfinished", on_request_finished)
+
+    def record_load(self, elapsed_ms: float):
+        self.stats["pages"] += 1
+        self.stats["load_ms"] += elapsed_ms
+
+    def status(self) -> dict:
+        pages = self.stats["pages"]
+        return {
+            "blocked_resource_types": sorted(self.blocked_resource_types),
+            "block_trackers": self.block_trackers,
+            "pages": pages,
+            "requests": self.stats["requests"],
+            "blocked_requests": self.stats["blocked_requests"],
+            "bytes": self.stats["bytes"],
+            "avg_kb_per_page": round(self.stats["bytes"] / pages / 1024, 1) if pages else None,
+            "avg_load_ms": round(self.stats["load_ms"] / pages, 1) if pages else None,
+        }
+
+def build_profiles(retailer_allowlists: Optional[Dict[str, Tuple[str, ...]]] = None) -> Dict[str, CrawlProfile]:
+    """The "fast" profile strips heavy resources and trackers; "full" loads the page as a user would"""
+    return {
+        "fast": CrawlProfile("fast", HEAVY_RESOURCE_TYPES, block_trackers=True,
+                             retailer_allowlists=RETAILER_ALLOWLISTS if retailer_allowlists is None else retailer_allowlists),
+        "full": CrawlProfile("full"),
+    }
+
+def profile_hook(profiles: Dict[str, CrawlProfile]):
+    """crawl4ai on_page_context_created hook applying the profile named in config.shared_data["crawl_profile"]"""
+    async def on_page_context_created(page, context=None, config=None, **kwargs):
+        shared_data = getattr(config, "shared_data", None) or {}
+        profile = profiles.get(shared_data.get("crawl_profile"))
+        if profile is not None:
+            await profile.attach(page)
+        return page
+
+    return on_page_context_created
@@ -0,0 +1,149 @@
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from cache_store import TieredCache
+from crawl_cache import url_domain
+from politeness import BLOCK_STATUS_CODES
+
+# Crawl strategies from cheapest to most expensive
+STRATEGIES = ("http", "browser", "browser_full")
+
+# Fetch errors meaning the host does not exist or refuses us outright
+UNREACHABLE_MARKERS = re.compile(
+    r"(name or service not known|nodename nor servname|temporary failure in name resolution|getaddrinfo failed|"
+    r"no address associated|err_name_not_resolved|err_name_resolution_failed|err_address_unreachable|"
+    r"err_connection_refused|connection refused|invalidurl|unsupportedprotocol|err_invalid_url)",
+    re.IGNORECASE
+)
+
+def url_error(status_code: Optional[int], error: Optional[str] = None) -> Optional[str]:
+    """Why a crawl failed because of the URL itself (missing page, unknown host), or None.
+
+    A heavier strategy would fail the same way, and the failure says nothing about
+    how well the strategy works for the domain. Throttling statuses are block pages, not URL errors.
+    """
+    if status_code and status_code >= 400 and status_code not in BLOCK_STATUS_CODES:
+        return f"http_{status_code}"
+    if error and UNREACHABLE_MARKERS.search(error):
+        return "unreachable"
+    return None
+
+def _new_strategy_stats() -> dict:
+    return {"attempts": 0, "successes": 0, "success_rate": 1.0, "fail_streak": 0, "latency_ms": None, "content_chars": None}
+
+class DomainStrategies:
+    """Per-domain crawl history, persisted, used to pick the cheapest strategy that works.
+
+    For every domain and strategy it keeps attempts, an exponentially weighted
+    success rate, latency and content size, plus which extractor tier filled the
+    product fields. ``plan`` starts at the cheapest strategy that is still
+    healthy and lists the pricier ones after it as automatic fallbacks; a
+    strategy that keeps failing drops out until a periodic re-probe shows it
+    working again.
+
+    Several workers can share the store. Every update re-reads the stored stats
+    and applies itself to them before writing back, so workers add to each
+    other's counts instead of overwriting them. ``domains`` only keeps the
+    most recently read copies, for ``min_useful_chars`` and ``status``.
+    """
+
+    def __init__(self, store: TieredCache, ttl: float = 30 * 86400, min_success_rate: float = 0.6,
+                 fail_streak_limit: int = 2, reprobe_every: int = 20, alpha: float = 0.2,
+                 min_content_ratio: float = 0.2, max_domains: int = 2000):
+        self.store = store
+        self.ttl = ttl
+        self.min_success_rate = min_success_rate
+        self.fail_streak_limit = fail_streak_limit
+        self.reprobe_every = reprobe_every
+        self.alpha = alpha
+        self.min_content_ratio = min_content_ratio
+        self.max_domains = max_domains
+        self.domains: "OrderedDict[str, dict]" = OrderedDict()
+        # Requests planned since this worker last wrote the domain's stats
+        self.unsaved_requests: Dict[str, int] = {}
+
+    async def _load(self, url: str, fresh: bool = False) -> dict:
+        """The domain's stored stats; fresh re-reads what other workers wrote before this one updates them"""
+        domain = url_domain(url)
+        stats = await self.store.get(domain, fresh=fresh) or {"requests": 0, "strategies": {}, "extractor_tiers": {}}
+        self.domains[domain] = stats
+        self.domains.move_to_end(domain)
+        while len(self.domains) > self.max_domains:
+            evicted, _ = self.domains.popitem(last=False)
+            self.unsaved_requests.pop(evicted, None)
+        return stats
+
+    async def _save(self, url: str, stats: dict):
+        domain = url_domain(url)
+        stats["requests"] += self.unsaved_requests.pop(domain, 0)
+        stats["updated_at"] = time.time()
+        await self.store.set(domain, stats, self.ttl)
+
+    def healthy(self, entry: dict) -> bool:
+        if not entry["attempts"]:
+            return True
+        return entry["fail_streak"] < self.fail_streak_limit and entry["success_rate"] >= self.min_success_rate
+
+    async def plan(self, url: str, candidates: List[str]) -> List[str]:
+        """Strategies to try for this URL, in order: the cheapest healthy one first, then its fallbacks"""
+        stats = await self._load(url)
+        domain = url_domain(url)
+        # Counted locally and added to the stored count with the next update, instead of a write per plan
+        self.unsaved_requests[domain] = self.unsaved_requests.get(domain, 0) + 1
+        requests = stats["requests"] + self.unsaved_requests[domain]
+        if self.reprobe_every and requests % self.reprobe_every == 0:
+            # Give cheaper strategies that were written off a chance to prove themselves again
+            return list(candidates)
+        for index, strategy in enumerate(candidates):
+            entry = stats["strategies"].get(strategy)
+            if entry is None or self.healthy(entry):
+                return list(candidates[index:])
+        return list(candidates[-1:])
+
+    def min_useful_chars(self, url: str, floor: int) -> int:
+        """A page far smaller than this domain usually serves is a degraded render (consent wall, bot page)"""
+        stats = self.domains.get(url_domain(url))
+        if not stats:
+            return floor
+        sizes = [entry["content_chars"] for entry in stats["strategies"].values()
+                 if entry["content_chars"] and entry["successes"] >= 3]
+        if not sizes:
+            return floor
+        return max(floor, int(max(sizes) * self.min_content_ratio))
+
+    async def record(self, url: str, strategy: str, success: bool, latency_ms: float, content_chars: int):
+        stats = await self._load(url, fresh=True)
+        entry = stats["strategies"].setdefault(strategy, _new_strategy_stats())
+        entry["attempts"] += 1
+        entry["success_rate"] = (1 - self.alpha) * entry["success_rate"] + self.alpha * (1.0 if success else 0.0)
+        if success:
+            entry["successes"] += 1
+            entry["fail_streak"] = 0
+            entry["content_chars"] = self._ewma(entry["content_chars"], content_chars)
+        else:
+            entry["fail_streak"] += 1
+            if entry["fail_streak"] == self.fail_streak_limit:
+                print(f"🧭 {url_domain(url)}: '{strategy}' keeps failing, falling back to a heavier strategy")
+        entry["latency_ms"] = self._ewma(entry["latency_ms"], latency_ms)
+        await self._save(url, stats)
+
+    async def record_extraction(self, url: str, tier: str):
+        """Which extractor tier filled the product fields ("fast_path" or "llm")"""
+        stats = await self._load(url, fresh=True)
+        stats["extractor_tiers"][tier] = stats["extractor_tiers"].get(tier, 0) + 1
+        await self._save(url, stats)
+
+    def _ewma(self, current, value: float) -> float:
+        if current is None:
+            return round(value, 1)
+        return round((1 - self.alpha) * current + self.alpha * value, 1)
+
+    def status(self) -> dict:
+        domains = {}
+        for domain, stats in self.domains.items():
+            strategies = stats["strategies"]
+            preferred = next((s for s in STRATEGIES if s in strategies and self.healthy(strategies[s])), None)
+            domains[domain] = {"preferred_strategy": preferred, **stats}
+        return {"domains": domains, "store": self.store.status()}
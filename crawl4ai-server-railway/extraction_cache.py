@@ -0,0 +1,88 @@
+import functools
+import hashlib
+from typing import Callable, Optional
+
+from cache_store import TieredCache
+from single_flight import SingleFlight
+import request_timing
+
+class ExtractionCache:
+    """Memoizes LLM extraction results by content hash.
+
+    Keys combine the extractor name, its prompt version, the model and a hash of
+    the reduced content the prompt would see (plus any extra arguments such as the
+    seller name). Bumping an extractor's prompt version changes every key, so old
+    entries are never served again and simply age out of the store. Concurrent
+    calls for the same key share one LLM call, even with the cache disabled.
+    """
+
+    def __init__(self, store: TieredCache, ttl: float = 86400, enabled: bool = True):
+        self.store = store
+        self.ttl = ttl
+        self.enabled = enabled
+        self.stats = {}
+        self.prompt_versions = {}
+        self.flights = SingleFlight("extractions")
+
+    def key(self, extractor: str, prompt_version: int, model: str, content: str, *extra) -> str:
+        digest = hashlib.sha256(content.encode("utf-8", "ignore"))
+        for value in extra:
+            digest.update(b"\0" + str(value).encode("utf-8", "ignore"))
+        return f"{extractor}:v{prompt_version}:{model}:{digest.hexdigest()}"
+
+    def memoize(self, extractor: str, prompt_version: int, prepare: Callable[[str], str], model_cls,
+                model_name: Callable[[], str]):
+        """Decorate an ``async def extractor(content, *extra)`` that returns a pydantic model.
+
+        ``prepare`` must map the raw content to what the prompt will actually contain
+        (the reduced content), so pages differing only in stripped noise share a key.
+        The extractor is then called with that prepared content instead of the raw page.
+        """
+        self.prompt_versions[extractor] = prompt_version
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(content: str, *extra):
+                if not content:
+                    return await func(content, *extra)
+
+                prepared = prepare(content)
+                model = model_name()
+
+                async def extract():
+                    cached = await self.lookup(extractor, model, prepared, *extra)
+                    if cached is not None:
+                        return model_cls(**cached)
+                    result = await func(prepared, *extra)
+                    await self.store_result(extractor, model, prepared, result, *extra)
+                    return result
+
+                key = self.key(extractor, prompt_version, model, prepared, *extra)
+                return await self.flights.do(key, extract, share=lambda result: result.model_copy(deep=True))
+
+            return wrapper
+
+        return decorator
+
+    async def lookup(self, extractor: str, model: str, prepared: str, *extra) -> Optional[dict]:
+        """Stored result for already-prepared content of a registered extractor"""
+        if not self.enabled:
+            return None
+        counters = self.stats.setdefault(extractor, {"hits": 0, "misses": 0, "stores": 0})
+        key = self.key(extractor, self.prompt_versions.get(extractor, 0), model, prepared, *extra)
+        cached = await self.store.get(key)
+        counters["hits" if cached is not None else "misses"] += 1
+        request_timing.record_cache(f"extraction:{extractor}", "hit" if cached is not None else "miss")
+        return cached
+
+    async def store_result(self, extractor: str, model: str, prepared: str, result, *extra):
+        data = result.model_dump(exclude_none=True) if result is not None else {}
+        # Empty results are failures (bad JSON, timeouts); never memoize them
+        if not self.enabled or not data:
+            return
+        key = self.key(extractor, self.prompt_versions.get(extractor, 0), model, prepared, *extra)
+        await self.store.set(key, data, self.ttl)
+        self.stats.setdefault(extractor, {"hits": 0, "misses": 0, "stores": 0})["stores"] += 1
+
+    def status(self) -> dict:
+        return {"enabled": self.enabled, "extractors": self.stats, "store": self.store.status()}
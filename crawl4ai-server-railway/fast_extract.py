@@ -0,0 +1,328 @@
+import json
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Deterministic product extraction from crawled HTML/markdown.
+# Sources in order of trust: JSON-LD > microdata > site DOM selectors > OpenGraph.
+# Markdown patterns are only hints (the first ₹ amount on the page may be an EMI or a related product).
+
+CURRENCY_SYMBOLS = {"₹": "INR", "rs.": "INR", "rs": "INR", "inr": "INR", "$": "USD", "usd": "USD", "€": "EUR", "£": "GBP"}
+
+PRICE_PATTERN = re.compile(r"(₹|Rs\.?|INR|\$|€|£)\s?([0-9][0-9,]*(?:\.[0-9]{1,2})?)", re.IGNORECASE)
+RATING_PATTERN = re.compile(r"([0-5](?:\.[0-9])?)\s*(?:out of 5|/\s*5)\b", re.IGNORECASE)
+REVIEW_COUNT_PATTERN = re.compile(r"([0-9][0-9,]*)\s*(?:global\s+)?(?:ratings|reviews|customer reviews)\b", re.IGNORECASE)
+MARKDOWN_IMAGE_PATTERN = re.compile(r"!\[[^\]]*\]\((https?://[^)\s]+)")
+NUMBER_PATTERN = re.compile(r"[0-9][0-9,]*(?:\.[0-9]+)?")
+MICRODATA_PATTERN = re.compile(r"""itemprop=["']([a-zA-Z]+)["'][^>]*?(?:content|src|href)=["']([^"']+)["']""")
+
+# CSS selectors for the retailers listed in the LLM site hints; first match wins
+SITE_SELECTORS = {
+    "amazon": {
+        "title": ["#productTitle"],
+        "price": [".a-price .a-offscreen", "#priceblock_ourprice", "#priceblock_dealprice", "#corePriceDisplay_desktop_feature_div .a-price-whole"],
+        "brand": ["#bylineInfo"],
+        "rating": ["#acrPopover", "#averageCustomerReviews span.a-icon-alt"],
+        "reviews": ["#acrCustomerReviewText"],
+        "image": ["#landingImage", "#imgBlkFront"],
+        "availability": ["#availability span"],
+        "features": ["#feature-bullets li span.a-list-item"],
+    },
+    "flipkart": {
+        "title": ["span.VU-ZEz", "span.B_NuCI", "h1 span"],
+        "price": ["div.Nx9bqj.CxhGGd", "div.Nx9bqj", "div._30jeq3._16Jk6d", "div._30jeq3"],
+        "rating": ["div.XQDdHH", "div._3LWZlK"],
+        "reviews": ["span.Wphh3N", "span._2_R_DZ"],
+        "image": ["img.DByuf4", "img._396cs4", "img._2r_T1I"],
+        "features": ["li._7eSDEz", "li._21Ahn-"],
+    },
+    "myntra": {
+        "brand": ["h1.pdp-title"],
+        "title": ["h1.pdp-name"],
+        "price": ["span.pdp-price strong", "span.pdp-price"],
+        "rating": ["div.index-overallRating div"],
+        "reviews": ["div.index-ratingsCount"],
+    },
+    "croma": {
+        "title": ["h1.pd-title", "h1.pdp-product-name"],
+        "price": ["span#pdp-product-price", "span.amount"],
+        "rating": ["span.rating-text"],
+        "features": ["div.cp-keyfeature li"],
+    },
+    "ajio": {
+        "brand": ["h2.brand-name"],
+        "title": ["h1.prod-name"],
+        "price": ["div.prod-sp"],
+        "features": ["ul.prod-list li.detail-list"],
+    },
+    "nykaa": {
+        "title": ["h1"],
+        "price": ["span.css-1jczs19", "div.css-1d0jf8e span"],
+        "rating": ["div.css-m6n3ou"],
+        "reviews": ["div.css-1hvvm95"],
+    },
+}
+
+def detect_site(url: str = "", seller_name: str = "") -> Optional[str]:
+    haystack = f"{url} {seller_name}".lower()
+    for site in SITE_SELECTORS:
+        if site in haystack:
+            return site
+    return None
+
+def parse_price(value) -> Optional[float]:
+    """Number from a price value such as 1499, '₹1,499.00' or '1499.00'"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    match = NUMBER_PATTERN.search(str(value))
+    if not match:
+        return None
+    try:
+        price = float(match.group(0).replace(",", ""))
+    except ValueError:
+        return None
+    return price if price > 0 else None
+
+def parse_currency(value) -> Optional[str]:
+    if not value:
+        return None
+    text = str(value).strip().lower()
+    if re.fullmatch(r"[a-z]{3}", text):
+        return text.upper()
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in text:
+            return code
+    return None
+
+def parse_count(value) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = NUMBER_PATTERN.search(str(value))
+    return int(float(match.group(0).replace(",", ""))) if match else None
+
+def parse_rating(value) -> Optional[float]:
+    if value is None:
+        return None
+    match = NUMBER_PATTERN.search(str(value))
+    if not match:
+        return None
+    rating = float(match.group(0).replace(",", ""))
+    return rating if 0 < rating <= 5 else None
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _text(value) -> Optional[str]:
+    """A JSON-LD text value as a string: the first string of a list, a {"@value": ...} object's value, else None"""
+    if isinstance(value, list):
+        value = next((item for item in map(_text, value) if item), None)
+    elif isinstance(value, dict):
+        value = _text(value.get("@value"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    return (value.strip() or None) if isinstance(value, str) else None
+
+def _types(node: dict) -> List[str]:
+    return [str(t).split("/")[-1].lower() for t in _as_list(node.get("@type"))]
+
+def _walk_json_ld(node, found: list):
+    if isinstance(node, list):
+        for item in node:
+            _walk_json_ld(item, found)
+    elif isinstance(node, dict):
+        if any(t in ("product", "productgroup") for t in _types(node)):
+            found.append(node)
+        for key in ("@graph", "mainEntity", "itemListElement", "item"):
+            if key in node:
+                _walk_json_ld(node[key], found)
+
+def json_ld_products(soup: BeautifulSoup) -> List[dict]:
+    products = []
+    for script in soup.find_all("script", attrs={"type": re.compile("ld\\+json", re.I)}):
+        raw = script.string or script.get_text() or ""
+        try:
+            data = json.loads(raw.strip())
+        except json.JSONDecodeError:
+            # Some sites put several objects or trailing commas in one block
+            try:
+                data = json.loads(re.sub(r",\s*([}\]])", r"\1", raw.strip()))
+            except json.JSONDecodeError:
+                continue
+        _walk_json_ld(data, products)
+    return products
+
+def _image_urls(value, base_url: str) -> List[str]:
+    urls = []
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            item = item.get("url") or item.get("contentUrl")
+        if isinstance(item, str) and item.strip():
+            urls.append(urljoin(base_url, item.strip()))
+    return urls
+
+def fields_from_json_ld(product: dict, base_url: str) -> dict:
+    fields = {
+        "title": _text(product.get("name")),
+        "description": _text(product.get("description")),
+        "image_urls": _image_urls(product.get("image"), base_url) or None,
+    }
+    brand = product.get("brand")
+    if isinstance(brand, list):
+        brand = brand[0] if brand else None
+    if isinstance(brand, dict) and "@value" not in brand:
+        brand = brand.get("name")
+    fields["brand"] = _text(brand)
+
+    offers = _as_list(product.get("offers"))
+    if offers and isinstance(offers[0], dict):
+        offer = offers[0]
+        if "aggregateoffer" in _types(offer):
+            low, high = parse_price(offer.get("lowPrice")), parse_price(offer.get("highPrice"))
+            fields["price"] = low
+            if low and high and high != low:
+                fields["price_range"] = f"{low:g} - {high:g}"
+        else:
+            specification = next((spec for spec in _as_list(offer.get("priceSpecification")) if isinstance(spec, dict)), {})
+            fields["price"] = parse_price(offer.get("price") or specification.get("price"))
+        fields["currency"] = parse_currency(offer.get("priceCurrency"))
+        availability = offer.get("availability")
+        if isinstance(availability, str):
+            fields["availability_text"] = re.sub(r"(?<!^)(?=[A-Z])", " ", availability.split("/")[-1])
+
+    rating = product.get("aggregateRating")
+    if isinstance(rating, dict):
+        fields["average_rating"] = parse_rating(rating.get("ratingValue"))
+        fields["total_reviews"] = parse_count(rating.get("reviewCount") or rating.get("ratingCount"))
+
+    specs = {}
+    for prop in _as_list(product.get("additionalProperty")):
+        if isinstance(prop, dict) and prop.get("name") and prop.get("value") is not None:
+            specs[str(prop["name"])] = str(prop["value"])
+    for key in ("sku", "mpn", "gtin13", "color", "material", "model"):
+        if isinstance(product.get(key), (str, int)):
+            specs[key] = str(product[key])
+    if specs:
+        fields["specifications"] = specs
+    return fields
+
+def fields_from_microdata(html: str) -> dict:
+    if "schema.org/Product" not in html:
+        return {}
+    values: Dict[str, str] = {}
+    for prop, value in MICRODATA_PATTERN.findall(html):
+        values.setdefault(prop, value)
+    return {
+        "title": values.get("name"),
+        "brand": values.get("brand"),
+        "price": parse_price(values.get("price") or values.get("lowPrice")),
+        "currency": parse_currency(values.get("priceCurrency")),
+        "average_rating": parse_rating(values.get("ratingValue")),
+        "total_reviews": parse_count(values.get("reviewCount") or values.get("ratingCount")),
+        "image_urls": [values["image"]] if values.get("image") else None,
+    }
+
+def fields_from_open_graph(soup: BeautifulSoup, base_url: str) -> dict:
+    meta = {}
+    for tag in soup.find_all("meta"):
+        key = tag.get("property") or tag.get("name")
+        if key and tag.get("content") and (key.startswith("og:") or key.startswith("product:")):
+            meta.setdefault(key, tag["content"])
+    return {
+        "title": meta.get("og:title"),
+        "description": meta.get("og:description"),
+        "image_urls": _image_urls(meta.get("og:image"), base_url) or None,
+        "price": parse_price(meta.get("product:price:amount") or meta.get("og:price:amount")),
+        "currency": parse_currency(meta.get("product:price:currency") or meta.get("og:price:currency")),
+        "brand": meta.get("product:brand"),
+    }
+
+def _select_text(soup: BeautifulSoup, selectors: List[str]) -> Optional[str]:
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element is not None:
+            text = element.get("title") or element.get_text(" ", strip=True)
+            if text:
+                return text.strip()
+    return None
+
+def fields_from_site_dom(soup: BeautifulSoup, site: str, base_url: str) -> dict:
+    selectors = SITE_SELECTORS.get(site, {})
+    fields = {}
+    if selectors.get("title"):
+        fields["title"] = _select_text(soup, selectors["title"])
+    if selectors.get("brand"):
+        brand = _select_text(soup, selectors["brand"])
+        if brand:
+            brand = re.sub(r"^(Visit the|Brand:)\s*", "", brand)
+            fields["brand"] = re.sub(r"\s*Store$", "", brand)
+    if selectors.get("price"):
+        price_text = _select_text(soup, selectors["price"])
+        fields["price"] = parse_price(price_text)
+        fields["currency"] = parse_currency(price_text)
+    if selectors.get("rating"):
+        fields["average_rating"] = parse_rating(_select_text(soup, selectors["rating"]))
+    if selectors.get("reviews"):
+        fields["total_reviews"] = parse_count(_select_text(soup, selectors["reviews"]))
+    if selectors.get("availability"):
+        fields["availability_text"] = _select_text(soup, selectors["availability"])
+    if selectors.get("features"):
+        features = [li.get_text(" ", strip=True) for selector in selectors["features"] for li in soup.select(selector)]
+        fields["features"] = [f for f in features if f][:10] or None
+    for selector in selectors.get("image", []):
+        image = soup.select_one(selector)
+        if image is not None:
+            src = image.get("data-old-hires") or image.get("src") or image.get("data-src")
+            if src and not src.startswith("data:"):
+                fields["image_urls"] = [urljoin(base_url, src)]
+                break
+    return fields
+
+def fields_from_markdown(markdown: str) -> dict:
+    """Weak hints from the rendered text; never enough to skip the LLM, only fill what it left empty"""
+    fields = {}
+    price_match = PRICE_PATTERN.search(markdown)
+    if price_match:
+        fields["price"] = parse_price(price_match.group(2))
+        fields["currency"] = parse_currency(price_match.group(1))
+    rating_match = RATING_PATTERN.search(markdown)
+    if rating_match:
+        fields["average_rating"] = parse_rating(rating_match.group(1))
+    reviews_match = REVIEW_COUNT_PATTERN.search(markdown)
+    if reviews_match:
+        fields["total_reviews"] = parse_count(reviews_match.group(1))
+    images = [url for url in MARKDOWN_IMAGE_PATTERN.findall(markdown) if not url.lower().endswith((".svg", ".gif"))]
+    if images:
+        fields["image_urls"] = list(dict.fromkeys(images))[:8]
+    return fields
+
+def _merge(target: dict, source: dict):
+    for key, value in source.items():
+        if value in (None, "", [], {}):
+            continue
+        if target.get(key) in (None, "", [], {}):
+            target[key] = value.strip() if isinstance(value, str) else value
+
+def extract_fast_path_fields(html: str, url: str = "", seller_name: str = "") -> dict:
+    """Product fields read from the page's markup without an LLM, as a ProductData-compatible dict"""
+    fields: dict = {}
+    try:
+        if html:
+            soup = BeautifulSoup(html, "lxml")
+            for product in json_ld_products(soup):
+                _merge(fields, fields_from_json_ld(product, url))
+            _merge(fields, fields_from_microdata(html))
+            site = detect_site(url, seller_name)
+            if site:
+                _merge(fields, fields_from_site_dom(soup, site, url))
+            _merge(fields, fields_from_open_graph(soup, url))
+    except Exception as e:
+        print(f"⚠️ Fast-path extraction error for {url}: {e}")
+    return fields
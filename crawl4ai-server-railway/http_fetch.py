@@ -0,0 +1,147 @@
+import re
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+from crawl4ai import CrawlerRunConfig
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+from crawl_cache import url_domain
+
+# Pages that only render client-side tell you so, or ship an empty app shell
+JS_REQUIRED_MARKERS = re.compile(
+    r"(enable javascript|javascript is (disabled|required)|requires javascript|turn on javascript|"
+    r"please enable js|you need to enable javascript)",
+    re.IGNORECASE
+)
+EMPTY_APP_SHELL = re.compile(r"<div[^>]+id=[\"'](root|app|__next|__nuxt)[\"'][^>]*>\s*</div>", re.IGNORECASE)
+
+class FetchedPage:
+    """Raw result of a plain HTTP GET"""
+
+    def __init__(self, url: str, status_code: Optional[int] = None, html: str = "", content_type: str = "",
+                 error: Optional[str] = None, elapsed_ms: float = 0.0, size: int = 0):
+        self.url = url
+        self.status_code = status_code
+        self.html = html
+        self.content_type = content_type
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+        self.size = size
+
+def html_to_markdown(url: str, html: str, crawl_config: CrawlerRunConfig) -> Tuple[str, dict]:
+    """Run crawl4ai's own scraping and markdown steps on fetched HTML, so both tiers produce the same markdown"""
+    params = crawl_config.__dict__.copy()
+    params.pop("url", None)
+    scraped = crawl_config.scraping_strategy.scrap(url, html, **params)
+    markdown = DefaultMarkdownGenerator().generate_markdown(input_html=scraped.cleaned_html, base_url=url)
+    return markdown.raw_markdown, dict(scraped.metadata or {})
+
+def _domain_matches(domain: str, suffixes: Iterable[str]) -> bool:
+    return any(domain == suffix or domain.endswith("." + suffix) for suffix in suffixes)
+
+class HttpFetcher:
+    """Pooled httpx client for the plain-HTTP tier.
+
+    Every escalation to the browser is counted per domain with its reason; which
+    tier a domain starts with is decided by DomainStrategies from that history.
+    Domains in ``browser_domains`` are never fetched over HTTP.
+    """
+
+    def __init__(self, user_agent: str, timeout: float = 10.0, max_connections: int = 20,
+                 max_bytes: int = 5 * 1024 * 1024, min_content_chars: int = 1500,
+                 browser_domains: Iterable[str] = (), enabled: bool = True):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.min_content_chars = min_content_chars
+        self.browser_domains = tuple(d.strip().lower() for d in browser_domains if d.strip())
+        self.client = httpx.AsyncClient(
+            headers={
+                "User-Agent": user_agent,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-IN,en;q=0.9",
+                "Accept-Encoding": "gzip, deflate",
+            },
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.domains: Dict[str, dict] = {}
+        self.stats = {"fetches": 0, "served": 0, "escalated": 0, "bytes": 0, "fetch_ms": 0.0}
+
+    def accepts(self, url: str) -> bool:
+        """Whether the HTTP tier may be used for this URL at all"""
+        if not self.enabled or not url.startswith(("http://", "https://")):
+            return False
+        return not _domain_matches(url_domain(url), self.browser_domains)
+
+    async def fetch(self, url: str) -> FetchedPage:
+        started = time.perf_counter()
+        self.stats["fetches"] += 1
+        try:
+            async with self.client.stream("GET", url) as response:
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        break
+                body = b"".join(chunks)
+                html = body.decode(response.encoding or "utf-8", errors="replace")
+                page = FetchedPage(
+                    url=str(response.url), status_code=response.status_code, html=html,
+                    content_type=response.headers.get("content-type", ""), size=size
+                )
+        except Exception as e:
+            page = FetchedPage(url=url, error=f"{type(e).__name__}: {e}")
+        page.elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["bytes"] += page.size
+        self.stats["fetch_ms"] += page.elapsed_ms
+        return page
+
+    def escalation_reason(self, page: FetchedPage, markdown: Optional[str] = None,
+                          has_required_fields: bool = False) -> Optional[str]:
+        """Why a fetched page is not good enough and needs the browser, or None if it is.
+
+        Short markdown is acceptable when the served HTML already carried the required
+        structured fields (JSON-LD / DOM), since extraction will not need the text.
+        """
+        if page.error:
+            return "fetch_error"
+        if page.status_code and page.status_code >= 400:
+            return f"http_{page.status_code}"
+        if "html" not in page.content_type.lower():
+            return "not_html"
+        if markdown is None:
+            return None
+        if len(markdown) < self.min_content_chars:
+            if JS_REQUIRED_MARKERS.search(markdown) or EMPTY_APP_SHELL.search(page.html):
+                return "js_only"
+            if not has_required_fields:
+                return "thin_content"
+        return None
+
+    def record(self, url: str, reason: Optional[str]):
+        """Count whether the HTTP tier was enough for this URL, and why not"""
+        domain = url_domain(url)
+        stats = self.domains.setdefault(domain, {"served": 0, "escalated": 0, "reasons": {}})
+        if reason is None:
+            stats["served"] += 1
+            self.stats["served"] += 1
+            return
+        stats["escalated"] += 1
+        stats["reasons"][reason] = stats["reasons"].get(reason, 0) + 1
+        self.stats["escalated"] += 1
+
+    def status(self) -> dict:
+        fetches = self.stats["fetches"]
+        return {
+            "enabled": self.enabled,
+            **{k: v for k, v in self.stats.items() if k != "fetch_ms"},
+            "avg_fetch_ms": round(self.stats["fetch_ms"] / fetches, 1) if fetches else None,
+            "browser_domains": list(self.browser_domains),
+            "domains": self.domains,
+        }
+
+    async def close(self):
+        await self.client.aclose()
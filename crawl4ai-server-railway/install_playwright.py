@@ -1,28 +1,126 @@
+import json
+import os
 import subprocess
 import sys
-import os
+import time
+from contextlib import contextmanager
+from importlib.metadata import PackageNotFoundError, version
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process install lock
+    fcntl = None
+
+# Written next to the browsers once chromium and its system deps are installed for a Playwright version
+STAMP_FILE = ".snuffl-chromium-stamp.json"
+
+def browsers_path() -> str:
+    """Where Playwright keeps its browsers (PLAYWRIGHT_BROWSERS_PATH or the per-OS cache dir)"""
+    configured = os.getenv("PLAYWRIGHT_BROWSERS_PATH")
+    if configured == "0":
+        import playwright
+        return os.path.join(os.path.dirname(playwright.__file__), "driver", "package", ".local-browsers")
+    if configured:
+        return configured
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches/ms-playwright")
+    if sys.platform == "win32":
+        return os.path.join(os.getenv("LOCALAPPDATA", os.path.expanduser("~")), "ms-playwright")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "ms-playwright")
+
+def _required_browser_dirs() -> list:
+    """Directories this Playwright version launches chromium from, e.g. chromium-1169 and chromium_headless_shell-1169"""
+    import playwright
+    manifest = os.path.join(os.path.dirname(playwright.__file__), "driver", "package", "browsers.json")
+    with open(manifest) as f:
+        browsers = json.load(f)["browsers"]
+    return [
+        f"{browser['name'].replace('-', '_')}-{browser['revision']}"
+        for browser in browsers if browser["name"] in ("chromium", "chromium-headless-shell")
+    ]
+
+def check_chromium() -> dict:
+    """Cheap readiness check: no subprocesses, only the install markers and the version stamp.
+
+    ``ready`` means the chromium builds this Playwright version needs are on disk;
+    ``stamped`` means ensure_playwright_installed also finished (system deps included)
+    for exactly this Playwright version.
+    """
+    try:
+        playwright_version = version("playwright")
+        required = _required_browser_dirs()
+    except (PackageNotFoundError, ImportError, OSError, KeyError, ValueError) as e:
+        return {"ready": False, "stamped": False, "playwright": None, "missing": [], "error": str(e)}
+
+    root = browsers_path()
+    missing = [name for name in required if not os.path.exists(os.path.join(root, name, "INSTALLATION_COMPLETE"))]
+    stamp = {}
+    try:
+        with open(os.path.join(root, STAMP_FILE)) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        pass
+    return {
+        "ready": not missing,
+        "stamped": not missing and stamp.get("playwright") == playwright_version,
+        "playwright": playwright_version,
+        "missing": missing,
+    }
+
+def _write_stamp(playwright_version: str):
+    root = browsers_path()
+    try:
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, STAMP_FILE), "w") as f:
+            json.dump({"playwright": playwright_version, "installed_at": time.time()}, f)
+    except OSError as e:
+        print(f"⚠️ Could not write Playwright stamp: {e}")
+
+@contextmanager
+def _install_lock():
+    """Serialize installs between processes, e.g. several uvicorn workers starting at once"""
+    root = browsers_path()
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".snuffl-install.lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def ensure_playwright_installed(force: bool = False):
+    """Ensure Playwright browsers are installed; a no-op when the stamp matches this Playwright version"""
+    try:
+        with _install_lock():
+            # Checked under the lock, so workers waiting on another worker's install skip their own
+            status = check_chromium()
+            if status["stamped"] and not force:
+                print(f"✅ Chromium for Playwright {status['playwright']} already installed")
+                return True
+            return _install()
+    except OSError as e:
+        print(f"❌ Error installing Playwright: {e}")
+        return False
 
-def ensure_playwright_installed():
-    """Ensure Playwright browsers are installed"""
+def _install():
     try:
         print("🔧 Installing Playwright browsers...")
-        
+
         # Install only chromium browser (faster and smaller)
         result = subprocess.run([
             sys.executable, "-m", "playwright", "install", "chromium"
         ], capture_output=True, text=True, timeout=300)
-        
+
         if result.returncode == 0:
             print("✅ Playwright chromium browser installed successfully")
-            
+
             # Install system dependencies for chromium only
             print("🔧 Installing Playwright system dependencies...")
             deps_result = subprocess.run([
                 sys.executable, "-m", "playwright", "install-deps", "chromium"
             ], capture_output=True, text=True, timeout=300)
-            
+
             if deps_result.returncode == 0:
                 print("✅ Playwright system dependencies installed")
+                _write_stamp(version("playwright"))
                 return True
             else:
                 print(f"⚠️ Warning: Failed to install system deps: {deps_result.stderr}")
@@ -30,7 +128,7 @@ def ensure_playwright_installed():
         else:
             print(f"❌ Failed to install Playwright: {result.stderr}")
             return False
-            
+
     except subprocess.TimeoutExpired:
         print("❌ Playwright installation timed out")
         return False
@@ -39,4 +137,9 @@ def ensure_playwright_installed():
         return False
 
 if __name__ == "__main__":
-    ensure_playwright_installed()
+    # Build step: install once and stamp; --check only reports, for start scripts and debugging
+    if "--check" in sys.argv:
+        status = check_chromium()
+        print(json.dumps(status))
+        sys.exit(0 if status["ready"] else 1)
+    sys.exit(0 if ensure_playwright_installed(force="--force" in sys.argv) else 1)
@@ -0,0 +1,452 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+class QueueFullError(Exception):
+    """Raised by JobQueue.submit when the queue already holds max_queue_depth waiting jobs"""
+
+class Job:
+    """A batch of URLs run against one scrape endpoint, with per-URL results filled in as they finish"""
+
+    def __init__(self, urls: List[str], endpoint: str, options: Optional[dict] = None, priority: int = 0,
+                 job_id: Optional[str] = None, status: str = "queued", results: Optional[List[Optional[dict]]] = None,
+                 error: Optional[str] = None, created_at: Optional[float] = None, started_at: Optional[float] = None,
+                 finished_at: Optional[float] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.urls = urls
+        self.endpoint = endpoint
+        self.options = options or {}
+        self.priority = priority
+        self.status = status
+        self.results = results if results is not None else [None] * len(urls)
+        self.error = error
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @property
+    def completed(self) -> int:
+        return sum(1 for result in self.results if result is not None)
+
+    def pending_indices(self) -> List[int]:
+        return [index for index, result in enumerate(self.results) if result is None]
+
+    def summary(self) -> dict:
+        successful = sum(1 for result in self.results if result is not None and result.get("success"))
+        completed = self.completed
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "endpoint": self.endpoint,
+            "priority": self.priority,
+            "total_urls": len(self.urls),
+            "completed": completed,
+            "successful_scrapes": successful,
+            "failed_scrapes": completed - successful,
+            "progress": round(completed / len(self.urls), 3) if self.urls else 1.0,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "urls": self.urls,
+            "endpoint": self.endpoint,
+            "options": self.options,
+            "priority": self.priority,
+            "status": self.status,
+            "results": self.results,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        return cls(
+            urls=data["urls"],
+            endpoint=data["endpoint"],
+            options=data.get("options"),
+            priority=data.get("priority", 0),
+            job_id=data["id"],
+            status=data.get("status", "queued"),
+            results=data.get("results"),
+            error=data.get("error"),
+            created_at=data.get("created_at"),
+            started_at=data.get("started_at"),
+            finished_at=data.get("finished_at")
+        )
+
+class MemoryJobStore:
+    """Default job store: jobs live only as long as the process"""
+
+    def __init__(self):
+        self._jobs: Dict[str, dict] = {}
+
+    async def save(self, job: Job) -> bool:
+        self._jobs[job.id] = job.to_dict()
+        return True
+
+    async def save_result(self, job: Job, index: int, result: dict) -> bool:
+        self._jobs[job.id]["results"][index] = result
+        return True
+
+    async def delete(self, job_id: str):
+        self._jobs.pop(job_id, None)
+
+    async def load_all(self) -> List[Job]:
+        return [Job.from_dict(data) for data in self._jobs.values()]
+
+    def status(self) -> dict:
+        return {"type": "memory", "jobs": len(self._jobs)}
+
+    def close(self):
+        pass
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class SqliteJobStore:
+    """Job store backed by a SQLite file, so queued and half-finished jobs survive a restart.
+
+    Every row records the pid of the worker process that owns the job, so several
+    uvicorn workers can share one file: each runs only its own jobs, reads the
+    others' on demand, and a cancelled row is never overwritten by a running copy.
+    Per-URL results live in ``job_results``, one row each, so finishing a URL
+    writes that result only instead of re-serializing the whole job.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL, owner INTEGER)"
+        )
+        if "owner" not in [column[1] for column in self._db.execute("PRAGMA table_info(jobs)")]:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_results ("
+            "job_id TEXT NOT NULL, idx INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (job_id, idx))"
+        )
+        self._db.commit()
+        self._db_lock = threading.Lock()
+        # Writes for one job must land in order; a stale snapshot must never overwrite a newer one
+        self._write_lock = asyncio.Lock()
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._db_lock:
+            rows = self._db.execute(sql, params).fetchall()
+            self._db.commit()
+            return rows
+
+    def _write(self, sql: str, params: tuple) -> int:
+        with self._db_lock:
+            changed = self._db.execute(sql, params).rowcount
+            self._db.commit()
+            return changed
+
+    async def save(self, job: Job) -> bool:
+        """Write the job's status and options (not its results); False when the stored row was cancelled meanwhile"""
+        data = json.dumps(dict(job.to_dict(), results=None))
+        async with self._write_lock:
+            changed = await asyncio.to_thread(
+                self._write,
+                "INSERT INTO jobs (id, status, data, updated_at, owner) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, data = excluded.data, updated_at = excluded.updated_at "
+                "WHERE jobs.status != 'cancelled' OR excluded.status = 'cancelled'",
+                (job.id, job.status, data, time.time(), os.getpid())
+            )
+        return changed > 0
+
+    def _save_result(self, job_id: str, index: int, data: str) -> bool:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO job_results (job_id, idx, data) VALUES (?, ?, ?)", (job_id, index, data)
+            )
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            self._db.commit()
+        return row is None or row[0] != "cancelled"
+
+    async def save_result(self, job: Job, index: int, result: dict) -> bool:
+        """Store one URL's result; False when the job was cancelled meanwhile (the result is kept)"""
+        data = json.dumps(result)
+        async with self._write_lock:
+            return await asyncio.to_thread(self._save_result, job.id, index, data)
+
+    async def delete(self, job_id: str):
+        async with self._write_lock:
+            await asyncio.to_thread(self._delete, "id = ?", (job_id,))
+
+    def _delete(self, where: str, params: tuple):
+        with self._db_lock:
+            self._db.execute(f"DELETE FROM job_results WHERE job_id IN (SELECT id FROM jobs WHERE {where})", params)
+            self._db.execute(f"DELETE FROM jobs WHERE {where}", params)
+            self._db.commit()
+
+    def _jobs_with_results(self, rows: List[tuple]) -> List[Job]:
+        """Jobs from (id, data) rows with their results attached; call with _db_lock held"""
+        jobs = []
+        for job_id, data in rows:
+            try:
+                job = Job.from_dict(json.loads(data))
+                for index, result in self._db.execute("SELECT idx, data FROM job_results WHERE job_id = ?", (job_id,)):
+                    if 0 <= index < len(job.results):
+                        job.results[index] = json.loads(result)
+                jobs.append(job)
+            except Exception as e:
+                print(f"⚠️ Skipping unreadable stored job {job_id}: {e}")
+        return jobs
+
+    def _load(self, where: str = "1", params: tuple = ()) -> List[Job]:
+        with self._db_lock:
+            rows = self._db.execute(f"SELECT id, data FROM jobs WHERE {where}", params).fetchall()
+            return self._jobs_with_results(rows)
+
+    async def load_all(self) -> List[Job]:
+        return await asyncio.to_thread(self._load)
+
+    async def load(self, job_id: str) -> Optional[Job]:
+        jobs = await asyncio.to_thread(self._load, "id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def _claim(self, owner: int) -> List[Job]:
+        with self._db_lock:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+                rows = self._db.execute("SELECT id, data, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+                claimed = [(job_id, data) for job_id, data, current in rows
+                           if current is None or current == owner or not _process_alive(current)]
+                self._db.executemany("UPDATE jobs SET owner = ? WHERE id = ?", [(owner, job_id) for job_id, _ in claimed])
+                self._db.commit()
+            except Exception:
+                self._db.rollback()
+                raise
+            return self._jobs_with_results(claimed)
+
+    async def claim_unfinished(self, owner: int) -> List[Job]:
+        """Take over queued and running jobs whose owning worker is gone"""
+        return await asyncio.to_thread(self._claim, owner)
+
+    async def delete_finished(self, before: float):
+        async with self._write_lock:
+            await asyncio.to_thread(
+                self._delete, "status IN ('completed', 'failed', 'cancelled') AND updated_at < ?", (before,)
+            )
+
+    def status(self) -> dict:
+        with self._db_lock:
+            count = self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {"type": "sqlite", "path": self.path, "jobs": count}
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
+
+# Runs the given URL indices of a job, yielding (index, result dict) as each one finishes
+JobRunner = Callable[[Job, List[int]], AsyncIterator[Tuple[int, dict]]]
+
+class JobQueue:
+    """In-process priority queue of scrape jobs drained by a fixed pool of worker tasks.
+
+    Higher priority jobs start first; equal priorities run in submission order.
+    At most ``max_queue_depth`` jobs may be waiting at once. Every state change
+    is written through to the store, and on start any job the store still has
+    as queued or running is re-queued, resuming from its unfinished URLs.
+
+    With ``shared=True`` several worker processes use the same SqliteJobStore:
+    each runs the jobs it accepted, only resumes jobs whose worker has died, and
+    answers and cancels other workers' jobs through the store.
+    """
+
+    def __init__(self, runner: JobRunner, store=None, workers: int = 2, max_queue_depth: int = 50,
+                 retention: float = 3600, shared: bool = False):
+        self.runner = runner
+        self.store = store or MemoryJobStore()
+        self.shared = shared
+        self.workers = max(1, workers)
+        self.max_queue_depth = max_queue_depth
+        self.retention = retention
+        self.jobs: Dict[str, Job] = {}
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0, "resumed": 0}
+
+    async def start(self):
+        self._wakeup = asyncio.Condition()
+        stored = await self.store.claim_unfinished(os.getpid()) if self.shared else await self.store.load_all()
+        for job in stored:
+            self.jobs[job.id] = job
+            if job.status in ("queued", "running"):
+                job.status = "queued"
+                self._push(job)
+                self.stats["resumed"] += 1
+        if self.stats["resumed"]:
+            print(f"📋 Resuming {self.stats['resumed']} unfinished jobs")
+        await self._prune()
+        self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        # Jobs interrupted here stay "running" in the store and resume on the next start
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self.store.close()
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    async def submit(self, urls: List[str], endpoint: str, options: Optional[dict] = None, priority: int = 0) -> Job:
+        await self._prune()
+        if self.queued >= self.max_queue_depth:
+            self.stats["rejected"] += 1
+            raise QueueFullError(f"Job queue is full ({self.max_queue_depth} jobs waiting)")
+        job = Job(urls, endpoint, options, priority)
+        self.jobs[job.id] = job
+        await self.store.save(job)
+        self._push(job)
+        self.stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def lookup(self, job_id: str) -> Optional[Job]:
+        """Like get, but in shared mode also finds jobs owned by other workers"""
+        job = self.jobs.get(job_id)
+        if job is None and self.shared:
+            job = await self.store.load(job_id)
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; results gathered so far are kept"""
+        job = self.jobs.get(job_id)
+        if job is None and self.shared:
+            # Another worker's job: it stops when its next store write finds the row cancelled
+            job = await self.store.load(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        self.stats["cancelled"] += 1
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        await self.store.save(job)
+        return job
+
+    def status(self) -> dict:
+        counts = {status: 0 for status in JOB_STATUSES}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.workers,
+            "max_queue_depth": self.max_queue_depth,
+            "jobs": counts,
+            "store": self.store.status(),
+            **self.stats
+        }
+
+    def _push(self, job: Job):
+        heapq.heappush(self._heap, (-job.priority, next(self._sequence), job.id))
+        if self._wakeup is not None:
+            asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._wakeup:
+            self._wakeup.notify()
+
+    async def _next_job(self) -> Job:
+        async with self._wakeup:
+            while True:
+                while self._heap:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self.jobs.get(job_id)
+                    # Cancelled or pruned while waiting
+                    if job is not None and job.status == "queued":
+                        return job
+                await self._wakeup.wait()
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            job.status = "running"
+            job.started_at = job.started_at or time.time()
+            if not await self.store.save(job):
+                job.status = "cancelled"  # Cancelled through another worker while queued
+                continue
+            task = asyncio.ensure_future(self._run(job))
+            self._running[job.id] = task
+            try:
+                # wait() does not raise when the job task is cancelled, only when this worker is
+                await asyncio.wait([task])
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(job.id, None)
+
+    async def _run(self, job: Job):
+        results = self.runner(job, job.pending_indices())
+        try:
+            async for index, result in results:
+                job.results[index] = result
+                if not await self.store.save_result(job, index, result):
+                    # Cancelled through another worker; the results stored so far are kept
+                    job.status = "cancelled"
+                    await results.aclose()
+                    break
+            else:
+                job.status = "completed"
+                self.stats["completed"] += 1
+        except asyncio.CancelledError:
+            if job.status != "cancelled":
+                # Shutdown: leave the job resumable
+                raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            self.stats["failed"] += 1
+        job.finished_at = job.finished_at or time.time()
+        await self.store.save(job)
+
+    async def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.status in FINISHED_STATUSES and (job.finished_at or 0) < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
+            await self.store.delete(job_id)
+        if self.shared:
+            # Including jobs finished by workers that have since exited
+            await self.store.delete_finished(cutoff)
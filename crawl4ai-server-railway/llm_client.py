@@ -0,0 +1,151 @@
+import asyncio
+import time
+from typing import Optional
+
+from groq import AsyncGroq, BadRequestError
+
+import metrics
+import request_timing
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+class LLMCompletion:
+    """Text of a chat completion plus the usage numbers Groq reported"""
+
+    def __init__(self, text: str, model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+                 finish_reason: Optional[str] = None, latency_ms: float = 0.0):
+        self.text = text
+        self.model = model
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.finish_reason = finish_reason
+        self.latency_ms = latency_ms
+
+def _failed_generation(error: BadRequestError) -> Optional[str]:
+    """The text Groq generated before rejecting it as invalid JSON (json_validate_failed), if that is the error"""
+    body = error.body if isinstance(error.body, dict) else {}
+    detail = body.get("error", body)
+    if isinstance(detail, dict) and detail.get("code") == "json_validate_failed":
+        return detail.get("failed_generation")
+    return None
+
+class LLMClient:
+    """Non-blocking Groq client shared by every extractor.
+
+    Calls go through ``AsyncGroq`` so a slow completion never blocks the event
+    loop. A semaphore caps how many completions are in flight at once, every call
+    has its own timeout, and cancelling the awaiting task cancels the HTTP request.
+    With ``json_mode`` completions use Groq's JSON mode, so replies are a single
+    JSON object; one Groq rejects (usually cut off by max_tokens) is still
+    returned, with finish_reason "json_validate_failed", for the caller to repair.
+    """
+
+    def __init__(self, api_key: Optional[str], model: str = DEFAULT_MODEL, max_concurrency: int = 4,
+                 timeout: float = 30.0, max_retries: int = 1, json_mode: bool = False):
+        self.model = model
+        self.json_mode = json_mode
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self._client = AsyncGroq(api_key=api_key, max_retries=max_retries)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {"calls": 0, "timeouts": 0, "errors": 0, "cancelled": 0, "json_validate_failed": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0}
+
+    async def complete(self, prompt: str, max_tokens: int, temperature: float = 0, top_p: float = 0.1,
+                       model: Optional[str] = None, timeout: Optional[float] = None,
+                       json_mode: Optional[bool] = None) -> LLMCompletion:
+        """Run a single-message chat completion, waiting for a free concurrency slot first"""
+        model = model or self.model
+        json_mode = self.json_mode if json_mode is None else json_mode
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        wait_started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    **extra
+                ),
+                timeout=timeout or self.timeout
+            )
+        except BadRequestError as e:
+            failed_generation = _failed_generation(e) if json_mode else None
+            if failed_generation is None:
+                self.stats["errors"] += 1
+                metrics.LLM_CALLS.labels(model=model, outcome="error").inc()
+                raise
+            self.stats["json_validate_failed"] += 1
+            metrics.LLM_CALLS.labels(model=model, outcome="json_validate_failed").inc()
+            latency = time.perf_counter() - started_at
+            request_timing.record_llm(
+                model, latency * 1000, (started_at - wait_started) * 1000, 0, 0, "json_validate_failed"
+            )
+            return LLMCompletion(text=failed_generation, model=model, finish_reason="json_validate_failed",
+                                 latency_ms=latency * 1000)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            metrics.LLM_CALLS.labels(model=model, outcome="timeout").inc()
+            raise
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            metrics.LLM_CALLS.labels(model=model, outcome="cancelled").inc()
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            metrics.LLM_CALLS.labels(model=model, outcome="error").inc()
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+        self.stats["calls"] += 1
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        latency = time.perf_counter() - started_at
+        metrics.LLM_CALLS.labels(model=model, outcome="ok").inc()
+        metrics.LLM_LATENCY_SECONDS.labels(model=model).observe(latency)
+        metrics.LLM_TOKENS.labels(model=model, kind="prompt").observe(prompt_tokens)
+        metrics.LLM_TOKENS.labels(model=model, kind="completion").observe(completion_tokens)
+
+        choice = response.choices[0]
+        request_timing.record_llm(
+            model, latency * 1000, (started_at - wait_started) * 1000, prompt_tokens, completion_tokens,
+            getattr(choice, "finish_reason", None)
+        )
+        return LLMCompletion(
+            text=choice.message.content or "",
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            finish_reason=getattr(choice, "finish_reason", None),
+            latency_ms=latency * 1000
+        )
+
+    def status(self) -> dict:
+        return {
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            **self.stats,
+        }
+
+    async def close(self):
+        await self._client.close()
@@ -1,35 +1,287 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
-from groq import Groq
+import time
+STARTUP_STARTED = time.perf_counter()  # Cold-start clock; module imports count towards it
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode
 import os
-import json
+import re
+import copy
 import asyncio
-from typing import List, Optional
+import functools
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+from urllib.parse import parse_qs, urlsplit
 from dotenv import load_dotenv
-from install_playwright import ensure_playwright_installed
+from install_playwright import check_chromium, ensure_playwright_installed
+from browser_pool import BrowserPool, is_browser_crash
+from llm_client import LLMClient
+from cache_store import TieredCache
+from crawl_cache import CrawlCache, CrawledPage, normalize_url, parse_domain_ttls
+from extraction_cache import ExtractionCache
+from fast_extract import extract_fast_path_fields, fields_from_markdown, parse_price
+from content_reducer import compact_markdown, count_tokens, reduce_content
+from batch_extraction import PageBatcher
+from job_queue import Job, JobQueue, MemoryJobStore, QueueFullError, SqliteJobStore
+from single_flight import SingleFlight
+from politeness import PolitenessScheduler, is_block_page, parse_domain_limits
+from crawl_profiles import build_profiles, parse_retailer_allowlists, profile_hook
+from http_fetch import HttpFetcher, html_to_markdown
+from domain_strategy import DomainStrategies, url_error
+import memory_budget
+import metrics
+import partial_json
+import request_timing
+from response_format import dumps, encode_response, project
 
 load_dotenv()
 
-# Ensure Playwright is installed on startup
-print("🔧 Checking Playwright installation...")
-playwright_ready = ensure_playwright_installed()
-if not playwright_ready:
-    print("❌ Warning: Playwright installation failed. Browser functionality may not work.")
+# Chromium is installed at build time (install_playwright.py); startup only checks the install
+# markers and, if the build skipped it, installs in the background while /health reports "starting"
+PLAYWRIGHT_AUTO_INSTALL = os.getenv("PLAYWRIGHT_AUTO_INSTALL", "true").lower() == "true"
+
+# Multi-worker mode: uvicorn runs WEB_CONCURRENCY processes. BROWSER_POOL_SIZE, GROQ_MAX_CONCURRENCY
+# and the per-host politeness limits are server-wide and split between the workers; crawl and
+# extraction caches, domain stats and jobs are shared through the SQLite files under .cache/
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+def per_worker(total: int) -> int:
+    """This worker's share of a server-wide limit, at least 1"""
+    return max(1, total // WORKERS)
+
+BROWSER_POOL_TOTAL = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+if WORKERS > BROWSER_POOL_TOTAL:
+    print(f"⚠️ WEB_CONCURRENCY={WORKERS} exceeds BROWSER_POOL_SIZE={BROWSER_POOL_TOTAL}: each worker still needs one browser")
+
+# Crawl profiles: "fast" aborts images, fonts, media and trackers; "full" loads everything
+crawl_profiles = build_profiles(
+    parse_retailer_allowlists(os.environ["CRAWL_PROFILE_ALLOWLIST"]) if "CRAWL_PROFILE_ALLOWLIST" in os.environ else None
+)
+DEFAULT_CRAWL_PROFILE = os.getenv("CRAWL_PROFILE", "fast")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Shared pool of warm Chromium instances used by every crawl endpoint
+browser_pool = BrowserPool(
+    browser_config=BrowserConfig(
+        browser_type="chromium",
+        headless=True,
+        verbose=False,
+        user_agent=USER_AGENT,
+        proxy=os.getenv("BROWSER_PROXY") or None  # e.g. the benchmark's fixture server
+    ),
+    size=per_worker(BROWSER_POOL_TOTAL),
+    max_pages_per_browser=int(os.getenv("BROWSER_POOL_MAX_PAGES", "4")),
+    recycle_after=int(os.getenv("BROWSER_RECYCLE_AFTER", "100")),
+    hooks={"on_page_context_created": profile_hook(crawl_profiles)}
+)
+
+# Memory bounds: crawl HTML is dropped as soon as markdown and structured data are out of it,
+# markdown is compacted to CRAWL_MAX_MARKDOWN_CHARS before caching, and each request may keep
+# at most REQUEST_MEMORY_BUDGET_MB of page content alive (later pages are trimmed to fit)
+CRAWL_MAX_MARKDOWN_CHARS = int(os.getenv("CRAWL_MAX_MARKDOWN_CHARS", "40000"))
+CRAWL_MAX_LINKS = int(os.getenv("CRAWL_MAX_LINKS", "40"))
+REQUEST_MEMORY_BUDGET = int(float(os.getenv("REQUEST_MEMORY_BUDGET_MB", "8")) * 1024 * 1024)
+memory_stats = {"compacted_pages": 0, "trimmed_pages": 0, "chars_dropped": 0}
+
+def new_memory_budget() -> memory_budget.MemoryBudget:
+    return memory_budget.MemoryBudget(REQUEST_MEMORY_BUDGET)
+
+# Crawl result cache: memory LRU in front of an on-disk SQLite store
+crawl_cache = CrawlCache(
+    store=TieredCache(
+        "crawl",
+        max_memory_bytes=int(os.getenv("CRAWL_CACHE_MAX_MB", "64")) * 1024 * 1024,
+        disk_path=os.getenv("CRAWL_CACHE_PATH", ".cache/crawl_cache.sqlite3") or None,
+        max_disk_entries=int(os.getenv("CRAWL_CACHE_DISK_ENTRIES", "5000"))
+    ),
+    default_ttl=float(os.getenv("CRAWL_CACHE_TTL", "3600")),
+    domain_ttls=parse_domain_ttls(os.getenv("CRAWL_CACHE_DOMAIN_TTLS", "google.com=900,amazon.in=21600,flipkart.com=21600"))
+)
+
+# Memoized LLM extractions keyed by (extractor, prompt version, model, content hash)
+extraction_cache = ExtractionCache(
+    store=TieredCache(
+        "extraction",
+        max_memory_bytes=int(os.getenv("EXTRACTION_CACHE_MAX_MB", "32")) * 1024 * 1024,
+        disk_path=os.getenv("EXTRACTION_CACHE_PATH", ".cache/extraction_cache.sqlite3") or None,
+        max_disk_entries=int(os.getenv("EXTRACTION_CACHE_DISK_ENTRIES", "20000"))
+    ),
+    ttl=float(os.getenv("EXTRACTION_CACHE_TTL", "86400")),
+    enabled=os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() != "false"
+)
+
+# Plain-HTTP tier tried before the browser; escalation decisions are learned per domain
+http_fetcher = HttpFetcher(
+    user_agent=USER_AGENT,
+    timeout=float(os.getenv("HTTP_FETCH_TIMEOUT", "10")),
+    max_connections=int(os.getenv("HTTP_FETCH_MAX_CONNECTIONS", "20")),
+    min_content_chars=int(os.getenv("HTTP_FETCH_MIN_CHARS", "1500")),
+    browser_domains=os.getenv("HTTP_FETCH_BROWSER_DOMAINS", "google.com").split(","),
+    enabled=os.getenv("HTTP_FETCH_ENABLED", "true").lower() != "false"
+)
+HTTP_FETCH_REQUIRED_FIELDS = tuple(os.getenv("HTTP_FETCH_REQUIRED_FIELDS", "title,price").split(","))
+
+# Per-domain crawl history (success rate, latency, content size, extractor tier), kept on disk,
+# used to start each crawl at the cheapest strategy that has been working for the host
+domain_strategies = DomainStrategies(
+    store=TieredCache(
+        "domain_stats",
+        max_memory_bytes=4 * 1024 * 1024,
+        disk_path=os.getenv("DOMAIN_STATS_PATH", ".cache/domain_stats.sqlite3") or None,
+        max_disk_entries=5000
+    ),
+    min_success_rate=float(os.getenv("STRATEGY_MIN_SUCCESS_RATE", "0.6")),
+    fail_streak_limit=int(os.getenv("STRATEGY_FAIL_STREAK", "2")),
+    reprobe_every=int(os.getenv("STRATEGY_REPROBE_EVERY", "20"))
+)
+
+# Per-host politeness shared by every crawl: concurrency cap, request rate, backoff on block pages
+politeness = PolitenessScheduler(
+    default_concurrency=per_worker(int(os.getenv("POLITENESS_HOST_CONCURRENCY", "4"))),
+    default_rate=float(os.getenv("POLITENESS_HOST_RATE", "2")) / WORKERS,
+    domain_limits={
+        domain: (per_worker(concurrency), rate / WORKERS)
+        for domain, (concurrency, rate) in parse_domain_limits(
+            os.getenv("POLITENESS_DOMAIN_LIMITS", "google.com=2:1,amazon.in=3:2,flipkart.com=3:2")
+        ).items()
+    },
+    base_backoff=float(os.getenv("POLITENESS_BACKOFF", "5")),
+    max_backoff=float(os.getenv("POLITENESS_MAX_BACKOFF", "60"))
+)
+
+# Single-flight coalescing: identical in-flight requests and crawls run once
+request_flights = SingleFlight("requests")
+crawl_flights = SingleFlight("crawls")
+
+# Seller deep-scrape: how many sellers to crawl at once, overall deadline and early cutoff
+DEEP_SCRAPE_FAN_OUT = int(os.getenv("DEEP_SCRAPE_FAN_OUT", "3"))
+DEEP_SCRAPE_DEADLINE = float(os.getenv("DEEP_SCRAPE_DEADLINE", "25"))
+DEEP_SCRAPE_GOOD_ENOUGH = os.getenv("DEEP_SCRAPE_GOOD_ENOUGH", "true").lower() != "false"
+DEEP_SCRAPE_REQUIRED_FIELDS = tuple(os.getenv("DEEP_SCRAPE_REQUIRED_FIELDS", "title,price,image_urls,description,average_rating").split(","))
 
-app = FastAPI(title="Snuffl Crawl4AI Server (Railway)", version="1.0.0")
+# Batched extraction: prompt token budget per Groq call, pages per call, wait for more pages, output per page
+BATCH_EXTRACT_TOKEN_BUDGET = int(os.getenv("BATCH_EXTRACT_TOKEN_BUDGET", "6000"))
+BATCH_EXTRACT_MAX_PAGES = int(os.getenv("BATCH_EXTRACT_MAX_PAGES", "5"))
+BATCH_EXTRACT_LINGER = float(os.getenv("BATCH_EXTRACT_LINGER", "0.3"))
+BATCH_OUTPUT_TOKENS_PER_PAGE = int(os.getenv("BATCH_OUTPUT_TOKENS_PER_PAGE", "600"))
+batch_extraction_stats = {"batches": 0, "pages": 0, "page_fallbacks": 0}
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Per-request stage limits for the pipelined bulk scrape
+BULK_CRAWL_CONCURRENCY = int(os.getenv("BULK_CRAWL_CONCURRENCY", "6"))
+BULK_EXTRACT_CONCURRENCY = int(os.getenv("BULK_EXTRACT_CONCURRENCY", "4"))
+
+# Job queue: "memory" or "sqlite" store, URLs per job, per-job concurrency for single-URL endpoints
+JOB_STORE = os.getenv("JOB_STORE", "memory").lower()
+if WORKERS > 1 and JOB_STORE != "sqlite":
+    print("📋 Multiple workers: using the sqlite job store so every worker can answer /jobs")
+    JOB_STORE = "sqlite"
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite3")
+JOB_MAX_URLS = int(os.getenv("JOB_MAX_URLS", "500"))
+JOB_URL_CONCURRENCY = int(os.getenv("JOB_URL_CONCURRENCY", "3"))
+
+# Async Groq client shared by every extractor
+llm_client = LLMClient(
+    api_key=os.getenv("GROQ_API_KEY"),
+    model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+    max_concurrency=per_worker(int(os.getenv("GROQ_MAX_CONCURRENCY", "4"))),
+    timeout=float(os.getenv("GROQ_TIMEOUT", "30")),
+    # JSON mode makes Groq return one JSON object; replies cut off by max_tokens are repaired, not discarded
+    json_mode=os.getenv("GROQ_JSON_MODE", "true").lower() == "true"
+)
+
+# Cold-start phases in seconds; "ready" flips once the browser pool warm-up has finished
+startup = {"ready": False, "phases": {}, "playwright": None, "total_seconds": None}
+
+def record_startup_phase(name: str, started: float):
+    startup["phases"][name] = round(time.perf_counter() - started, 2)
+
+async def warm_up():
+    """Check (and if needed install) Chromium, then launch the pool, without blocking the port bind"""
+    phase_started = time.perf_counter()
+    playwright = await asyncio.to_thread(check_chromium)
+    record_startup_phase("playwright_check", phase_started)
+    if not playwright["ready"] and PLAYWRIGHT_AUTO_INSTALL:
+        print(f"🔧 Chromium missing ({', '.join(playwright['missing']) or playwright.get('error')}), installing...")
+        phase_started = time.perf_counter()
+        if not await asyncio.to_thread(ensure_playwright_installed):
+            print("❌ Warning: Playwright installation failed. Browser functionality may not work.")
+        record_startup_phase("playwright_install", phase_started)
+        playwright = await asyncio.to_thread(check_chromium)
+    startup["playwright"] = playwright
+
+    phase_started = time.perf_counter()
+    await browser_pool.start()
+    record_startup_phase("browser_pool", phase_started)
+
+    startup["total_seconds"] = round(time.perf_counter() - STARTUP_STARTED, 2)
+    startup["ready"] = True
+    print(f"🚀 Cold start {startup['total_seconds']}s: " + ", ".join(f"{name} {seconds}s" for name, seconds in startup["phases"].items()))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    record_startup_phase("imports", STARTUP_STARTED)
+    phase_started = time.perf_counter()
+    await job_queue.start()
+    record_startup_phase("job_queue", phase_started)
+    background = [asyncio.create_task(warm_up())]
+    if metrics.MULTIPROCESS:
+        background.append(asyncio.create_task(metrics.refresh_forever()))
+    yield
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    metrics.mark_worker_stopped()
+    await job_queue.close()
+    await browser_pool.close()
+    await http_fetcher.close()
+    await llm_client.close()
+    crawl_cache.store.close()
+    extraction_cache.store.close()
+    domain_strategies.store.close()
+
+app = FastAPI(title="Snuffl Crawl4AI Server (Railway)", version="1.0.0", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """End-to-end time per endpoint, labelled by route template so /jobs/{job_id} stays one series"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        if route is not None and route.path != "/metrics":
+            metrics.REQUEST_SECONDS.labels(
+                endpoint=route.path, method=request.method, status=str(status)
+            ).observe(time.perf_counter() - started)
 
 # Request/Response models
+CachePolicy = Literal["use", "refresh", "bypass"]
+CrawlProfileName = Literal["fast", "full"]
+
 class ScrapeRequest(BaseModel):
     url: str
     extract_structured_data: bool = True
+    cache: CachePolicy = "use"  # "refresh" re-crawls and overwrites, "bypass" skips the cache entirely
+    profile: Optional[CrawlProfileName] = None  # Defaults to CRAWL_PROFILE
+    trace_id: Optional[str] = None  # Echoed back with the timings; generated when missing
+    fields: Optional[List[str]] = None  # ProductData fields to return; the LLM is skipped once rule-based extraction has them all
+    include_raw_content: bool = True
 
 class BulkScrapeRequest(BaseModel):
     urls: List[str]
     extract_structured_data: bool = True
+    cache: CachePolicy = "use"
+    profile: Optional[CrawlProfileName] = None
+    pipelined: bool = True  # Extract each page as soon as its crawl finishes
+    extraction_mode: Literal["per_page", "batched"] = "per_page"  # "batched" packs several pages into one Groq call
+    trace_id: Optional[str] = None
+    fields: Optional[List[str]] = None
+    include_raw_content: bool = True
 
 class ColorVariant(BaseModel):
     color_name: Optional[str] = None
@@ -51,6 +303,7 @@ class ProductData(BaseModel):
     title: Optional[str] = None
     brand: Optional[str] = None
     price: Optional[float] = None
+    currency: Optional[str] = None
     price_range: Optional[str] = None
     image_urls: Optional[List[str]] = None
     description: Optional[str] = None
@@ -73,22 +326,345 @@ class ScrapeResponse(BaseModel):
     product_data: Optional[ProductData] = None
     raw_content: Optional[str] = None
     error: Optional[str] = None
+    trace_id: Optional[str] = None
+    timings: Optional[dict] = None  # total_ms, per-stage ms, each LLM call with tokens, cache hit/miss per stage
+
+def check_fields(fields: Optional[List[str]]):
+    unknown = sorted(set(fields or []) - set(ProductData.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown product fields: {', '.join(unknown)}")
+
+def is_shaped(request) -> bool:
+    """Whether the client asked for a projected response instead of the full ScrapeResponse"""
+    return request.fields is not None or not request.include_raw_content
+
+def crawl_variant(crawl_config: CrawlerRunConfig, profile: Optional[str] = None) -> str:
+    """Crawl cache variant: markdown depends on the word threshold and on what the profile let through"""
+    return f"wct={crawl_config.word_count_threshold}|{profile or DEFAULT_CRAWL_PROFILE}"
+
+async def crawl_url(url: str, crawl_config: CrawlerRunConfig, cache: str = "use",
+                    profile: Optional[str] = None) -> CrawledPage:
+    """Crawl one URL through the crawl cache, using the cheapest strategy that works for its domain"""
+    profile = profile or DEFAULT_CRAWL_PROFILE
+    variant = crawl_variant(crawl_config, profile)
+    # The page hook reads the profile from shared_data
+    crawl_config.shared_data = {**(crawl_config.shared_data or {}), "crawl_profile": profile}
+    cached_page = await crawl_cache.get(url, variant, policy=cache)
+    if cached_page:
+        request_timing.record_cache("crawl", cached_page.cache_status)
+        return fit_to_budget(cached_page)
+    
+    async def crawl():
+        page, blocked = None, False
+        for strategy in await domain_strategies.plan(url, crawl_strategies_for(url, profile)):
+            started = time.perf_counter()
+            with metrics.CRAWLS_IN_FLIGHT.track_inprogress():
+                if strategy == "http":
+                    page, blocked = await fetch_over_http(url, crawl_config), False
+                else:
+                    page, blocked = await crawl_in_browser(url, crawl_config, "full" if strategy == "browser_full" else profile)
+            metrics.PAGE_CRAWL_SECONDS.labels(strategy=strategy).observe(time.perf_counter() - started)
+            if page is not None and not blocked and is_browser_crash(page.error_message):
+                # The pool replaces the browser; not the strategy's fault, so try the next one without counting it
+                continue
+            if page is not None and not blocked and (not page.success or url_error(page.status_code)):
+                # Missing page, unknown host or failed navigation: a heavier strategy fails the same way
+                break
+            content_chars = len(page.markdown or "") if page else 0
+            if strategy == "http":
+                # The HTTP tier already applied its own content and field thresholds
+                worked = page is not None
+            else:
+                worked = not blocked and content_chars >= domain_strategies.min_useful_chars(url, crawl_cache.min_content_chars)
+            await domain_strategies.record(url, strategy, worked, (time.perf_counter() - started) * 1000, content_chars)
+            # Escalate only on too little content; a block page will not get better with a heavier
+            # strategy right away, politeness backs the host off
+            if worked or blocked:
+                break
+        
+        page.cache_status = cache if cache in ("refresh", "bypass") else "miss"
+        if not blocked:
+            await crawl_cache.put(page, variant, policy=cache)
+        return page
+    
+    # Concurrent requests for the same page share one browser crawl
+    page = await crawl_flights.do(crawl_cache.key(url, variant), crawl, share=share_crawled_page)
+    request_timing.record_cache("crawl", page.cache_status)
+    return fit_to_budget(page)
+
+def compact_page(page: CrawledPage) -> CrawledPage:
+    """Keep only what later stages read: outbound retailer links and markdown within CRAWL_MAX_MARKDOWN_CHARS"""
+    markdown = page.markdown or ""
+    page.links = select_links(page.url, markdown)
+    if len(markdown) > CRAWL_MAX_MARKDOWN_CHARS:
+        page.markdown = compact_markdown(markdown, CRAWL_MAX_MARKDOWN_CHARS)
+        memory_stats["compacted_pages"] += 1
+        memory_stats["chars_dropped"] += len(markdown) - len(page.markdown)
+    return page
+
+def fit_to_budget(page: CrawledPage) -> CrawledPage:
+    """Charge the page to the request's memory budget, trimming this request's copy once it is spent"""
+    budget = memory_budget.current()
+    if budget is None or not page.markdown:
+        return page
+    allowed = budget.admit(page.markdown)
+    if allowed >= len(page.markdown):
+        return page
+    trimmed = copy.copy(page)
+    trimmed.markdown = compact_markdown(page.markdown, allowed)
+    memory_stats["trimmed_pages"] += 1
+    metrics.PAGES_TRIMMED.inc()
+    return trimmed
+
+def crawl_strategies_for(url: str, profile: str) -> List[str]:
+    """Strategies allowed for this request, cheapest first; the "full" profile asks for a real page load"""
+    if profile == "full":
+        return ["browser_full"]
+    return (["http"] if http_fetcher.accepts(url) else []) + ["browser", "browser_full"]
+
+async def crawl_in_browser(url: str, crawl_config: CrawlerRunConfig, profile: str):
+    """Render the page on a pooled browser; returns (page, blocked)"""
+    if profile == "full":
+        # Heaviest strategy: nothing aborted, wait for the full load event
+        crawl_config = crawl_config.clone(wait_until="load", shared_data={**(crawl_config.shared_data or {}), "crawl_profile": "full"})
+    
+    # Wait for the host's turn before taking a browser page
+    async with politeness.slot(url):
+        async with browser_pool.lease() as crawler:
+            started = time.perf_counter()
+            # crawl4ai generates the markdown inside arun, so navigation includes it
+            with request_timing.stage("navigation"):
+                result = await crawler.arun(url=url, config=crawl_config)
+            if not result.success and is_browser_crash(result.error_message):
+                browser_pool.report_crash(crawler)
+    if result.success:
+        crawl_profiles[profile].record_load((time.perf_counter() - started) * 1000)
+    
+    page = CrawledPage.from_result(url, result)
+    blocked = is_block_page(result.status_code, page.markdown)
+    if result.success or blocked:
+        politeness.report(url, blocked)
+    if result.success and result.html and not blocked:
+        # Parse JSON-LD / OpenGraph / site DOM now, while the HTML is still around
+        with request_timing.stage("structured_data"):
+            page.structured_data = await asyncio.to_thread(extract_fast_path_fields, result.html, url)
+    # Only the compact page outlives this call; the CrawlResult with its HTML is freed here
+    return compact_page(page), blocked
+
+async def fetch_over_http(url: str, crawl_config: CrawlerRunConfig) -> Optional[CrawledPage]:
+    """Plain-HTTP tier: the page as served, converted like a browser crawl.
+
+    None means escalate to the browser; a failed page means the URL itself is bad
+    (missing page, unknown host) and the browser would fail the same way.
+    """
+    async with politeness.slot(url):
+        with request_timing.stage("http_fetch"):
+            fetched = await http_fetcher.fetch(url)
+    
+    if url_error(fetched.status_code, fetched.error):
+        return CrawledPage(
+            url=url,
+            success=False,
+            error_message=fetched.error or f"HTTP {fetched.status_code}",
+            status_code=fetched.status_code,
+            fetch_tier="http"
+        )
+    reason = http_fetcher.escalation_reason(fetched)
+    if is_block_page(fetched.status_code, None):
+        # 403/429/503: throttled, so back the host off like a block page in the browser tier
+        politeness.report(url, blocked=True)
+    markdown, metadata, structured_data = "", {}, {}
+    if reason is None:
+        try:
+            with request_timing.stage("markdown"):
+                markdown, metadata = await asyncio.to_thread(html_to_markdown, fetched.url, fetched.html, crawl_config)
+        except Exception as e:
+            print(f"⚠️ HTTP tier could not convert {url}: {e}")
+            reason = "convert_error"
+    if reason is None and is_block_page(fetched.status_code, markdown):
+        politeness.report(url, blocked=True)
+        reason = "blocked"
+    if reason is None:
+        with request_timing.stage("structured_data"):
+            structured_data = await asyncio.to_thread(extract_fast_path_fields, fetched.html, url)
+        has_fields = all(structured_data.get(field_name) not in (None, "", []) for field_name in HTTP_FETCH_REQUIRED_FIELDS)
+        reason = http_fetcher.escalation_reason(fetched, markdown, has_fields)
+        if reason is None and not has_fields:
+            reason = "missing_fields"
+    
+    http_fetcher.record(url, reason)
+    if reason is not None:
+        return None
+    politeness.report(url, blocked=False)
+    return compact_page(CrawledPage(
+        url=url,
+        success=True,
+        markdown=markdown,
+        metadata=metadata,
+        status_code=fetched.status_code,
+        structured_data=structured_data,
+        fetch_tier="http"
+    ))
+
+def share_crawled_page(page: CrawledPage) -> CrawledPage:
+    shared = copy.copy(page)
+    shared.cache_status = "coalesced"
+    return shared
+
+def coalesced(endpoint: str):
+    """Let concurrent identical requests to a single-URL endpoint share one run of the handler"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request: ScrapeRequest):
+            check_fields(request.fields)
+            # fields can skip the LLM, so projected requests only share runs with the same projection
+            fields_key = ",".join(sorted(request.fields)) if request.fields is not None else "*"
+            key = f"{endpoint}|{normalize_url(request.url)}|{request.extract_structured_data}|{request.cache}|{request.profile}|{fields_key}"
+            led = []
+            
+            def run():
+                led.append(True)
+                return handler(request)
+            
+            # The leader's handler task inherits its collector and memory budget; followers only record the wait
+            with request_timing.collect() as timings, memory_budget.scope(new_memory_budget()) as budget:
+                response = await request_flights.do(key, run, share=lambda response: response.model_copy(deep=True))
+            if not led:
+                timings.count_cache("request", "coalesced")
+            response.trace_id = request.trace_id or request_timing.new_trace_id()
+            response.timings = {**timings.to_dict(), "memory": budget.to_dict()}
+            if is_shaped(request):
+                return encode_response(project(response.model_dump(), request.fields, request.include_raw_content))
+            return response
+        return wrapper
+    return decorator
+
+# Fields the page markup must fill before the LLM call is skipped: the ones product JSON-LD usually carries
+FAST_PATH_REQUIRED_FIELDS = tuple(os.getenv("FAST_PATH_REQUIRED_FIELDS", "title,brand,price,image_urls").split(","))
+fast_path_stats = {"fast_path_only": 0, "llm_fallback": 0}
+
+# The JSON shape the product prompt asks Groq for, field by field, so a call can ask for just some of them
+PRODUCT_FIELD_SCHEMA = {
+    "title": '"product name"',
+    "brand": '"brand name"',
+    "price": "numeric_price",
+    "image_urls": '["url1", "url2"]',
+    "description": '"product description"',
+    "features": '["feature1", "feature2"]',
+    "average_rating": "numeric_rating",
+    "total_reviews": "numeric_count",
+    "specifications": '{"key": "value"}',
+    "buying_options": '[{"seller_name": "seller", "price": numeric_price}]',
+}
+PRODUCT_PROMPT_FIELDS = tuple(PRODUCT_FIELD_SCHEMA)
+
+def fill_missing_fields(primary: ProductData, fallback: ProductData) -> ProductData:
+    """Copy fields from fallback into primary wherever primary has nothing"""
+    for field_name, value in fallback:
+        if value not in (None, "", [], {}) and getattr(primary, field_name) in (None, "", [], {}):
+            setattr(primary, field_name, value)
+    return primary
+
+async def extract_with_fast_path(page: CrawledPage, llm_extractor, *extra, required_fields=FAST_PATH_REQUIRED_FIELDS,
+                                 targeted_fields=PRODUCT_PROMPT_FIELDS) -> ProductData:
+    """Use fields from the page markup first; the LLM fills whatever is still missing, markdown hints the rest.
+    
+    When the markup filled some of targeted_fields, the LLM is asked only for the rest of them instead of
+    running llm_extractor's full prompt. An empty targeted_fields always uses llm_extractor.
+    """
+    # Validated field by field: one malformed markup value must not cost the whole page
+    fast_data = product_from_dict(page.structured_data) if page.structured_data else ProductData()
+    if all(getattr(fast_data, field_name) not in (None, "", []) for field_name in required_fields):
+        fast_path_stats["fast_path_only"] += 1
+        request_timing.record_cache("fast_path", "hit")
+        await domain_strategies.record_extraction(page.url, "fast_path")
+        return fast_data
+    
+    fast_path_stats["llm_fallback"] += 1
+    request_timing.record_cache("fast_path", "miss")
+    await domain_strategies.record_extraction(page.url, "llm")
+    missing = [field_name for field_name in targeted_fields if getattr(fast_data, field_name) in (None, "", [], {})]
+    with request_timing.stage("extraction"):
+        if missing and len(missing) < len(targeted_fields):
+            llm_data = await extract_missing_fields_with_groq(page.markdown or "", ",".join(missing))
+        else:
+            llm_data = await llm_extractor(page.markdown or "", *extra)
+    product_data = fill_missing_fields(fast_data, llm_data)
+    return fill_missing_fields(product_data, product_from_dict(fields_from_markdown(page.markdown or "")))
+
+def required_for(fields: Optional[List[str]]) -> tuple:
+    """A projection only needs its own fields, so rule-based extraction can satisfy it without the LLM"""
+    return tuple(fields) if fields is not None else FAST_PATH_REQUIRED_FIELDS
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "service": "Snuffl Crawl4AI Server (Railway)", "platform": "Railway"}
+async def health_check(response: Response):
+    """503 "starting" until the browser pool warm-up finishes, so deploys only route traffic to warm instances"""
+    pool_status = await browser_pool.status()
+    if not startup["ready"]:
+        response.status_code = 503
+    return {
+        "status": "starting" if not startup["ready"] else "healthy" if pool_status["ready"] else "degraded",
+        "service": "Snuffl Crawl4AI Server (Railway)",
+        "platform": "Railway",
+        "worker": {"pid": os.getpid(), "workers": WORKERS},  # Pool, LLM and job figures below are this worker's
+        "startup": startup,
+        "browser_pool": {k: pool_status[k] for k in ("ready", "warm_browsers", "active_leases", "capacity")},
+        "llm": {k: v for k, v in llm_client.status().items() if k in ("in_flight", "waiting", "max_concurrency")},
+        "fast_path": fast_path_stats,
+        "batch_extraction": batch_extraction_stats,
+        "jobs": {k: v for k, v in job_queue.status().items() if k in ("workers", "max_queue_depth", "jobs")},
+        "coalescing": coalescing_status(),
+        "politeness": politeness.status(),
+        "crawl_profiles": {name: profile.status() for name, profile in crawl_profiles.items()},
+        "http_fetch": {k: v for k, v in http_fetcher.status().items() if k != "domains"},
+        "memory": {
+            "rss_mb": memory_budget.rss_mb(),
+            "request_budget_mb": round(REQUEST_MEMORY_BUDGET / (1024 * 1024), 1),
+            "max_markdown_chars": CRAWL_MAX_MARKDOWN_CHARS,
+            **memory_stats
+        }
+    }
+
+def coalescing_status() -> dict:
+    """How many requests, crawls and extractions were served by an identical in-flight call"""
+    flights = {
+        "requests": request_flights.status(),
+        "crawls": crawl_flights.status(),
+        "extractions": extraction_cache.flights.status()
+    }
+    return {"deduplicated": sum(f["coalesced"] for f in flights.values()), **flights}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Crawl cache hit/miss counters and store occupancy"""
+    return {"crawl": crawl_cache.status(), "extraction": extraction_cache.status()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/browsers")
+async def browser_pool_health():
+    """Browser pool occupancy plus a live render probe"""
+    return await browser_pool.status(probe=True)
+
+@app.get("/health/domains")
+async def domain_strategy_health():
+    """Per-domain crawl history and the strategy each host currently starts with"""
+    return domain_strategies.status()
+
+@app.get("/health/http-fetch")
+async def http_fetch_health():
+    """Plain-HTTP tier counters and the per-domain escalation decisions it has learned"""
+    return http_fetcher.status()
 
 @app.post("/scrape", response_model=ScrapeResponse)
+@coalesced("/scrape")
 async def scrape_single_page(request: ScrapeRequest):
     """Scrape a single product page and extract structured data"""
     try:
-        # Configure browser settings for maximum speed
-        browser_config = BrowserConfig(
-            browser_type="chromium",
-            headless=True,
-            verbose=False
-        )
-        
         # Configure crawl settings for speed optimization
         crawl_config = CrawlerRunConfig(
             cache_mode=CacheMode.BYPASS,
@@ -98,11 +674,11 @@ async def scrape_single_page(request: ScrapeRequest):
             process_iframes=False
         )
         
-        # Use async context manager for proper resource management
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(url=request.url, config=crawl_config)
+        # Crawl on a warm browser from the shared pool
+        result = await crawl_url(request.url, crawl_config, cache=request.cache, profile=request.profile)
         
         if not result.success:
+            metrics.record_outcome("/scrape", "crawl_error")
             return ScrapeResponse(
                 url=request.url,
                 success=False,
@@ -112,8 +688,11 @@ async def scrape_single_page(request: ScrapeRequest):
         product_data = None
         if request.extract_structured_data and result.markdown:
             # Use Groq to extract structured product data
-            product_data = await extract_product_data_with_groq(result.markdown)
+            # Rule-based fields first, Groq only for what they could not fill
+            product_data = await extract_with_fast_path(result, extract_product_data_with_groq,
+                                                        required_fields=required_for(request.fields))
         
+        metrics.record_outcome("/scrape", "success")
         return ScrapeResponse(
             url=request.url,
             success=True,
@@ -122,86 +701,240 @@ async def scrape_single_page(request: ScrapeRequest):
         )
         
     except Exception as e:
+        metrics.record_outcome("/scrape", "error")
         return ScrapeResponse(
             url=request.url,
             success=False,
             error=str(e)
         )
 
-@app.post("/bulk-scrape")
-async def scrape_multiple_pages(request: BulkScrapeRequest):
-    """Scrape multiple product pages using arun_many for optimal performance"""
+async def crawl_and_extract(url: str, crawl_config: CrawlerRunConfig, extract_structured_data: bool,
+                            crawl_semaphore: asyncio.Semaphore, extract_semaphore: asyncio.Semaphore,
+                            cache: str = "use", batcher: Optional[PageBatcher] = None,
+                            profile: Optional[str] = None, trace_id: Optional[str] = None,
+                            fields: Optional[List[str]] = None) -> ScrapeResponse:
+    """One pipelined bulk-scrape item: crawl, then extract right away without waiting for other URLs"""
+    with request_timing.collect() as timings:
+        response = await scrape_bulk_item(url, crawl_config, extract_structured_data, crawl_semaphore,
+                                          extract_semaphore, cache, batcher, profile, fields)
+    response.trace_id = trace_id
+    response.timings = timings.to_dict()
+    return response
+
+async def scrape_bulk_item(url: str, crawl_config: CrawlerRunConfig, extract_structured_data: bool,
+                           crawl_semaphore: asyncio.Semaphore, extract_semaphore: asyncio.Semaphore,
+                           cache: str, batcher: Optional[PageBatcher], profile: Optional[str],
+                           fields: Optional[List[str]] = None) -> ScrapeResponse:
     try:
-        # Configure browser settings for maximum speed
-        browser_config = BrowserConfig(
-            browser_type="chromium",
-            headless=True,
-            verbose=False
-        )
+        waited = time.perf_counter()
+        async with crawl_semaphore:
+            request_timing.add("queue_wait", (time.perf_counter() - waited) * 1000)
+            result = await crawl_url(url, crawl_config, cache=cache, profile=profile)
         
-        # Configure crawl settings for speed optimization
-        crawl_config = CrawlerRunConfig(
-            cache_mode=CacheMode.BYPASS,
-            word_count_threshold=5,  # Reduced from 10
-            remove_overlay_elements=True,
-            wait_for_images=False,
-            process_iframes=False
-        )
+        if not result.success:
+            metrics.record_outcome("/bulk-scrape", "crawl_error")
+            return ScrapeResponse(
+                url=url,
+                success=False,
+                error=result.error_message or "Failed to crawl the page"
+            )
         
-        # Use async context manager and arun_many for efficient bulk crawling
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            results = await crawler.arun_many(urls=request.urls, config=crawl_config)
+        markdown = result.markdown
+        product_data = None
+        if extract_structured_data and markdown:
+            if batcher:
+                # The batcher bounds LLM calls itself; a semaphore here would starve its batches.
+                # Pages keep the shared batch prompt: a per-page targeted call would undo the batching
+                product_data = await extract_with_fast_path(result, batcher.submit, required_fields=required_for(fields),
+                                                            targeted_fields=())
+            else:
+                waited = time.perf_counter()
+                async with extract_semaphore:
+                    request_timing.add("queue_wait", (time.perf_counter() - waited) * 1000)
+                    product_data = await extract_with_fast_path(result, extract_product_data_with_groq,
+                                                                required_fields=required_for(fields))
         
-        # Process results and extract product data if requested
-        processed_results = []
-        for i, result in enumerate(results):
-            url = request.urls[i]
-            
-            if result.success:
-                product_data = None
-                if request.extract_structured_data and result.markdown:
-                    # Use Groq to extract structured product data
-                    product_data = await extract_product_data_with_groq(result.markdown)
-                
-                processed_results.append(ScrapeResponse(
-                    url=url,
-                    success=True,
-                    product_data=product_data,
-                    raw_content=result.markdown[:1000] if result.markdown else None
-                ))
+        metrics.record_outcome("/bulk-scrape", "success")
+        return ScrapeResponse(
+            url=url,
+            success=True,
+            product_data=product_data,
+            raw_content=markdown[:1000] if markdown else None
+        )
+        
+    except Exception as e:
+        metrics.record_outcome("/bulk-scrape", "error")
+        return ScrapeResponse(url=url, success=False, error=str(e))
+
+def bulk_crawl_config() -> CrawlerRunConfig:
+    """Crawl settings shared by the bulk endpoints, tuned for speed"""
+    return CrawlerRunConfig(
+        cache_mode=CacheMode.BYPASS,
+        word_count_threshold=5,  # Reduced from 10
+        remove_overlay_elements=True,
+        wait_for_images=False,
+        process_iframes=False
+    )
+
+async def iter_bulk_results(request: BulkScrapeRequest, trace_id: Optional[str] = None):
+    """Yield (input index, ScrapeResponse) pairs in completion order"""
+    crawl_config = bulk_crawl_config()
+    crawl_semaphore = asyncio.Semaphore(BULK_CRAWL_CONCURRENCY)
+    extract_semaphore = asyncio.Semaphore(BULK_EXTRACT_CONCURRENCY)
+    batcher = new_page_batcher() if request.extraction_mode == "batched" else None
+    # Every item of the request draws on one budget, the envelope's when there is one
+    budget = memory_budget.current() or new_memory_budget()
+    
+    async def indexed(index: int, url: str):
+        with memory_budget.scope(budget):
+            return index, await crawl_and_extract(
+                url, crawl_config, request.extract_structured_data, crawl_semaphore, extract_semaphore, request.cache,
+                batcher, request.profile, trace_id, request.fields
+            )
+    
+    tasks = [asyncio.ensure_future(indexed(i, url)) for i, url in enumerate(request.urls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away or the consumer stopped early: drop the remaining work
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if batcher:
+            batcher.close()
+
+@app.post("/bulk-scrape")
+async def scrape_multiple_pages(request: BulkScrapeRequest, http_request: Request):
+    """Scrape multiple product pages, overlapping crawling with LLM extraction.
+    
+    Encoded once with orjson (or msgpack with Accept: application/msgpack) instead of FastAPI's encoder walk.
+    """
+    check_fields(request.fields)
+    trace_id = request.trace_id or request_timing.new_trace_id()
+    try:
+        # Envelope timings sum every item's stages and list every LLM call
+        with request_timing.collect() as timings, memory_budget.scope(new_memory_budget()) as budget:
+            if request.pipelined:
+                # Each page moves to extraction as soon as its own crawl finishes;
+                # results are put back into input order afterwards
+                processed_results = [None] * len(request.urls)
+                async for index, response in iter_bulk_results(request, trace_id):
+                    processed_results[index] = response
             else:
-                processed_results.append(ScrapeResponse(
-                    url=url,
-                    success=False,
-                    error=result.error_message or "Failed to crawl the page"
-                ))
+                processed_results = await scrape_crawl_first(request, trace_id)
         
         successful_scrapes = sum(1 for r in processed_results if r.success)
         
-        return {
+        return encode_response({
             "total_urls": len(request.urls),
             "successful_scrapes": successful_scrapes,
             "failed_scrapes": len(request.urls) - successful_scrapes,
-            "results": processed_results
-        }
+            "trace_id": trace_id,
+            "timings": {**timings.to_dict(), "memory": budget.to_dict()},
+            "results": [project(r.model_dump(), request.fields, request.include_raw_content) for r in processed_results]
+        }, http_request.headers.get("accept"))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def scrape_crawl_first(request: BulkScrapeRequest, trace_id: str) -> List[ScrapeResponse]:
+    """Non-pipelined bulk path: crawl everything first, then extract page by page.
+
+    Crawls go through crawl_url like every other endpoint, so each page takes its
+    own browser-pool slot and honours the request's cache policy and profile.
+    """
+    crawl_config = bulk_crawl_config()
+    crawl_semaphore = asyncio.Semaphore(BULK_CRAWL_CONCURRENCY)
+    
+    async def crawl(url: str) -> CrawledPage:
+        async with crawl_semaphore:
+            return await crawl_url(url, crawl_config, cache=request.cache, profile=request.profile)
+    
+    results = await asyncio.gather(*(crawl(url) for url in request.urls), return_exceptions=True)
+    
+    # Process results and extract product data if requested
+    processed_results = []
+    for url, result in zip(request.urls, results):
+        if isinstance(result, Exception):
+            metrics.record_outcome("/bulk-scrape", "error")
+            processed_results.append(ScrapeResponse(url=url, success=False, error=str(result), trace_id=trace_id))
+        elif result.success:
+            product_data = None
+            if request.extract_structured_data and result.markdown:
+                try:
+                    product_data = await extract_with_fast_path(result, extract_product_data_with_groq,
+                                                                required_fields=required_for(request.fields))
+                except Exception as e:
+                    metrics.record_outcome("/bulk-scrape", "error")
+                    processed_results.append(ScrapeResponse(url=url, success=False, error=str(e), trace_id=trace_id))
+                    continue
+            
+            metrics.record_outcome("/bulk-scrape", "success")
+            processed_results.append(ScrapeResponse(
+                url=url,
+                success=True,
+                product_data=product_data,
+                raw_content=result.markdown[:1000] if result.markdown else None,
+                trace_id=trace_id
+            ))
+        else:
+            metrics.record_outcome("/bulk-scrape", "crawl_error")
+            processed_results.append(ScrapeResponse(
+                url=url,
+                success=False,
+                error=result.error_message or "Failed to crawl the page",
+                trace_id=trace_id
+            ))
+    return processed_results
+
+@app.post("/bulk-scrape/stream")
+async def stream_multiple_pages(request: BulkScrapeRequest, http_request: Request, format: Optional[str] = None):
+    """Stream one ScrapeResponse per URL as it completes, then a summary record.
+    
+    NDJSON by default; server-sent events with ?format=sse or Accept: text/event-stream.
+    """
+    if format is None:
+        format = "sse" if "text/event-stream" in http_request.headers.get("accept", "") else "ndjson"
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    check_fields(request.fields)
+    
+    def encode(event: str, payload: dict) -> str:
+        data = dumps(payload).decode()
+        if format == "sse":
+            return f"event: {event}\ndata: {data}\n\n"
+        return data + "\n"
+    
+    trace_id = request.trace_id or request_timing.new_trace_id()
+    
+    async def event_stream():
+        successful_scrapes = 0
+        async for index, response in iter_bulk_results(request, trace_id):
+            if response.success:
+                successful_scrapes += 1
+            result = project(response.model_dump(), request.fields, request.include_raw_content)
+            yield encode("result", {"type": "result", "index": index, **result})
+        
+        yield encode("summary", {
+            "type": "summary",
+            "trace_id": trace_id,
+            "total_urls": len(request.urls),
+            "successful_scrapes": successful_scrapes,
+            "failed_scrapes": len(request.urls) - successful_scrapes
+        })
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.post("/scrape-google-shopping", response_model=ScrapeResponse)
+@coalesced("/scrape-google-shopping")
 async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
     """🧠 SMART COMPREHENSIVE SCRAPING: Google Shopping + Auto E-commerce Detection + Deep Scraping"""
     try:
         print(f"� Starting smart comprehensive scraping for: {request.url}")
         
         # STEP 1: Get Google Shopping content (exact same as working simple endpoint)
-        browser_config = BrowserConfig(
-            browser_type="chromium",
-            headless=True,
-            verbose=False,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
-        
         crawl_config = CrawlerRunConfig(
             cache_mode=CacheMode.BYPASS,
             word_count_threshold=50,
@@ -210,10 +943,10 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
             process_iframes=False
         )
         
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(url=request.url, config=crawl_config)
+        result = await crawl_url(request.url, crawl_config, cache=request.cache, profile=request.profile)
         
         if not result.success:
+            metrics.record_outcome("/scrape-google-shopping", "crawl_error")
             return ScrapeResponse(
                 url=request.url,
                 success=False,
@@ -222,6 +955,10 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
         
         content = result.markdown or ""
         if len(content) < 500 or "Sign in" in content or "Choose what you're giving feedback on" in content:
+            # Not reported to politeness here: the crawl already reported real block pages (is_block_page),
+            # and "Sign in" is also in Google's normal header
+            await crawl_cache.invalidate(request.url, crawl_variant(crawl_config, request.profile))
+            metrics.record_outcome("/scrape-google-shopping", "minimal_content" if len(content) < 500 else "consent_page")
             return ScrapeResponse(
                 url=request.url,
                 success=False,
@@ -236,14 +973,16 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
         
         # Try comprehensive extraction first
         print(f"🔍 Attempting comprehensive extraction...")
-        google_data = await extract_comprehensive_product_data_with_groq(content)
-        
-        # If comprehensive failed or returned poor data, use simple extraction
-        if not google_data or not google_data.title or google_data.title == "Unknown Product from Google Shopping":
-            print(f"🔄 Comprehensive failed, using simple extraction...")
-            google_data = await extract_simple_product_data(content)
+        with request_timing.stage("extraction"):
+            google_data = await extract_comprehensive_product_data_with_groq(content)
+            
+            # If comprehensive failed or returned poor data, use simple extraction
+            if not google_data or not google_data.title or google_data.title == "Unknown Product from Google Shopping":
+                print(f"🔄 Comprehensive failed, using simple extraction...")
+                google_data = await extract_simple_product_data(content)
         
         if not google_data or not google_data.title:
+            metrics.record_outcome("/scrape-google-shopping", "extraction_failed")
             return ScrapeResponse(
                 url=request.url,
                 success=False,
@@ -254,7 +993,7 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
         print(f"✅ Extracted Google Shopping data: {google_data.title}")
         
         # STEP 3: Smart buying options extraction from raw content
-        buying_options = await extract_smart_buying_options(content)
+        buying_options = await extract_smart_buying_options(content, result.links)
         if buying_options:
             google_data.buying_options = buying_options
             print(f"🛒 Found {len(buying_options)} buying options")
@@ -270,13 +1009,16 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
             
             if product_urls:
                 print(f"🎯 Found {len(product_urls)} valid product URLs, starting deep scraping...")
-                enhanced_data = await smart_scrape_product_pages(product_urls[:2])  # Limit to 2 for speed
+                with request_timing.stage("deep_scrape"):
+                    enhanced_data = await smart_scrape_product_pages(product_urls)  # Capped at DEEP_SCRAPE_FAN_OUT
                 
                 if enhanced_data:
                     # Merge the enhanced data with Google Shopping data
-                    final_data = smart_merge_product_data(google_data, enhanced_data)
+                    with request_timing.stage("merge"):
+                        final_data = smart_merge_product_data(google_data, enhanced_data)
                     print(f"✅ Enhanced data with deep scraping")
         
+        metrics.record_outcome("/scrape-google-shopping", "success")
         return ScrapeResponse(
             url=request.url,
             success=True,
@@ -286,6 +1028,7 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
         
     except Exception as e:
         print(f"❌ Smart scraping error: {str(e)}")
+        metrics.record_outcome("/scrape-google-shopping", "error")
         return ScrapeResponse(
             url=request.url,
             success=False,
@@ -293,17 +1036,10 @@ async def scrape_google_shopping_comprehensive(request: ScrapeRequest):
         )
 
 @app.post("/scrape-google-simple", response_model=ScrapeResponse)
+@coalesced("/scrape-google-simple")
 async def scrape_google_shopping_simple(request: ScrapeRequest):
     """Simple Google Shopping scraper with minimal extraction - fallback option"""
     try:
-        # Simple browser config
-        browser_config = BrowserConfig(
-            browser_type="chromium",
-            headless=True,
-            verbose=False,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
-        
         # Simple crawl config
         crawl_config = CrawlerRunConfig(
             cache_mode=CacheMode.BYPASS,
@@ -314,10 +1050,10 @@ async def scrape_google_shopping_simple(request: ScrapeRequest):
         )
         
         # Simple single URL scrape
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(url=request.url, config=crawl_config)
+        result = await crawl_url(request.url, crawl_config, cache=request.cache, profile=request.profile)
         
         if not result.success:
+            metrics.record_outcome("/scrape-google-simple", "crawl_error")
             return ScrapeResponse(
                 url=request.url,
                 success=False,
@@ -327,6 +1063,10 @@ async def scrape_google_shopping_simple(request: ScrapeRequest):
         # Check if we got meaningful content (not just login/consent page)
         content = result.markdown or ""
         if len(content) < 500 or "Sign in" in content or "Choose what you're giving feedback on" in content:
+            # Not reported to politeness here: the crawl already reported real block pages (is_block_page),
+            # and "Sign in" is also in Google's normal header
+            await crawl_cache.invalidate(request.url, crawl_variant(crawl_config, request.profile))
+            metrics.record_outcome("/scrape-google-simple", "minimal_content" if len(content) < 500 else "consent_page")
             return ScrapeResponse(
                 url=request.url,
                 success=False,
@@ -336,8 +1076,10 @@ async def scrape_google_shopping_simple(request: ScrapeRequest):
         
         product_data = None
         if request.extract_structured_data:
-            product_data = await extract_simple_product_data(content)
+            with request_timing.stage("extraction"):
+                product_data = await extract_simple_product_data(content)
         
+        metrics.record_outcome("/scrape-google-simple", "success")
         return ScrapeResponse(
             url=request.url,
             success=True,
@@ -346,18 +1088,177 @@ async def scrape_google_shopping_simple(request: ScrapeRequest):
         )
         
     except Exception as e:
+        metrics.record_outcome("/scrape-google-simple", "error")
         return ScrapeResponse(
             url=request.url,
             success=False,
             error=str(e)
         )
 
+# Long-running scrapes: submit a job, poll for progress and partial results
+JobEndpoint = Literal["scrape", "bulk-scrape", "scrape-google-shopping", "scrape-google-simple"]
+
+class JobRequest(BaseModel):
+    urls: List[str]
+    endpoint: JobEndpoint = "bulk-scrape"
+    priority: int = 0  # Higher runs first
+    extract_structured_data: bool = True
+    cache: CachePolicy = "use"
+    extraction_mode: Literal["per_page", "batched"] = "per_page"  # bulk-scrape jobs only
+
+JOB_SINGLE_URL_HANDLERS = {
+    "scrape": scrape_single_page,
+    "scrape-google-shopping": scrape_google_shopping_comprehensive,
+    "scrape-google-simple": scrape_google_shopping_simple,
+}
+
+async def run_job(job: Job, indices: List[int]):
+    """Yield (url index, result dict) for the job's unfinished URLs in completion order"""
+    options = job.options
+    if job.endpoint == "bulk-scrape":
+        request = BulkScrapeRequest(urls=[job.urls[i] for i in indices], **options)
+        async for position, response in iter_bulk_results(request):
+            yield indices[position], response.model_dump()
+        return
+    
+    handler = JOB_SINGLE_URL_HANDLERS[job.endpoint]
+    semaphore = asyncio.Semaphore(JOB_URL_CONCURRENCY)
+    
+    async def run_one(index: int):
+        async with semaphore:
+            try:
+                response = await handler(ScrapeRequest(
+                    url=job.urls[index],
+                    extract_structured_data=options.get("extract_structured_data", True),
+                    cache=options.get("cache", "use")
+                ))
+            except Exception as e:
+                response = ScrapeResponse(url=job.urls[index], success=False, error=str(e))
+        return index, response.model_dump()
+    
+    tasks = [asyncio.ensure_future(run_one(index)) for index in indices]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+# In-process job queue; JOB_STORE=sqlite keeps jobs across restarts and shares them between workers
+job_queue = JobQueue(
+    runner=run_job,
+    store=SqliteJobStore(JOB_STORE_PATH) if JOB_STORE == "sqlite" else MemoryJobStore(),
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_queue_depth=int(os.getenv("JOB_QUEUE_MAX_DEPTH", "50")),
+    retention=float(os.getenv("JOB_RETENTION", "3600")),
+    shared=WORKERS > 1
+)
+
+# Load gauges read live state at scrape time (refreshed every few seconds with several workers)
+metrics.track(metrics.BROWSER_POOL_WARM, lambda: browser_pool.warm_browsers)
+metrics.track(metrics.BROWSER_POOL_ACTIVE_LEASES, lambda: browser_pool.active_leases)
+metrics.track(metrics.BROWSER_POOL_CAPACITY, lambda: browser_pool.size * browser_pool.max_pages_per_browser)
+metrics.track(metrics.LLM_IN_FLIGHT, lambda: llm_client.in_flight)
+metrics.track(metrics.LLM_WAITING, lambda: llm_client.waiting)
+metrics.track(metrics.JOBS_QUEUED, lambda: job_queue.queued)
+metrics.track(metrics.PROCESS_RSS_BYTES, lambda: memory_budget.rss_bytes() or 0)
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """Queue a list of URLs against one scrape endpoint and return the job id to poll"""
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="urls must not be empty")
+    if len(request.urls) > JOB_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"A job may contain at most {JOB_MAX_URLS} URLs")
+    
+    options = {"extract_structured_data": request.extract_structured_data, "cache": request.cache}
+    if request.endpoint == "bulk-scrape":
+        options["extraction_mode"] = request.extraction_mode
+    try:
+        job = await job_queue.submit(request.urls, request.endpoint, options, request.priority)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.summary()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_results: bool = True):
+    """Job progress, plus results for the URLs finished so far"""
+    job = await job_queue.lookup(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    response = job.summary()
+    if include_results:
+        response["results"] = [{"index": index, **result} for index, result in enumerate(job.results) if result is not None]
+    return response
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; results gathered so far are kept"""
+    job = await job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.summary()
+
+# Token budget for the page content packed into each extractor's prompt
+CONTENT_TOKEN_BUDGETS = {
+    "product": 1000,
+    "missing_fields": 1000,
+    "comprehensive": 1250,
+    "simple": 700,
+    "optimized": 1250,
+    "google_basic": 700,
+    "ecommerce": 1500,
+}
+
+# JSON scaffolding an extractor reply adds around the values it copies from the page
+REPLY_OVERHEAD_TOKENS = 300
+
+def reply_token_limit(content: str, cap: int) -> int:
+    """max_tokens for an extractor reply: it cannot carry much more than the reduced content it was shown"""
+    return min(cap, count_tokens(content) + REPLY_OVERHEAD_TOKENS)
+
+def memoized_extractor(name: str, prompt_version: int):
+    """Serve repeat extractions of identical reduced content from the extraction cache.
+    
+    The extractor is called with the content already reduced to its token budget.
+    Bump prompt_version whenever the extractor's prompt changes.
+    """
+    budget = CONTENT_TOKEN_BUDGETS[name]
+    return extraction_cache.memoize(
+        name, prompt_version, lambda content: reduce_content(content, budget), ProductData, lambda: llm_client.model
+    )
+
+def product_from_dict(data: dict) -> ProductData:
+    """Validate an LLM field dict, dropping only the fields that fail instead of all of them"""
+    if isinstance(data.get("price"), str):
+        data = dict(data, price=parse_price(data["price"]))  # "₹1,499" despite the prompt
+    try:
+        return ProductData(**data)
+    except ValidationError as e:
+        invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+        print(f"Dropping invalid product fields: {', '.join(map(str, invalid))}")
+    try:
+        return ProductData(**{key: value for key, value in data.items() if key not in invalid})
+    except ValidationError:
+        return ProductData()
+
+def parse_product_completion(completion, extractor: str) -> Optional[ProductData]:
+    """ProductData from an extractor's reply; a truncated reply keeps the fields it completed. None if nothing was recoverable"""
+    data, repaired = partial_json.parse(completion.text)
+    if not isinstance(data, dict):
+        metrics.LLM_PARSE_FAILURES.labels(extractor=extractor).inc()
+        print(f"No JSON found in {extractor} response: {completion.text[:500]}")
+        return None
+    if repaired:
+        metrics.LLM_JSON_REPAIRS.labels(extractor=extractor).inc()
+        print(f"🩹 Repaired {extractor} JSON (finish_reason={completion.finish_reason}), kept: {', '.join(data)}")
+    return product_from_dict(data)
+
+@memoized_extractor("product", prompt_version=2)
 async def extract_product_data_with_groq(content: str) -> ProductData:
     """Extract structured product data using Groq's Llama model - Optimized for Google Shopping pages"""
     try:
-        # Truncate content but keep more for comprehensive extraction
-        truncated_content = content[:4000]  # Increased from 2000 for more data
-        
         prompt = f"""
         Extract product information from this Google Shopping page content and return as JSON.
         
@@ -389,47 +1290,173 @@ async def extract_product_data_with_groq(content: str) -> ProductData:
         }}
         
         Use null for missing data. Content:
-        {truncated_content}
+        {content}
         """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2000,    # Increased for comprehensive data
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 2000),
             temperature=0,      # Keep deterministic
-            top_p=0.1          # For focused extraction
+            top_p=0.1           # For focused extraction
         )
         
-        # Parse the JSON response
-        extracted_text = response.choices[0].message.content.strip()
+        return parse_product_completion(completion, "product") or ProductData()
+            
+    except Exception as e:
+        print(f"Error extracting product data: {e}")
+        return ProductData()
+
+@memoized_extractor("missing_fields", prompt_version=1)
+async def extract_missing_fields_with_groq(content: str, fields: str) -> ProductData:
+    """Ask Groq only for the comma-separated product fields the page markup did not fill"""
+    try:
+        schema = ",\n".join(f'            "{field_name}": {PRODUCT_FIELD_SCHEMA[field_name]}' for field_name in fields.split(","))
+        prompt = f"""
+        Extract these product fields from the page content below and return as JSON.
+        
+        IMPORTANT: Return ONLY valid JSON, no explanations or extra text.
         
-        # Try to find JSON in the response
-        start_idx = extracted_text.find('{')
-        end_idx = extracted_text.rfind('}') + 1
+        Return in this exact JSON format:
+        {{
+{schema}
+        }}
         
-        if start_idx != -1 and end_idx != -1:
-            json_str = extracted_text[start_idx:end_idx]
-            try:
-                product_dict = json.loads(json_str)
-                return ProductData(**product_dict)
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {e}")
-                print(f"Raw response: {extracted_text}")
-                return ProductData()
-        else:
-            print(f"No JSON found in response: {extracted_text}")
-            return ProductData()
+        Use null for missing data. Content:
+        {content}
+        """
+
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 2000),
+            temperature=0,
+            top_p=0.1
+        )
+        
+        return parse_product_completion(completion, "missing_fields") or ProductData()
             
     except Exception as e:
-        print(f"Error extracting product data: {e}")
+        print(f"Error extracting missing product fields: {e}")
         return ProductData()
 
+BATCH_PROMPT_HEADER = """
+        Extract product information from each of the {page_count} product pages below and return as JSON.
+        
+        IMPORTANT: Return ONLY a valid JSON array with exactly one object per page, no explanations or extra text.
+        
+        Each object must contain "page" (the number from that page's ### PAGE n ### header) and:
+        {{
+            "page": page_number,
+            "title": "product name",
+            "brand": "brand name",
+            "price": numeric_price,
+            "image_urls": ["url1", "url2"],
+            "description": "product description",
+            "features": ["feature1", "feature2"],
+            "average_rating": numeric_rating,
+            "total_reviews": numeric_count,
+            "specifications": {{"key": "value"}},
+            "buying_options": [{{"seller_name": "seller", "price": numeric_price}}]
+        }}
+        
+        Convert prices to numbers (remove currency symbols). Use null for missing data.
+        Never mix data between pages.
+        """
+
+def parse_batch_entries(extracted_text: str) -> dict:
+    """Map page index -> field dict from a batched completion (array, {"pages": [...]}, or keyed object).
+    
+    A reply cut off by max_tokens still yields the pages it completed; the rest fall back to per-page calls.
+    """
+    data, repaired = partial_json.parse(extracted_text)
+    if isinstance(data, dict):
+        data = data.get("pages") or [dict(value, page=key) for key, value in data.items() if isinstance(value, dict)]
+    if repaired and isinstance(data, list) and data:
+        # The last page is the one being written when the reply was cut; its per-page call gets every field
+        metrics.LLM_JSON_REPAIRS.labels(extractor="batch").inc()
+        data = data[:-1]
+    
+    entries = {}
+    for entry in data if isinstance(data, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            entries[int(entry.pop("page"))] = entry
+        except (KeyError, TypeError, ValueError):
+            continue
+    return entries
+
+async def extract_product_data_batch(contents: List[str]) -> List[ProductData]:
+    """Extract several reduced pages with one Groq call; pages that fail to parse fall back to single-page extraction"""
+    results: List[Optional[ProductData]] = [None] * len(contents)
+    
+    # Pages already memoized by the single-page extractor skip the batch entirely
+    pending = []
+    for index, content in enumerate(contents):
+        cached = await extraction_cache.lookup("product", llm_client.model, content)
+        if cached is not None:
+            results[index] = ProductData(**cached)
+        else:
+            pending.append(index)
+    
+    if len(pending) > 1:
+        try:
+            pages_text = "\n".join(f"### PAGE {n} ###\n{contents[index]}" for n, index in enumerate(pending))
+            prompt = BATCH_PROMPT_HEADER.format(page_count=len(pending)) + "\n" + pages_text
+            completion = await llm_client.complete(
+                prompt,
+                max_tokens=min(BATCH_OUTPUT_TOKENS_PER_PAGE * len(pending) + 100, 8000),
+                temperature=0,
+                top_p=0.1,
+                json_mode=False  # JSON mode only allows a top-level object; the batch prompt asks for an array
+            )
+            entries = parse_batch_entries(completion.text.strip())
+            if not entries:
+                metrics.LLM_PARSE_FAILURES.labels(extractor="batch").inc()
+            for n, index in enumerate(pending):
+                entry = entries.get(n)
+                if not entry:
+                    continue
+                try:
+                    product_data = ProductData(**entry)
+                except Exception as e:
+                    print(f"Batch entry {n} failed validation: {e}")
+                    continue
+                if product_data.title:
+                    results[index] = product_data
+                    await extraction_cache.store_result("product", llm_client.model, contents[index], product_data)
+        except Exception as e:
+            print(f"Error in batched extraction, falling back to per-page calls: {e}")
+    
+    # Per-page fallback for anything the batch did not return cleanly
+    fallback = [index for index in pending if results[index] is None]
+    if fallback:
+        batch_extraction_stats["page_fallbacks"] += len(fallback)
+        fallback_results = await asyncio.gather(
+            *(extract_product_data_with_groq(contents[index]) for index in fallback), return_exceptions=True
+        )
+        for index, product_data in zip(fallback, fallback_results):
+            results[index] = product_data if isinstance(product_data, ProductData) else ProductData()
+    
+    batch_extraction_stats["batches"] += 1
+    batch_extraction_stats["pages"] += len(contents)
+    return results
+
+def new_page_batcher() -> PageBatcher:
+    """Per-request batcher feeding extract_product_data_batch"""
+    budget = CONTENT_TOKEN_BUDGETS["product"]
+    return PageBatcher(
+        extract_product_data_batch,
+        prepare=lambda content: reduce_content(content, budget),
+        token_budget=BATCH_EXTRACT_TOKEN_BUDGET,
+        max_pages=BATCH_EXTRACT_MAX_PAGES,
+        linger=BATCH_EXTRACT_LINGER,
+        overhead_tokens=count_tokens(BATCH_PROMPT_HEADER)
+    )
+
+@memoized_extractor("comprehensive", prompt_version=2)
 async def extract_comprehensive_product_data_with_groq(content: str) -> ProductData:
     """Extract comprehensive product data from Google Shopping page - simplified version"""
     try:
-        # Keep reasonable content length
-        truncated_content = content[:5000]
-        
         prompt = f"""
         Extract comprehensive product information from this Google Shopping page and return as JSON.
         
@@ -495,47 +1522,26 @@ async def extract_comprehensive_product_data_with_groq(content: str) -> ProductD
         5. Extract specifications into structured object
         6. Use exact field names as specified above
         
-        Content: {truncated_content}
+        Content: {content}
         """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2500,    # Increased for comprehensive data
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 2500),
             temperature=0,      # Keep deterministic
-            top_p=0.1          # For focused extraction
+            top_p=0.1           # For focused extraction
         )
         
-        # Parse the JSON response
-        extracted_text = response.choices[0].message.content.strip()
-        
-        # Try to find JSON in the response
-        start_idx = extracted_text.find('{')
-        end_idx = extracted_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = extracted_text[start_idx:end_idx]
-            try:
-                product_dict = json.loads(json_str)
-                return ProductData(**product_dict)
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {e}")
-                print(f"Raw response: {extracted_text}")
-                return ProductData()
-        else:
-            print(f"No JSON found in response: {extracted_text}")
-            return ProductData()
+        return parse_product_completion(completion, "comprehensive") or ProductData()
             
     except Exception as e:
         print(f"Error extracting comprehensive product data: {e}")
         return ProductData()
 
+@memoized_extractor("simple", prompt_version=2)
 async def extract_simple_product_data(content: str) -> ProductData:
     """Simple extraction with minimal prompt to avoid LLM issues"""
     try:
-        # Keep content short for simple extraction
-        truncated_content = content[:3000]
-        
         prompt = f"""
         Extract basic product info from this page and return as JSON only.
         
@@ -554,43 +1560,26 @@ async def extract_simple_product_data(content: str) -> ProductData:
         
         Use null for missing data.
         
-        Content: {truncated_content}
+        Content: {content}
         """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=800,
-            temperature=0,
-            top_p=0.1
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 800),
+            temperature=0,      # Keep deterministic
+            top_p=0.1           # For focused extraction
         )
         
-        extracted_text = response.choices[0].message.content.strip()
-        
-        # Try to find JSON in the response
-        start_idx = extracted_text.find('{')
-        end_idx = extracted_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = extracted_text[start_idx:end_idx]
-            try:
-                product_dict = json.loads(json_str)
-                return ProductData(**product_dict)
-            except:
-                return ProductData()
-        
-        return ProductData()
+        return parse_product_completion(completion, "simple") or ProductData()
             
     except Exception as e:
         print(f"Error in simple extraction: {e}")
         return ProductData()
 
+@memoized_extractor("optimized", prompt_version=2)
 async def extract_optimized_product_data_with_groq(content: str) -> ProductData:
     """Extract comprehensive product data from single Google Shopping page - optimized for better success rate"""
     try:
-        # Keep reasonable content length for comprehensive extraction
-        truncated_content = content[:5000]  # Balanced for comprehensive data
-        
         prompt = f"""
         Extract product information from this Google Shopping page and return as JSON.
         
@@ -646,50 +1635,31 @@ async def extract_optimized_product_data_with_groq(content: str) -> ProductData:
         5. Parse specifications into structured object
         6. Use exact field names as specified above
         
-        Content: {truncated_content}
+        Content: {content}
         """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2000,    # Balanced for comprehensive data
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 2000),
             temperature=0,      # Keep deterministic
-            top_p=0.1          # For focused extraction
+            top_p=0.1           # For focused extraction
         )
         
-        # Parse the JSON response
-        extracted_text = response.choices[0].message.content.strip()
-        
-        # Try to find JSON in the response
-        start_idx = extracted_text.find('{')
-        end_idx = extracted_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = extracted_text[start_idx:end_idx]
-            try:
-                product_dict = json.loads(json_str)
-                return ProductData(**product_dict)
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error: {e}")
-                print(f"Raw response: {extracted_text}")
-                # Fallback to simple extraction if comprehensive fails
-                return await extract_simple_product_data(content)
-        else:
-            print(f"No JSON found in response: {extracted_text}")
-            # Fallback to simple extraction
+        product_data = parse_product_completion(completion, "optimized")
+        if product_data is None:
+            # Fallback to simple extraction only when nothing could be recovered
             return await extract_simple_product_data(content)
+        return product_data
             
     except Exception as e:
         print(f"Error extracting optimized product data: {e}")
         # Fallback to simple extraction
         return await extract_simple_product_data(content)
 
+@memoized_extractor("google_basic", prompt_version=2)
 async def extract_google_shopping_basic_data(content: str) -> ProductData:
     """Extract basic product info and buying options from Google Shopping page (light scraping)"""
     try:
-        # Keep content short for light extraction
-        truncated_content = content[:3000]
-        
         prompt = f"""
         Extract basic product information and buying options from this Google Shopping page.
         
@@ -723,32 +1693,17 @@ async def extract_google_shopping_basic_data(content: str) -> ProductData:
         CRITICAL: Extract ALL buying options with their actual e-commerce site URLs.
         Use null for missing data.
         
-        Content: {truncated_content}
+        Content: {content}
         """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000,
-            temperature=0,
-            top_p=0.1
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 1000),
+            temperature=0,      # Keep deterministic
+            top_p=0.1           # For focused extraction
         )
         
-        extracted_text = response.choices[0].message.content.strip()
-        
-        # Try to find JSON in the response
-        start_idx = extracted_text.find('{')
-        end_idx = extracted_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = extracted_text[start_idx:end_idx]
-            try:
-                product_dict = json.loads(json_str)
-                return ProductData(**product_dict)
-            except:
-                return ProductData()
-        
-        return ProductData()
+        return parse_product_completion(completion, "google_basic") or ProductData()
             
     except Exception as e:
         print(f"Error extracting Google Shopping basic data: {e}")
@@ -862,31 +1817,72 @@ async def direct_scrape_product_urls(buying_options: List[BuyingOption]) -> Prod
                 if any(site in seller_lower for site in ['amazon', 'flipkart', 'myntra', 'croma', 'ajio', 'nykaa']):
                     prioritized_sites.append(option)
         
-        # If no prioritized sites, use top 2 buying options
+        # If no prioritized sites, fall back to the first buying options
         if not prioritized_sites:
-            prioritized_sites = buying_options[:2]
+            prioritized_sites = buying_options[:DEEP_SCRAPE_FAN_OUT]
         
         print(f"🎯 Found {len(prioritized_sites)} e-commerce sites with product URLs")
         
-        # Deep scrape top 2 e-commerce sites
-        ecommerce_results = []
-        for option in prioritized_sites[:2]:  # Limit to top 2 for speed
-            if option.site_url:
-                print(f"🛒 Direct scraping {option.seller_name}: {option.site_url}")
-                ecommerce_data = await deep_scrape_ecommerce_site(option.site_url, option.seller_name)
-                if ecommerce_data:
-                    ecommerce_results.append(ecommerce_data)
-        
-        # Combine results from multiple e-commerce sites
-        if ecommerce_results:
-            return combine_ecommerce_data(ecommerce_results)
-        
-        return ProductData()
+        # Deep scrape the top sellers concurrently and combine their results
+        return await deep_scrape_sellers(prioritized_sites) or ProductData()
         
     except Exception as e:
         print(f"Error in direct scraping: {e}")
         return ProductData()
 
+def has_required_fields(data: ProductData, required_fields) -> bool:
+    return all(getattr(data, field_name) not in (None, "", [], {}) for field_name in required_fields)
+
+async def deep_scrape_sellers(buying_options: List[BuyingOption], fan_out: Optional[int] = None,
+                              deadline: Optional[float] = None, stop_when_good_enough: Optional[bool] = None) -> Optional[ProductData]:
+    """Crawl and extract seller product pages concurrently.
+    
+    At most fan_out sellers are scraped, everything still running at the deadline is
+    cancelled, and with the good-enough cutoff the remaining crawls are cancelled as
+    soon as the combined data has every DEEP_SCRAPE_REQUIRED_FIELDS field.
+    """
+    fan_out = fan_out or DEEP_SCRAPE_FAN_OUT
+    deadline = deadline or DEEP_SCRAPE_DEADLINE
+    if stop_when_good_enough is None:
+        stop_when_good_enough = DEEP_SCRAPE_GOOD_ENOUGH
+    
+    options = [option for option in buying_options if option.site_url][:fan_out]
+    if not options:
+        return None
+    
+    tasks = []
+    for option in options:
+        seller_name = option.seller_name or seller_from_url(option.site_url) or "seller"
+        print(f"🛒 Direct scraping {seller_name}: {option.site_url}")
+        tasks.append(asyncio.ensure_future(deep_scrape_ecommerce_site(unwrap_google_redirect(option.site_url), seller_name)))
+    
+    ecommerce_results = []
+    combined = None
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=deadline):
+            try:
+                ecommerce_data = await next_done
+            except asyncio.TimeoutError:
+                print(f"⏱️ Deep scrape deadline of {deadline}s reached with {len(ecommerce_results)} seller(s) done")
+                break
+            except Exception as e:
+                print(f"Error in seller deep scrape: {e}")
+                continue
+            if not ecommerce_data or not ecommerce_data.title:
+                continue
+            ecommerce_results.append(ecommerce_data)
+            # combine_ecommerce_data mutates its first argument, so combine copies
+            combined = combine_ecommerce_data([r.model_copy(deep=True) for r in ecommerce_results])
+            if stop_when_good_enough and has_required_fields(combined, DEEP_SCRAPE_REQUIRED_FIELDS):
+                print(f"✅ Good-enough data after {len(ecommerce_results)}/{len(tasks)} sellers, cancelling the rest")
+                break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    
+    return combined
+
 async def smart_search_and_scrape(product_query: str, buying_options: List[BuyingOption]) -> ProductData:
     """Smart search and scrape when we don't have direct product URLs"""
     try:
@@ -914,26 +1910,17 @@ async def smart_search_and_scrape(product_query: str, buying_options: List[Buyin
 async def deep_scrape_ecommerce_site(url: str, seller_name: str) -> ProductData:
     """Deep scrape individual e-commerce site for comprehensive product data"""
     try:
-        # Configure browser for e-commerce sites
-        browser_config = BrowserConfig(
-            browser_type="chromium",
-            headless=True,
-            verbose=False,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        
         # Comprehensive crawl config for e-commerce sites
         crawl_config = CrawlerRunConfig(
             cache_mode=CacheMode.BYPASS,
             word_count_threshold=50,  # More content for comprehensive extraction
             remove_overlay_elements=True,
-            wait_for_images=True,     # Wait for images on e-commerce sites
+            wait_for_images=False,    # Image URLs come from the DOM; the fast profile never downloads them
             process_iframes=False
         )
         
         # Scrape the e-commerce site
-        async with AsyncWebCrawler(config=browser_config) as crawler:
-            result = await crawler.arun(url=url, config=crawl_config)
+        result = await crawl_url(url, crawl_config)
         
         if not result.success:
             print(f"❌ Failed to scrape {seller_name}: {result.error_message}")
@@ -944,19 +1931,18 @@ async def deep_scrape_ecommerce_site(url: str, seller_name: str) -> ProductData:
             print(f"⚠️  {seller_name} returned minimal content")
             return ProductData()
         
-        # Extract comprehensive data using site-specific extraction
-        return await extract_ecommerce_comprehensive_data(content, seller_name)
+        # Extract comprehensive data using site-specific extraction; its prompt carries the site's hints, so it
+        # is not swapped for the generic targeted one
+        return await extract_with_fast_path(result, extract_ecommerce_comprehensive_data, seller_name, targeted_fields=())
         
     except Exception as e:
         print(f"Error deep scraping {seller_name}: {e}")
         return ProductData()
 
+@memoized_extractor("ecommerce", prompt_version=2)
 async def extract_ecommerce_comprehensive_data(content: str, seller_name: str) -> ProductData:
     """Extract comprehensive product data from e-commerce site with site-specific optimizations"""
     try:
-        # Truncate content for comprehensive extraction
-        truncated_content = content[:6000]
-        
         # Site-specific extraction hints
         site_hints = {
             'amazon': 'Amazon page structure: Look for #productTitle, .a-price, .cr-original-review-text, .feature, .a-carousel',
@@ -1037,33 +2023,17 @@ async def extract_ecommerce_comprehensive_data(content: str, seller_name: str) -
         5. Extract sample reviews with ratings
         6. Use exact field names as specified above
         
-        Content: {truncated_content}
+        Content: {content}
         """
 
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2500,
-            temperature=0,
-            top_p=0.1
+        completion = await llm_client.complete(
+            prompt,
+            max_tokens=reply_token_limit(content, 2500),
+            temperature=0,      # Keep deterministic
+            top_p=0.1           # For focused extraction
         )
         
-        extracted_text = response.choices[0].message.content.strip()
-        
-        # Try to find JSON in the response
-        start_idx = extracted_text.find('{')
-        end_idx = extracted_text.rfind('}') + 1
-        
-        if start_idx != -1 and end_idx != -1:
-            json_str = extracted_text[start_idx:end_idx]
-            try:
-                product_dict = json.loads(json_str)
-                return ProductData(**product_dict)
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error for {seller_name}: {e}")
-                return ProductData()
-        
-        return ProductData()
+        return parse_product_completion(completion, "ecommerce") or ProductData()
             
     except Exception as e:
         print(f"Error extracting comprehensive data from {seller_name}: {e}")
@@ -1166,6 +2136,162 @@ def merge_google_and_ecommerce_data(google_data: ProductData, ecommerce_data: Pr
         print(f"Error merging data: {e}")
         return ecommerce_data if ecommerce_data else google_data
 
+# Precompiled product-page URL patterns per retailer (category and search pages do not match)
+RETAILER_PRODUCT_URL_PATTERNS = {
+    "Amazon": re.compile(r"^https?://(?:www\.)?amazon\.(?:in|com)/(?:[^/?#]+/)?(?:dp|gp/product|gp/aw/d)/[A-Z0-9]{10}", re.IGNORECASE),
+    "Flipkart": re.compile(r"^https?://(?:www\.|dl\.)?flipkart\.com/[^/?#]+/p/itm[0-9a-z]+", re.IGNORECASE),
+    "Myntra": re.compile(r"^https?://(?:www\.)?myntra\.com/(?:[^?#]+/)?\d{6,}(?:/buy)?", re.IGNORECASE),
+    "Croma": re.compile(r"^https?://(?:www\.)?croma\.com/[^?#]+/p/\d+", re.IGNORECASE),
+    "AJIO": re.compile(r"^https?://(?:www\.)?ajio\.com/[^?#]+/p/[0-9a-z_]+", re.IGNORECASE),
+    "Nykaa": re.compile(r"^https?://(?:www\.)?nykaa(?:fashion)?\.com/[^?#]+/p/\d+", re.IGNORECASE),
+    "Reliance Digital": re.compile(r"^https?://(?:www\.)?reliancedigital\.in/[^?#]+/p/\d+", re.IGNORECASE),
+    "Tata CLiQ": re.compile(r"^https?://(?:www\.)?tatacliq\.com/[^?#]+/p-mp\d+", re.IGNORECASE),
+    "Vijay Sales": re.compile(r"^https?://(?:www\.)?vijaysales\.com/[^?#]+/\d+", re.IGNORECASE),
+}
+
+# Seller display names by domain fragment, used when the link text is just "Visit site"
+SELLER_DOMAINS = {
+    "amazon.": "Amazon", "flipkart.": "Flipkart", "myntra.": "Myntra", "croma.": "Croma", "ajio.": "AJIO",
+    "nykaa": "Nykaa", "reliancedigital.": "Reliance Digital", "tatacliq.": "Tata CLiQ", "vijaysales.": "Vijay Sales",
+    "jiomart.": "JioMart", "meesho.": "Meesho", "snapdeal.": "Snapdeal",
+}
+
+MARKDOWN_LINK_PATTERN = re.compile(r"\[([^\]]*)\]\((https?://[^)\s]+)")
+BUYING_PRICE_PATTERN = re.compile(r"(?:₹|Rs\.?\s?|INR\s?)\s?([0-9][0-9,]*(?:\.[0-9]{1,2})?)", re.IGNORECASE)
+DELIVERY_PATTERN = re.compile(r"\b(?:delivery|shipping|delivered|dispatch|get it by|in stock)\b", re.IGNORECASE)
+OFFER_PATTERN = re.compile(r"\b(?:\d+%\s*off|offer|coupon|cashback|no cost emi|bank|save)\b", re.IGNORECASE)
+GENERIC_LINK_TEXT = {"", "visit site", "visit store", "go to site", "buy", "buy now", "shop now", "view deal", "see deal"}
+
+def unwrap_google_redirect(url: str) -> str:
+    """Resolve google.com/url?q=... and /aclk?adurl=... links to the retailer URL"""
+    parts = urlsplit(url)
+    if parts.hostname and "google." in parts.hostname:
+        params = parse_qs(parts.query)
+        for key in ("q", "url", "adurl"):
+            target = params.get(key, [None])[0]
+            if target and target.startswith("http"):
+                return target
+    return url
+
+def seller_from_url(url: str) -> Optional[str]:
+    host = (urlsplit(url).hostname or "").lower()
+    for fragment, name in SELLER_DOMAINS.items():
+        if fragment in host:
+            return name
+    return None
+
+def is_valid_product_url(url: str) -> bool:
+    """True when the URL is a product detail page on a known retailer"""
+    if not url:
+        return False
+    url = unwrap_google_redirect(url)
+    return any(pattern.match(url) for pattern in RETAILER_PRODUCT_URL_PATTERNS.values())
+
+def select_links(url: str, markdown: str) -> List[dict]:
+    """Links leaving the page's site (Google redirects unwrapped), product pages first, at most CRAWL_MAX_LINKS"""
+    page_host = (urlsplit(url).hostname or "").lower()
+    links = {}
+    for text, href in MARKDOWN_LINK_PATTERN.findall(markdown):
+        target = unwrap_google_redirect(href)
+        host = (urlsplit(target).hostname or "").lower()
+        if not host or host == page_host or "google." in host or "gstatic." in host or target in links:
+            continue
+        links[target] = {"text": text.strip()[:100], "url": target}
+    return sorted(links.values(), key=lambda link: not is_valid_product_url(link["url"]))[:CRAWL_MAX_LINKS]
+
+async def extract_smart_buying_options(content: str, links: Optional[List[dict]] = None) -> List[BuyingOption]:
+    """Parse seller, price, delivery, offer and site URL from Google Shopping markdown in a single pass.
+    
+    ``links`` are the page's outbound links saved at crawl time; they add sellers whose
+    blocks did not survive markdown compaction.
+    """
+    options = {}
+    current = None
+    
+    def seller_option(text: str, href: str) -> Optional[BuyingOption]:
+        target = unwrap_google_redirect(href)
+        host = (urlsplit(target).hostname or "").lower()
+        if not host or "google." in host or "gstatic." in host:
+            return None
+        seller_key = host[4:] if host.startswith("www.") else host
+        option = options.get(seller_key)
+        if option is None:
+            text = text.strip()
+            seller_name = seller_from_url(target) or (text if text.lower() not in GENERIC_LINK_TEXT else seller_key)
+            option = options[seller_key] = BuyingOption(seller_name=seller_name, site_url=target)
+        elif not is_valid_product_url(option.site_url or "") and is_valid_product_url(target):
+            option.site_url = target
+        return option
+    
+    try:
+        for line in content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            
+            # A link to a retailer starts (or continues) that seller's block
+            for text, href in MARKDOWN_LINK_PATTERN.findall(line):
+                current = seller_option(text, href) or current
+            
+            if current is None:
+                continue
+            plain = MARKDOWN_LINK_PATTERN.sub(lambda m: m.group(1), line)
+            if current.price is None:
+                price_match = BUYING_PRICE_PATTERN.search(plain)
+                if price_match:
+                    current.price = parse_price(price_match.group(1))
+            if current.delivery_info is None and DELIVERY_PATTERN.search(plain):
+                current.delivery_info = plain[:200]
+            if current.offers is None and OFFER_PATTERN.search(plain):
+                current.offers = plain[:200]
+        for link in links or []:
+            seller_option(link["text"], link["url"])
+    except Exception as e:
+        print(f"Error parsing buying options: {e}")
+    
+    # Retailers with a product URL first, then cheapest
+    return sorted(
+        options.values(),
+        key=lambda o: (not is_valid_product_url(o.site_url or ""), o.price if o.price is not None else float("inf"))
+    )
+
+async def smart_scrape_product_pages(buying_options: List[BuyingOption]) -> Optional[ProductData]:
+    """Deep scrape the selected seller product pages concurrently and combine what they return"""
+    try:
+        return await deep_scrape_sellers(buying_options)
+    except Exception as e:
+        print(f"Error in smart product page scraping: {e}")
+        return None
+
+def smart_merge_product_data(google_data: ProductData, enhanced_data: ProductData) -> ProductData:
+    """Merge field by field, keeping the richer value from either source"""
+    try:
+        merged = google_data.model_copy(deep=True)
+        for field_name, value in enhanced_data:
+            current = getattr(merged, field_name)
+            if value in (None, "", [], {}):
+                continue
+            if current in (None, "", [], {}):
+                setattr(merged, field_name, value)
+            elif field_name in ("image_urls", "features", "sizes_available", "review_tags"):
+                setattr(merged, field_name, list(dict.fromkeys(current + value)))
+            elif field_name in ("colors_available", "sample_reviews"):
+                setattr(merged, field_name, current + [v for v in value if v not in current])
+            elif field_name == "specifications":
+                setattr(merged, field_name, {**value, **current})
+            elif field_name == "description" and len(value) > len(current):
+                merged.description = value
+            elif field_name == "total_reviews" and value > current:
+                # Seller page rating backed by more reviews wins
+                merged.total_reviews = value
+                merged.average_rating = enhanced_data.average_rating or merged.average_rating
+        # Google's comparison list is the complete set of buying options and prices
+        merged.buying_options = google_data.buying_options or enhanced_data.buying_options
+        return merged
+    except Exception as e:
+        print(f"Error in smart merge: {e}")
+        return merge_google_and_ecommerce_data(google_data, enhanced_data)
+
 @app.get("/")
 async def root():
     return {
@@ -1173,17 +2299,24 @@ async def root():
         "platform": "Railway",
         "endpoints": {
             "/health": "Health check",
+            "/health/browsers": "Browser pool status with live render probe",
+            "/health/http-fetch": "Plain-HTTP tier stats and escalation reasons per domain",
+            "/health/domains": "Per-domain success rate, latency, content size, extractor tier and preferred crawl strategy",
+            "/cache/stats": "Crawl and extraction cache hit/miss counters",
+            "/metrics": "Prometheus metrics: stage latencies, token usage, outcomes, in-flight work",
             "/scrape": "Scrape single product page (basic)",
             "/scrape-google-shopping": "🧠 SMART COMPREHENSIVE: Google Shopping + Auto E-commerce Detection + Deep Scraping",
             "/scrape-google-simple": "Simple Google Shopping scraping (reliable fallback)",
             "/bulk-scrape": "Scrape multiple product pages",
+            "/bulk-scrape/stream": "Scrape multiple product pages, streaming NDJSON/SSE results as each URL completes",
+            "/jobs": "Queue a long-running scrape (POST), poll progress with GET /jobs/{id}, cancel with DELETE",
             "/docs": "API documentation"
         },
         "smart_features": [
             "🔍 Intelligent Google Shopping extraction (same reliability as simple endpoint)",
             "� Auto-detection of e-commerce product URLs from buying options",
             "🛒 Smart deep scraping of actual product pages (Amazon, Flipkart, etc.)",
-            "🧠 Regex + LLM hybrid extraction for maximum reliability",
+            "🧠 JSON-LD / OpenGraph / DOM fast path, LLM only for missing fields",
             "� Automatic fallback from comprehensive to simple extraction",
             "📊 Smart data merging from multiple sources",
             "⚡ Optimized for speed and accuracy"
@@ -1193,4 +2326,5 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
+    # Worker processes import the app by name; one worker keeps running this module's app
+    uvicorn.run("main:app" if WORKERS > 1 else app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)), workers=WORKERS)
@@ -0,0 +1,77 @@
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+class MemoryBudget:
+    """Page content one request may keep alive while its handlers run.
+
+    Every crawled page a request holds (markdown, structured data, links) is
+    charged against ``limit_bytes``. Once the budget is spent, later pages are
+    trimmed to what is left, but never below ``floor_chars`` so extraction still
+    gets a full prompt.
+    """
+
+    def __init__(self, limit_bytes: int, floor_chars: int = 6000):
+        self.limit_bytes = limit_bytes
+        self.floor_chars = floor_chars
+        self.retained_bytes = 0
+        self.pages = 0
+        self.trimmed_pages = 0
+
+    def admit(self, text: str) -> int:
+        """How many characters of text this request may keep; charges what it keeps"""
+        size = sys.getsizeof(text)
+        remaining = self.limit_bytes - self.retained_bytes
+        self.pages += 1
+        if size <= remaining:
+            self.retained_bytes += size
+            return len(text)
+        # Bytes per character differ between ASCII and e.g. ₹-heavy pages
+        allowed = max(self.floor_chars, int(len(text) * max(remaining, 0) / size))
+        if allowed < len(text):
+            self.trimmed_pages += 1
+        self.retained_bytes += sys.getsizeof(text[:allowed])
+        return min(allowed, len(text))
+
+    def to_dict(self) -> dict:
+        return {
+            "budget_kb": round(self.limit_bytes / 1024),
+            "retained_kb": round(self.retained_bytes / 1024, 1),
+            "pages": self.pages,
+            "trimmed_pages": self.trimmed_pages,
+            "rss_mb": rss_mb(),
+        }
+
+_current: ContextVar[Optional[MemoryBudget]] = ContextVar("memory_budget", default=None)
+
+def current() -> Optional[MemoryBudget]:
+    return _current.get()
+
+@contextmanager
+def scope(budget: MemoryBudget):
+    """Charge pages crawled inside the block to budget; an enclosing scope (the bulk envelope) takes precedence"""
+    outer = _current.get()
+    if outer is not None:
+        yield outer
+        return
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc; None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def rss_mb() -> Optional[float]:
+    rss = rss_bytes()
+    return round(rss / (1024 * 1024), 1) if rss is not None else None
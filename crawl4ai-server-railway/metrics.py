@@ -0,0 +1,131 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Tuple
+
+def _multiproc_dir() -> str:
+    """Metrics directory for this run of the uvicorn master, with earlier runs' directories removed.
+
+    The master's pid alone is not enough: in a container it is PID 1 on every
+    restart, and a reused directory would keep exporting the previous run's
+    counters. Its start time (from /proc) tells the runs apart.
+    """
+    master = os.getppid()
+    base = f"crawl4ai-metrics-{master}"
+    name = base
+    try:
+        with open(f"/proc/{master}/stat") as stat:
+            name = f"{base}-{stat.read().rsplit(')', 1)[1].split()[19]}"
+    except (OSError, IndexError):
+        pass
+    root = tempfile.gettempdir()
+    for entry in os.listdir(root):
+        # Same master pid, different start time: a previous run that can no longer be alive
+        if entry != name and (entry == base or entry.startswith(base + "-")):
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    path = os.path.join(root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# With several uvicorn workers each process has its own metric values; multiprocess mode sums
+# them through files that all workers of one server share (one directory per uvicorn master run).
+# The variable must be set before prometheus_client is imported.
+if int(os.getenv("WEB_CONCURRENCY", "1")) > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = _multiproc_dir()
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# Stage timings
+BROWSER_ACQUIRE_SECONDS = Histogram(
+    "crawl4ai_browser_acquire_seconds", "Wait for a browser lease from the pool",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30)
+)
+BROWSER_LAUNCH_SECONDS = Histogram(
+    "crawl4ai_browser_launch_seconds", "Chromium launch time for pooled browsers",
+    buckets=(0.5, 1, 2, 5, 10, 20, 40, 60)
+)
+PAGE_CRAWL_SECONDS = Histogram(
+    "crawl4ai_page_crawl_seconds", "Time to fetch or render one page, by crawl strategy",
+    ["strategy"], buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+CONTENT_REDUCTION_SECONDS = Histogram(
+    "crawl4ai_content_reduction_seconds", "Time to reduce page markdown to a prompt token budget",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+)
+LLM_LATENCY_SECONDS = Histogram(
+    "crawl4ai_llm_latency_seconds", "Groq completion latency (excluding the wait for a concurrency slot)",
+    ["model"], buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30)
+)
+LLM_TOKENS = Histogram(
+    "crawl4ai_llm_tokens", "Tokens per Groq completion",
+    ["model", "kind"], buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000)
+)
+REQUEST_SECONDS = Histogram(
+    "crawl4ai_request_seconds", "End-to-end request time per endpoint",
+    ["endpoint", "method", "status"], buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 40, 60, 120, 300)
+)
+
+# Outcomes and failure reasons
+LLM_CALLS = Counter("crawl4ai_llm_calls_total", "Groq completions by outcome", ["model", "outcome"])
+LLM_PARSE_FAILURES = Counter(
+    "crawl4ai_llm_parse_failures_total", "LLM replies with no recoverable JSON", ["extractor"]
+)
+LLM_JSON_REPAIRS = Counter(
+    "crawl4ai_llm_json_repairs_total", "Truncated or off-spec LLM replies whose completed fields were kept", ["extractor"]
+)
+PAGES_TRIMMED = Counter(
+    "crawl4ai_pages_trimmed_total", "Crawled pages shrunk further because their request ran out of memory budget"
+)
+SCRAPE_OUTCOMES = Counter(
+    "crawl4ai_scrape_outcomes_total",
+    "Scrape results by endpoint and outcome (success, consent_page, minimal_content, crawl_error, extraction_failed, error)",
+    ["endpoint", "outcome"]
+)
+
+# Current load
+CRAWLS_IN_FLIGHT = Gauge("crawl4ai_crawls_in_flight", "Page fetches and renders currently running", multiprocess_mode="livesum")
+BROWSER_POOL_WARM = Gauge("crawl4ai_browser_pool_warm_browsers", "Browsers running in the pool", multiprocess_mode="livesum")
+BROWSER_POOL_ACTIVE_LEASES = Gauge("crawl4ai_browser_pool_active_leases", "Browser pages currently leased", multiprocess_mode="livesum")
+BROWSER_POOL_CAPACITY = Gauge("crawl4ai_browser_pool_capacity", "Concurrent page leases the pool allows", multiprocess_mode="livesum")
+LLM_IN_FLIGHT = Gauge("crawl4ai_llm_in_flight", "Groq completions currently running", multiprocess_mode="livesum")
+LLM_WAITING = Gauge("crawl4ai_llm_waiting", "Extractions waiting for a Groq concurrency slot", multiprocess_mode="livesum")
+PROCESS_RSS_BYTES = Gauge("crawl4ai_process_rss_bytes", "Resident memory of the server process (excluding Chromium)", multiprocess_mode="livesum")
+JOBS_QUEUED = Gauge("crawl4ai_jobs_queued", "Jobs waiting in the job queue", multiprocess_mode="livesum")
+
+_gauge_callbacks: List[Tuple[Gauge, Callable[[], float]]] = []
+
+def record_outcome(endpoint: str, outcome: str):
+    SCRAPE_OUTCOMES.labels(endpoint=endpoint, outcome=outcome).inc()
+
+def track(gauge: Gauge, f: Callable[[], float]):
+    """Keep a gauge equal to f(); multiprocess mode cannot read callbacks, so there it is refreshed"""
+    if MULTIPROCESS:
+        _gauge_callbacks.append((gauge, f))
+    else:
+        gauge.set_function(f)
+
+def refresh():
+    for gauge, f in _gauge_callbacks:
+        gauge.set(f())
+
+async def refresh_forever(interval: float = 5.0):
+    """Write this worker's callback gauges periodically, so any worker answering /metrics sees them"""
+    while True:
+        refresh()
+        await asyncio.sleep(interval)
+
+def mark_worker_stopped():
+    """Drop this worker's live gauges from the multiprocess sums (called on every worker's shutdown)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+def render() -> Tuple[bytes, str]:
+    """Prometheus text exposition of every metric, summed over all workers in multiprocess mode"""
+    if not MULTIPROCESS:
+        return generate_latest(), CONTENT_TYPE_LATEST
+    refresh()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
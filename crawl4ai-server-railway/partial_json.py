@@ -0,0 +1,169 @@
+import json
+import re
+from typing import Any, Optional, Tuple
+
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_BARE_WORD = re.compile(r"[A-Za-z_$][\w$-]*")
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+class _Truncated(Exception):
+    """The text ended inside a value"""
+
+class _Parser:
+    """Single left-to-right pass over LLM output that may be cut off or slightly off-spec.
+
+    Every value that was completed before the text ends is kept: containers left
+    open are closed, and the key/value pair or array item being written when the
+    text ran out is dropped. Trailing or missing commas, single quotes, Python
+    literals and placeholder words (``numeric_price``) are tolerated.
+    """
+
+    def __init__(self, text: str, pos: int):
+        self.text = text
+        self.pos = pos
+
+    def skip_whitespace(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def truncated(self) -> "_Truncated":
+        """Consume the rest of the text so every enclosing container closes cleanly"""
+        self.pos = len(self.text)
+        return _Truncated()
+
+    def at_end(self) -> bool:
+        self.skip_whitespace()
+        return self.pos >= len(self.text)
+
+    def value(self) -> Any:
+        if self.at_end():
+            raise _Truncated()
+        char = self.text[self.pos]
+        if char == "{":
+            return self.object()
+        if char == "[":
+            return self.array()
+        if char in "\"'":
+            return self.string()
+        if char in "-.0123456789":
+            return self.number()
+        return self.bare_word()
+
+    def object(self) -> dict:
+        self.pos += 1
+        result = {}
+        while not self.at_end():
+            char = self.text[self.pos]
+            if char == "}":
+                self.pos += 1
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+            try:
+                key = self.string() if char in "\"'" else self.bare_key()
+                if self.at_end():
+                    raise _Truncated()
+                if self.text[self.pos] != ":":
+                    raise ValueError(f"expected ':' at {self.pos}")
+                self.pos += 1
+                value = self.value()
+            except _Truncated:
+                break
+            result[key] = value
+        return self.closed(result)
+
+    def array(self) -> list:
+        self.pos += 1
+        result = []
+        while not self.at_end():
+            char = self.text[self.pos]
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == ",":
+                self.pos += 1
+                continue
+            try:
+                result.append(self.value())
+            except _Truncated:
+                break
+        return self.closed(result)
+
+    def closed(self, partial):
+        """A container cut off before any member was complete is dropped like a cut-off scalar"""
+        if not partial:
+            raise _Truncated()
+        return partial
+
+    def string(self) -> str:
+        quote = self.text[self.pos]
+        end = self.pos + 1
+        while end < len(self.text) and self.text[end] != quote:
+            end += 2 if self.text[end] == "\\" else 1
+        if end >= len(self.text):
+            raise self.truncated()
+        raw = self.text[self.pos + 1:end]
+        self.pos = end + 1
+        if quote == "'":
+            raw = raw.replace("\\'", "'").replace('"', '\\"')
+        try:
+            return json.loads(f'"{raw}"', strict=False)
+        except json.JSONDecodeError:
+            return raw
+
+    def number(self):
+        match = _NUMBER.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"bad number at {self.pos}")
+        if match.end() >= len(self.text):
+            # "14" may be the start of "1499"
+            raise self.truncated()
+        self.pos = match.end()
+        literal = match.group()
+        if any(c in literal for c in ".eE"):
+            return float(literal)
+        return int(literal)
+
+    def bare_word(self):
+        match = _BARE_WORD.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"unexpected {self.text[self.pos]!r} at {self.pos}")
+        if match.end() >= len(self.text):
+            raise self.truncated()
+        self.pos = match.end()
+        word = match.group()
+        if word in _LITERALS:
+            return _LITERALS[word]
+        # Placeholder copied from the prompt's example (numeric_price, NaN, ...)
+        return None
+
+    def bare_key(self) -> str:
+        match = _BARE_WORD.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"expected a key at {self.pos}")
+        if match.end() >= len(self.text):
+            raise self.truncated()
+        self.pos = match.end()
+        return match.group()
+
+def parse(text: str) -> Tuple[Optional[Any], bool]:
+    """(value, repaired) for the first JSON object or array in an LLM reply.
+
+    ``repaired`` is True when the reply was truncated or off-spec and only what
+    could be recovered is returned; the value is None when there is no JSON at all.
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return None, False
+    start = min(starts)
+    try:
+        return json.JSONDecoder().raw_decode(text, start)[0], False
+    except json.JSONDecodeError:
+        pass
+    parser = _Parser(text, start)
+    try:
+        value = parser.value()
+    except (_Truncated, ValueError):
+        return None, False
+    return value, True
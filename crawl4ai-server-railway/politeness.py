@@ -0,0 +1,184 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from crawl_cache import url_domain
+import request_timing
+
+# Status codes and page text that mean the site is throttling or challenging us
+BLOCK_STATUS_CODES = {403, 429, 503}
+BLOCK_MARKERS = re.compile(
+    r"(unusual traffic|are you a robot|robot check|enter the characters you see|captcha|access denied|"
+    r"request blocked|automated (queries|access)|before you continue to google|choose what you're giving feedback on)",
+    re.IGNORECASE
+)
+
+def is_block_page(status_code: Optional[int], content: Optional[str]) -> bool:
+    """Captcha, consent wall or throttling response instead of the real page"""
+    if status_code in BLOCK_STATUS_CODES:
+        return True
+    # Real product pages can mention these words deep in the text; challenge pages are short
+    return bool(content) and len(content) < 5000 and bool(BLOCK_MARKERS.search(content))
+
+def parse_domain_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    """Parse 'google.com=2:1,amazon.in=3:2' into domain -> (max concurrent crawls, requests per second)"""
+    limits = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        domain, value = item.split("=", 1)
+        try:
+            concurrency, rate = value.split(":", 1)
+            limits[domain.strip().lower()] = (int(concurrency), float(rate))
+        except ValueError:
+            print(f"⚠️ Ignoring invalid politeness limit: {item}")
+    return limits
+
+class _HostState:
+    def __init__(self, concurrency: int, rate: float):
+        self.concurrency = max(1, concurrency)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.base_rate = rate
+        self.rate = rate
+        self.tokens = float(self.concurrency)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.strikes = 0
+        self.in_flight = 0
+        # Crawls holding or waiting for a slot
+        self.users = 0
+        self.lock = asyncio.Lock()
+        self.stats = {"crawls": 0, "blocked": 0, "waited_s": 0.0}
+
+class PolitenessScheduler:
+    """Per-host admission control shared by every crawl.
+
+    Each host gets a concurrency cap and a token bucket (``rate`` requests per
+    second, bursting up to the cap). When a crawl comes back as a block page the
+    host is paused with exponential backoff and its rate halved; successful
+    crawls restore the rate gradually. Limits match the most specific configured
+    domain, so amazon.in also covers www.amazon.in.
+
+    At most ``max_hosts`` hosts are tracked. Past that, the least recently used
+    idle hosts are forgotten: nothing in flight or waiting, no backoff pending and
+    the rate fully recovered, so a new entry for them behaves the same.
+    """
+
+    def __init__(self, default_concurrency: int = 4, default_rate: float = 2.0,
+                 domain_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 base_backoff: float = 5.0, max_backoff: float = 60.0, min_rate: float = 0.1,
+                 max_hosts: int = 2000):
+        self.default_concurrency = default_concurrency
+        self.default_rate = default_rate
+        self.domain_limits = domain_limits or {}
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_rate = min_rate
+        self.max_hosts = max_hosts
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+
+    def limits_for(self, host: str) -> Tuple[int, float]:
+        domain = host
+        while domain:
+            if domain in self.domain_limits:
+                return self.domain_limits[domain]
+            if "." not in domain:
+                break
+            domain = domain.split(".", 1)[1]
+        return self.default_concurrency, self.default_rate
+
+    def _host(self, url: str) -> Optional[_HostState]:
+        host = url_domain(url)
+        if not host:
+            return None  # raw: and file: URLs
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(*self.limits_for(host))
+            if len(self._hosts) > self.max_hosts:
+                self._evict_idle(keep=host)
+        self._hosts.move_to_end(host)
+        return state
+
+    def _evict_idle(self, keep: str):
+        now = time.monotonic()
+        idle = [host for host, state in self._hosts.items() if host != keep and not state.users
+                and state.blocked_until <= now and state.rate >= state.base_rate]
+        for host in idle[:len(self._hosts) - self.max_hosts]:
+            del self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Wait for a concurrency slot and a rate token for the URL's host"""
+        state = self._host(url)
+        if state is None:
+            yield
+            return
+        started = time.monotonic()
+        state.users += 1
+        try:
+            async with state.semaphore:
+                await self._take_token(state)
+                waited = time.monotonic() - started
+                state.stats["waited_s"] += waited
+                request_timing.add("queue_wait", waited * 1000)
+                state.stats["crawls"] += 1
+                state.in_flight += 1
+                try:
+                    yield
+                finally:
+                    state.in_flight -= 1
+        finally:
+            state.users -= 1
+
+    async def _take_token(self, state: _HostState):
+        # The lock keeps waiters in arrival order while they sleep for tokens or backoff
+        async with state.lock:
+            while True:
+                now = time.monotonic()
+                if now < state.blocked_until:
+                    await asyncio.sleep(state.blocked_until - now)
+                    continue
+                if state.rate <= 0:
+                    return
+                state.tokens = min(state.concurrency, state.tokens + (now - state.updated) * state.rate)
+                state.updated = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    return
+                await asyncio.sleep((1 - state.tokens) / state.rate)
+
+    def report(self, url: str, blocked: bool):
+        """Feed a crawl outcome back: block pages back the host off, successes recover its rate"""
+        state = self._host(url)
+        if state is None:
+            return
+        if blocked:
+            state.strikes += 1
+            state.stats["blocked"] += 1
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (state.strikes - 1))
+            state.blocked_until = max(state.blocked_until, time.monotonic() + backoff)
+            if state.rate > 0:
+                state.rate = max(self.min_rate, state.rate / 2)
+            print(f"🐢 {url_domain(url)} is blocking crawls, backing off {backoff:.1f}s (rate {state.rate:.2f}/s)")
+        else:
+            state.strikes = 0
+            if state.rate < state.base_rate:
+                state.rate = min(state.base_rate, state.rate + state.base_rate * 0.1)
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            host: {
+                "in_flight": state.in_flight,
+                "concurrency": state.concurrency,
+                "rate": round(state.rate, 3),
+                "backoff_remaining_s": round(max(0.0, state.blocked_until - now), 1),
+                "crawls": state.stats["crawls"],
+                "blocked": state.stats["blocked"],
+                "waited_s": round(state.stats["waited_s"], 1),
+            }
+            for host, state in self._hosts.items()
+        }
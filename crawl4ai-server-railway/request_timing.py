@@ -0,0 +1,108 @@
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+class RequestTimings:
+    """Where one request spent its time.
+
+    ``stages`` accumulates milliseconds per stage (queue_wait, browser_acquire,
+    navigation, http_fetch, markdown, structured_data, content_reduction,
+    extraction, llm, deep_scrape, merge). Stages running concurrently, such as a
+    deep-scrape fan-out, are summed, so they can add up to more than total_ms.
+    ``cache`` counts hit/miss/coalesced per cached stage.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.llm_calls: List[dict] = []
+        self.cache: Dict[str, Dict[str, int]] = {}
+
+    def add(self, stage: str, elapsed_ms: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + elapsed_ms
+
+    def count_cache(self, stage: str, status: str, count: int = 1):
+        counts = self.cache.setdefault(stage, {})
+        counts[status] = counts.get(status, 0) + count
+
+    def merge(self, other: "RequestTimings"):
+        """Fold a finished child's stages, LLM calls and cache counts into this one"""
+        for stage, elapsed_ms in other.stages.items():
+            self.add(stage, elapsed_ms)
+        self.llm_calls.extend(other.llm_calls)
+        for stage, counts in other.cache.items():
+            for status, count in counts.items():
+                self.count_cache(stage, status, count)
+
+    def to_dict(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages": {stage: round(elapsed_ms, 1) for stage, elapsed_ms in self.stages.items()},
+            "llm_calls": self.llm_calls,
+            "cache": self.cache,
+        }
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+@contextmanager
+def collect():
+    """Record timings for everything awaited inside the block, including tasks it spawns.
+
+    A collector opened inside another one (a bulk-scrape item) is folded into the
+    outer one when it closes, so envelope timings cover all items.
+    """
+    parent = _current.get()
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.merge(timings)
+
+@contextmanager
+def stage(name: str):
+    """Add the block's wall time to the current request's stage; a no-op outside a request"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+def add(stage_name: str, elapsed_ms: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage_name, elapsed_ms)
+
+def record_cache(stage_name: str, status: str):
+    timings = _current.get()
+    if timings is not None:
+        timings.count_cache(stage_name, status)
+
+def record_llm(model: str, latency_ms: float, wait_ms: float, prompt_tokens: int, completion_tokens: int,
+               finish_reason: Optional[str]):
+    timings = _current.get()
+    if timings is None:
+        return
+    timings.add("llm", latency_ms)
+    timings.llm_calls.append({
+        "model": model,
+        "latency_ms": round(latency_ms, 1),
+        "wait_ms": round(wait_ms, 1),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "finish_reason": finish_reason,
+    })
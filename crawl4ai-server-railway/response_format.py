@@ -0,0 +1,41 @@
+import json
+from typing import Iterable, Optional
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same JSON, just slower
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; clients asking for it get JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def dumps(payload) -> bytes:
+    """Compact JSON bytes for plain dicts/lists (pydantic models must be dumped first)"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    return msgpack is not None and any(media_type in (accept or "") for media_type in MSGPACK_MEDIA_TYPES)
+
+def encode_response(payload, accept: Optional[str] = None, status_code: int = 200) -> Response:
+    """Serialize once, skipping FastAPI's jsonable_encoder walk; msgpack when the client negotiated it"""
+    if wants_msgpack(accept):
+        return Response(msgpack.packb(payload, use_bin_type=True), status_code=status_code,
+                        media_type="application/msgpack")
+    return Response(dumps(payload), status_code=status_code, media_type="application/json")
+
+def project(response: dict, fields: Optional[Iterable[str]], include_raw_content: bool = True) -> dict:
+    """Keep only the requested product_data fields, and drop raw_content when not wanted"""
+    if not include_raw_content:
+        response.pop("raw_content", None)
+    if fields is not None and response.get("product_data") is not None:
+        wanted = set(fields)
+        response["product_data"] = {k: v for k, v in response["product_data"].items() if k in wanted}
+    return response
@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is in
+    flight await the same task instead of repeating it. Followers get
+    ``share(result)`` so they never mutate the leader's object. The shared task
+    is only cancelled once every caller waiting on it has been cancelled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, list] = {}  # key -> [task, waiters]
+        self.stats = {"executions": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], share: Optional[Callable[[Any], Any]] = None):
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            call = [asyncio.ensure_future(fn()), 0]
+            self._calls[key] = call
+            call[0].add_done_callback(lambda _: self._forget(key, call))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        task = call[0]
+        call[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled() or call[1] > 1:
+                raise
+            # Last caller gave up: stop the work and let the next caller start afresh
+            self._forget(key, call)
+            task.cancel()
+            raise
+        finally:
+            call[1] -= 1
+        return result if leader or share is None else share(result)
+
+    def _forget(self, key: str, call: list):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def status(self) -> dict:
+        return {**self.stats, "in_flight": len(self._calls)}
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from batch_extraction import PageBatcher
+
+class Recorder:
+    """extract_batch stand-in that remembers each batch it was sent"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False, short: bool = False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+        self.short = short
+
+    async def __call__(self, pages):
+        self.batches.append(list(pages))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("groq down")
+        results = [f"result:{page}" for page in pages]
+        return results[:-1] if self.short else results
+
+def batcher(recorder, **kwargs):
+    options = {"token_budget": 10_000, "max_pages": 5, "linger": 0.05}
+    options.update(kwargs)
+    return PageBatcher(recorder, prepare=str.strip, **options)
+
+def test_pages_arriving_together_share_one_call():
+    async def scenario():
+        recorder = Recorder()
+        pages = batcher(recorder)
+        results = await asyncio.gather(*(pages.submit(f" page {i} ") for i in range(3)))
+        assert results == ["result:page 0", "result:page 1", "result:page 2"]
+        assert recorder.batches == [["page 0", "page 1", "page 2"]]
+        assert pages.batches_sent == 1
+    asyncio.run(scenario())
+
+def test_max_pages_sends_without_waiting_for_linger():
+    async def scenario():
+        recorder = Recorder()
+        pages = batcher(recorder, max_pages=2, linger=60)
+        results = await asyncio.wait_for(asyncio.gather(*(pages.submit(f"p{i}") for i in range(4))), timeout=1)
+        assert results == ["result:p0", "result:p1", "result:p2", "result:p3"]
+        assert recorder.batches == [["p0", "p1"], ["p2", "p3"]]
+    asyncio.run(scenario())
+
+def test_token_budget_starts_a_new_batch():
+    async def scenario():
+        recorder = Recorder()
+        # "word N" is 2 tokens plus a 20-token delimiter: with 10 tokens of overhead two pages exceed 50
+        pages = batcher(recorder, token_budget=50, overhead_tokens=10)
+        await asyncio.gather(*(pages.submit(f"word {i}") for i in range(3)))
+        assert recorder.batches == [["word 0"], ["word 1"], ["word 2"]]
+    asyncio.run(scenario())
+
+def test_linger_flushes_a_partial_batch():
+    async def scenario():
+        recorder = Recorder()
+        pages = batcher(recorder, linger=0.05)
+        assert await asyncio.wait_for(pages.submit("alone"), timeout=1) == "result:alone"
+        assert recorder.batches == [["alone"]]
+    asyncio.run(scenario())
+
+def test_batch_failure_reaches_every_page():
+    async def scenario():
+        pages = batcher(Recorder(fail=True))
+        results = await asyncio.gather(pages.submit("a"), pages.submit("b"), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+    asyncio.run(scenario())
+
+def test_missing_results_fail_instead_of_hanging():
+    async def scenario():
+        pages = batcher(Recorder(short=True))
+        results = await asyncio.wait_for(
+            asyncio.gather(pages.submit("a"), pages.submit("b"), return_exceptions=True), timeout=1
+        )
+        assert results[0] == "result:a"
+        assert isinstance(results[1], RuntimeError)
+    asyncio.run(scenario())
+
+def test_close_cancels_pending_and_in_flight_pages():
+    async def scenario():
+        recorder = Recorder(delay=10)
+        pages = batcher(recorder, max_pages=1, linger=60)
+        in_flight = asyncio.ensure_future(pages.submit("sent"))
+        await asyncio.sleep(0.01)
+        pages.max_pages = 5
+        waiting = asyncio.ensure_future(pages.submit("waiting"))
+        await asyncio.sleep(0.01)
+        pages.close()
+        for task in (in_flight, waiting):
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        assert recorder.batches == [["sent"]]
+    asyncio.run(scenario())
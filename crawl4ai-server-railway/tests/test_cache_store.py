@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from cache_store import TieredCache
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    async def scenario():
+        value = {"text": "x" * 100}
+        size = len(json.dumps(value))
+        cache = TieredCache("test", max_memory_bytes=size * 2)
+        await cache.set("a", value, 60)
+        await cache.set("b", value, 60)
+        await cache.get("a")
+        await cache.set("c", value, 60)
+        assert await cache.get("b") is None
+        assert await cache.get("a") == value
+        assert cache.stats["evictions"] == 1
+    asyncio.run(scenario())
+
+def test_expired_entries_are_not_served():
+    async def scenario():
+        cache = TieredCache("test")
+        await cache.set("a", {"v": 1}, -1)
+        assert await cache.get("a") is None
+        assert cache.stats["expired"] == 1
+    asyncio.run(scenario())
+
+def test_disk_tier_survives_a_restart_and_is_bounded(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "cache.sqlite3")
+        cache = TieredCache("test", disk_path=path, max_disk_entries=2)
+        for key in ("a", "b", "c"):
+            await cache.set(key, {"key": key}, 60)
+        cache.close()
+
+        reopened = TieredCache("test", disk_path=path, max_disk_entries=2)
+        assert await reopened.get("a") is None
+        assert await reopened.get("c") == {"key": "c"}
+        assert reopened.stats["disk_hits"] == 1
+        reopened.close()
+    asyncio.run(scenario())
+
+def test_invalidation_reaches_other_workers_memory(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "cache.sqlite3")
+        # Two workers sharing one file; sync_interval=0 checks the change log on every lookup
+        first = TieredCache("test", disk_path=path, sync_interval=0)
+        second = TieredCache("test", disk_path=path, sync_interval=0)
+        await first.set("page", {"price": 100}, 60)
+        assert await second.get("page") == {"price": 100}
+        assert await second.get("page") == {"price": 100}
+        assert second.stats["memory_hits"] == 1
+
+        await first.delete("page")
+        assert await second.get("page") is None
+
+        # A refresh on one worker replaces the other's memory copy too
+        await second.set("page", {"price": 90}, 60)
+        assert await first.get("page") == {"price": 90}
+        await first.set("page", {"price": 80}, 60)
+        assert await second.get("page") == {"price": 80}
+        # A worker's own writes do not evict its memory copy
+        assert first.stats["remote_changes"] == 1
+        first.close()
+        second.close()
+    asyncio.run(scenario())
+
+def test_pruned_change_log_clears_a_stale_worker(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "cache.sqlite3")
+        idle = TieredCache("test", disk_path=path, sync_interval=0)
+        busy = TieredCache("test", disk_path=path, sync_interval=0)
+        await idle.set("other", {"v": 1}, 60)
+        await busy.set("page", {"v": 1}, 60)
+        await idle.get("page")
+        # Everything this worker had not seen yet was pruned while it sat idle
+        await busy.set("page", {"v": 2}, 60)
+        busy._db.execute("DELETE FROM changes")
+        busy._db.commit()
+        await busy.set("unrelated", {"v": 1}, 60)
+        assert await idle.get("page") == {"v": 2}
+        assert idle.stats["disk_hits"] == 2
+        idle.close()
+        busy.close()
+    asyncio.run(scenario())
+
+def test_sync_is_throttled(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "cache.sqlite3")
+        first = TieredCache("test", disk_path=path, sync_interval=3600)
+        second = TieredCache("test", disk_path=path, sync_interval=3600)
+        await first.set("page", {"v": 1}, 60)
+        assert await second.get("page") == {"v": 1}
+        await first.delete("page")
+        # Within the interval the memory copy may still be served
+        assert await second.get("page") == {"v": 1}
+        second._synced_at = 0
+        assert await second.get("page") is None
+        first.close()
+        second.close()
+    asyncio.run(scenario())
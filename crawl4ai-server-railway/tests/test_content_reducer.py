@@ -0,0 +1,58 @@
+import pytest
+
+import content_reducer
+from content_reducer import compact_markdown, count_tokens, reduce_content, split_blocks, strip_boilerplate
+
+PAGE = "\n\n".join([
+    "[Home](/) [Mobiles](/m) [Audio](/a) [Deals](/d)",
+    "# boAt Rockerz 450 Bluetooth Headphones",
+    "Price: ₹1,499 (MRP ₹3,990, 62% off)",
+    "## Specifications\nBattery: 15 hours\nConnectivity: Bluetooth 5.0\nWeight: 185 g",
+    "4.1 out of 5 stars, 52,310 ratings",
+    "Sign in to your account",
+    "Customers also viewed " + " ".join(f"[Item {i}](/p/{i})" for i in range(12)),
+    "© 2024 Example Retail. All rights reserved.",
+])
+
+@pytest.fixture
+def without_tiktoken(monkeypatch):
+    monkeypatch.setattr(content_reducer, "_encoding", None)
+
+def test_count_tokens_falls_back_to_four_chars_per_token(without_tiktoken):
+    assert count_tokens("") == 0
+    assert count_tokens("abcd") == 1
+    assert count_tokens("abcde") == 2
+    assert count_tokens("x" * 400) == 100
+
+def test_truncate_falls_back_to_characters(without_tiktoken):
+    assert content_reducer.truncate_to_tokens("x" * 100, 10) == "x" * 40
+
+def test_strip_boilerplate_drops_chrome_and_menus():
+    cleaned = strip_boilerplate(PAGE)
+    assert "Sign in" not in cleaned
+    assert "All rights reserved" not in cleaned
+    assert "[Mobiles]" not in cleaned
+    assert "Price: ₹1,499" in cleaned
+    assert "Battery: 15 hours" in cleaned
+
+def test_split_blocks_keeps_headings_with_their_content():
+    blocks = split_blocks("# Title\n\nbody\n\n## Specs\n## Details\nWeight: 1 kg\n\nbody")
+    # An empty heading is dropped and the repeated block appears once
+    assert blocks == ["# Title\nbody", "## Details\nWeight: 1 kg", "body"]
+
+def test_reduce_content_keeps_product_blocks_within_budget(without_tiktoken):
+    reduced = reduce_content(PAGE, 40)
+    assert count_tokens(reduced) <= 40
+    assert "₹1,499" in reduced
+    assert "Customers also viewed" not in reduced
+
+def test_reduce_content_returns_small_pages_whole_after_cleanup(without_tiktoken):
+    assert reduce_content(PAGE, 10_000) == strip_boilerplate(PAGE)
+    assert reduce_content("", 100) == ""
+
+def test_compact_markdown_keeps_the_head_verbatim(without_tiktoken):
+    page = "# Title line\n\n" + "\n\n".join(f"Block {i} with filler text " * 5 for i in range(200))
+    compacted = compact_markdown(page, 2000)
+    assert compacted.startswith("# Title line")
+    assert len(compacted) <= 2100
+    assert compact_markdown("short", 2000) == "short"
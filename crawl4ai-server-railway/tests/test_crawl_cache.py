@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from cache_store import TieredCache
+from crawl_cache import CrawlCache, CrawledPage, normalize_url, parse_domain_ttls, url_domain
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://WWW.Amazon.IN:443/dp/B07/", "https://www.amazon.in/dp/B07"),
+    ("http://example.com:80/", "http://example.com/"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    ("https://example.com/p#reviews", "https://example.com/p"),
+    ("https://example.com/p?b=2&a=1", "https://example.com/p?a=1&b=2"),
+    ("https://www.amazon.in/boAt-Rockerz/dp/B07/ref=sr_1_3", "https://www.amazon.in/boAt-Rockerz/dp/B07"),
+    ("https://example.com/p?utm_source=x&utm_medium=y&gclid=z&id=7", "https://example.com/p?id=7"),
+    ("https://www.flipkart.com/p/itm1?pid=ABC&otracker=search&fm=organic&iid=en_1", "https://www.flipkart.com/p/itm1?pid=ABC"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+@pytest.mark.parametrize("first, second", [
+    # Different sellers / variants of the same listing are different pages
+    ("https://www.amazon.in/dp/B07?smid=SELLER1", "https://www.amazon.in/dp/B07?smid=SELLER2"),
+    ("https://www.amazon.in/dp/B07?th=1&psc=1", "https://www.amazon.in/dp/B07"),
+    ("https://www.flipkart.com/p/itm1?pid=ABC&lid=LSTA", "https://www.flipkart.com/p/itm1?pid=ABC&lid=LSTB"),
+    ("https://www.myntra.com/headphones/123/buy?skuid=1", "https://www.myntra.com/headphones/123/buy?skuid=2"),
+])
+def test_content_selecting_params_stay_in_the_key(first, second):
+    assert normalize_url(first) != normalize_url(second)
+
+def test_url_domain_strips_www():
+    assert url_domain("https://WWW.Flipkart.com/x") == "flipkart.com"
+
+def test_parse_domain_ttls_skips_bad_entries():
+    assert parse_domain_ttls("google.com=900, amazon.in=21600,bad,x=y") == {"google.com": 900.0, "amazon.in": 21600.0}
+
+def test_ttl_for_matches_parent_domains():
+    cache = CrawlCache(TieredCache("test"), default_ttl=60, domain_ttls={"amazon.in": 600})
+    assert cache.ttl_for("https://www.amazon.in/dp/B07") == 600
+    assert cache.ttl_for("https://m.amazon.in/dp/B07") == 600
+    assert cache.ttl_for("https://flipkart.com/p") == 60
+
+def test_put_and_get_by_normalized_url():
+    async def scenario():
+        cache = CrawlCache(TieredCache("test"), min_content_chars=10)
+        page = CrawledPage("https://example.com/p?utm_source=x", True, markdown="# Product\n\nPrice ₹1,499",
+                           structured_data={"title": "Product"})
+        await cache.put(page)
+        hit = await cache.get("https://EXAMPLE.com/p#top")
+        assert hit.cache_status == "hit"
+        assert hit.structured_data == {"title": "Product"}
+        assert await cache.get("https://example.com/p", policy="refresh") is None
+        assert await cache.get("https://example.com/p", variant="full") is None
+        await cache.invalidate("https://example.com/p")
+        assert await cache.get("https://example.com/p") is None
+        assert cache.stats["hits"] == 1 and cache.stats["refreshes"] == 1
+    asyncio.run(scenario())
+
+def test_thin_and_failed_pages_are_not_stored():
+    async def scenario():
+        cache = CrawlCache(TieredCache("test"), min_content_chars=100)
+        await cache.put(CrawledPage("https://example.com/a", True, markdown="too short"))
+        await cache.put(CrawledPage("https://example.com/b", False, error_message="net::ERR"))
+        await cache.put(CrawledPage("https://example.com/c", True, markdown="x" * 200), policy="bypass")
+        assert cache.stats["skipped_stores"] == 2
+        for url in ("https://example.com/a", "https://example.com/b", "https://example.com/c"):
+            assert await cache.get(url) is None
+    asyncio.run(scenario())
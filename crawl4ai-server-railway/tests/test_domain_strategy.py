@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from cache_store import TieredCache
+from domain_strategy import DomainStrategies, url_error
+
+CANDIDATES = ["http", "browser", "browser_full"]
+
+@pytest.mark.parametrize("status_code, error, expected", [
+    (404, None, "http_404"),
+    (410, None, "http_410"),
+    (500, None, "http_500"),
+    (None, "ConnectError: [Errno -2] Name or service not known", "unreachable"),
+    (None, "net::ERR_NAME_NOT_RESOLVED at https://nope.example", "unreachable"),
+    # Throttling is a block page, not a bad URL
+    (403, None, None),
+    (429, None, None),
+    (503, None, None),
+    (200, None, None),
+    (None, "ReadTimeout: timed out", None),
+    (None, None, None),
+])
+def test_url_error(status_code, error, expected):
+    assert url_error(status_code, error) == expected
+
+def strategies(**kwargs):
+    return DomainStrategies(TieredCache("test"), **kwargs)
+
+def test_plan_starts_at_the_cheapest_healthy_strategy():
+    async def scenario():
+        domains = strategies(fail_streak_limit=2, reprobe_every=0)
+        url = "https://www.spa.com/p"
+        assert await domains.plan(url, CANDIDATES) == CANDIDATES
+        for _ in range(2):
+            await domains.record(url, "http", False, 100, 0)
+        assert await domains.plan(url, CANDIDATES) == ["browser", "browser_full"]
+        await domains.record(url, "browser", True, 900, 4000)
+        assert domains.status()["domains"]["spa.com"]["preferred_strategy"] == "browser"
+    asyncio.run(scenario())
+
+def test_plan_reprobes_written_off_strategies():
+    async def scenario():
+        domains = strategies(fail_streak_limit=1, reprobe_every=3)
+        url = "https://spa.com/p"
+        await domains.record(url, "http", False, 100, 0)
+        plans = [await domains.plan(url, CANDIDATES) for _ in range(3)]
+        assert plans[0] == ["browser", "browser_full"]
+        assert plans[2] == CANDIDATES
+    asyncio.run(scenario())
+
+def test_min_useful_chars_follows_the_domain_usual_size():
+    async def scenario():
+        domains = strategies(min_content_ratio=0.2)
+        url = "https://amazon.in/dp/1"
+        assert domains.min_useful_chars(url, 500) == 500
+        for _ in range(3):
+            await domains.record(url, "browser", True, 900, 20000)
+        assert domains.min_useful_chars(url, 500) == 4000
+    asyncio.run(scenario())
+
+def test_workers_add_to_each_others_counts(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "domain_stats.sqlite3")
+        # A long sync interval: only the re-read before each update sees the other worker's writes
+        first = DomainStrategies(TieredCache("test", disk_path=path, sync_interval=3600))
+        second = DomainStrategies(TieredCache("test", disk_path=path, sync_interval=3600))
+        url = "https://amazon.in/dp/1"
+        await first.plan(url, CANDIDATES)
+        await second.plan(url, CANDIDATES)
+        for _ in range(2):
+            await first.record(url, "http", True, 100, 3000)
+            await second.record(url, "http", False, 100, 0)
+        await second.record_extraction(url, "llm")
+        await first.record_extraction(url, "fast_path")
+
+        stats = await first.store.get("amazon.in", fresh=True)
+        assert stats["requests"] == 2
+        assert stats["strategies"]["http"]["attempts"] == 4
+        assert stats["strategies"]["http"]["successes"] == 2
+        assert stats["extractor_tiers"] == {"llm": 1, "fast_path": 1}
+        first.store.close()
+        second.store.close()
+    asyncio.run(scenario())
+
+def test_only_recent_domains_are_kept_in_memory():
+    async def scenario():
+        domains = strategies(max_domains=2)
+        for host in ("a.com", "b.com", "c.com"):
+            await domains.plan(f"https://{host}/p", CANDIDATES)
+        assert list(domains.domains) == ["b.com", "c.com"]
+        assert set(domains.unsaved_requests) == {"b.com", "c.com"}
+    asyncio.run(scenario())
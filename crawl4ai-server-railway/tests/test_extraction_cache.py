@@ -0,0 +1,53 @@
+import asyncio
+from typing import Optional
+
+from pydantic import BaseModel
+
+from cache_store import TieredCache
+from extraction_cache import ExtractionCache
+
+class Product(BaseModel):
+    title: Optional[str] = None
+
+def memoized(cache, seen, prompt_version=1):
+    @cache.memoize("product", prompt_version, str.strip, Product, lambda: "model-a")
+    async def extract(content: str) -> Product:
+        seen.append(content)
+        await asyncio.sleep(0.01)
+        return Product(title=content.upper()) if content != "nothing" else Product()
+    return extract
+
+def test_extractor_gets_the_prepared_content_once():
+    async def scenario():
+        seen = []
+        extract = memoized(ExtractionCache(TieredCache("test")), seen)
+        assert (await extract("  page  ")).title == "PAGE"
+        # Differs only in what prepare strips: served from the cache
+        assert (await extract("page\n")).title == "PAGE"
+        assert seen == ["page"]
+    asyncio.run(scenario())
+
+def test_concurrent_identical_extractions_share_one_call():
+    async def scenario():
+        seen = []
+        extract = memoized(ExtractionCache(TieredCache("test"), enabled=False), seen)
+        first, second = await asyncio.gather(extract("page"), extract("page"))
+        assert first == second and first is not second
+        assert seen == ["page"]
+    asyncio.run(scenario())
+
+def test_empty_results_are_not_memoized():
+    async def scenario():
+        seen = []
+        cache = ExtractionCache(TieredCache("test"))
+        extract = memoized(cache, seen)
+        await extract("nothing")
+        await extract("nothing")
+        assert seen == ["nothing", "nothing"]
+        assert cache.status()["extractors"]["product"]["stores"] == 0
+    asyncio.run(scenario())
+
+def test_prompt_version_changes_the_key():
+    cache = ExtractionCache(TieredCache("test"))
+    assert cache.key("product", 1, "m", "page") != cache.key("product", 2, "m", "page")
+    assert cache.key("product", 1, "m", "page", "Amazon") != cache.key("product", 1, "m", "page", "Flipkart")
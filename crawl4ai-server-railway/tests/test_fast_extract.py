@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from fast_extract import (
+    detect_site, extract_fast_path_fields, fields_from_markdown, parse_count, parse_currency, parse_price, parse_rating,
+)
+
+JSON_LD_PAGE = """<html><head>
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "BreadcrumbList", "name": "Electronics"},
+  {"@type": "Product", "name": "boAt Rockerz 450", "brand": {"@type": "Brand", "name": "boAt"},
+   "image": ["/images/1.jpg", {"url": "https://cdn.example.com/2.jpg"}],
+   "description": "Wireless on-ear headphones", "sku": "RKZ450", "color": "Black",
+   "additionalProperty": [{"name": "Battery", "value": "15 hours"}],
+   "offers": {"@type": "Offer", "price": "1,499.00", "priceCurrency": "INR",
+              "availability": "https://schema.org/InStock"},
+   "aggregateRating": {"ratingValue": "4.1", "reviewCount": "45,210"}}
+]}
+</script>
+<meta property="og:title" content="OpenGraph title loses to JSON-LD">
+</head><body></body></html>"""
+
+def test_json_ld_product_inside_graph():
+    fields = extract_fast_path_fields(JSON_LD_PAGE, "https://shop.example.com/p/1")
+    assert fields == {
+        "title": "boAt Rockerz 450",
+        "brand": "boAt",
+        "description": "Wireless on-ear headphones",
+        "image_urls": ["https://shop.example.com/images/1.jpg", "https://cdn.example.com/2.jpg"],
+        "price": 1499.0,
+        "currency": "INR",
+        "availability_text": "In Stock",
+        "average_rating": 4.1,
+        "total_reviews": 45210,
+        "specifications": {"Battery": "15 hours", "sku": "RKZ450", "color": "Black"},
+    }
+
+def test_json_ld_aggregate_offer_and_trailing_commas():
+    html = """<script type="application/ld+json">
+    {"@type": "Product", "name": "Earbuds",
+     "offers": {"@type": "AggregateOffer", "lowPrice": "999", "highPrice": "1299", "priceCurrency": "INR"},}
+    </script>"""
+    fields = extract_fast_path_fields(html, "https://example.com/")
+    assert fields["price"] == 999.0
+    assert fields["price_range"] == "999 - 1299"
+
+def test_broken_json_ld_block_is_skipped():
+    html = '<script type="application/ld+json">{"@type": "Product", "name": </script><meta property="og:title" content="OG">'
+    assert extract_fast_path_fields(html, "https://example.com/")["title"] == "OG"
+
+@pytest.mark.parametrize("product, expected", [
+    ({"name": ["A", "B"], "description": {"@value": "x"}}, {"title": "A", "description": "x"}),
+    ({"name": {"@value": " Earbuds ", "@language": "en"}, "brand": [{"name": ["boAt"]}]},
+     {"title": "Earbuds", "brand": "boAt"}),
+    ({"name": 450, "description": ["", {"@value": "Wireless"}], "brand": {"name": {"x": 1}}},
+     {"title": "450", "description": "Wireless"}),
+    # Nothing usable: the field is dropped, not passed on as a list or object
+    ({"name": [{"a": 1}], "description": {"text": "x"}, "brand": True}, {}),
+])
+def test_json_ld_text_fields_are_always_strings(product, expected):
+    html = '<script type="application/ld+json">%s</script>' % json.dumps({"@type": "Product", **product})
+    fields = extract_fast_path_fields(html, "https://example.com/")
+    assert {key: fields[key] for key in ("title", "brand", "description") if key in fields} == expected
+
+def test_json_ld_price_specification_list():
+    html = ('<script type="application/ld+json">{"@type": "Product", "name": "A", "offers": '
+            '{"@type": "Offer", "priceSpecification": [{"price": "799"}]}}</script>')
+    assert extract_fast_path_fields(html, "https://example.com/")["price"] == 799.0
+
+def test_microdata():
+    html = """<div itemscope itemtype="https://schema.org/Product">
+      <meta itemprop="name" content="Croma Speaker">
+      <meta itemprop="price" content="2499">
+      <meta itemprop="priceCurrency" content="INR">
+      <meta itemprop="ratingValue" content="4.4">
+      <meta itemprop="reviewCount" content="312">
+      <img itemprop="image" src="https://cdn.example.com/speaker.jpg">
+    </div>"""
+    fields = extract_fast_path_fields(html, "https://example.com/")
+    assert fields == {
+        "title": "Croma Speaker", "price": 2499.0, "currency": "INR", "average_rating": 4.4, "total_reviews": 312,
+        "image_urls": ["https://cdn.example.com/speaker.jpg"],
+    }
+
+def test_microdata_ignored_without_a_product_type():
+    html = '<div itemscope itemtype="https://schema.org/Offer"><meta itemprop="price" content="10"></div>'
+    assert "price" not in extract_fast_path_fields(html, "https://example.com/")
+
+def test_open_graph():
+    html = """<head>
+      <meta property="og:title" content="Myntra Headphones">
+      <meta property="og:description" content="Free shipping">
+      <meta property="og:image" content="/img/h.jpg">
+      <meta property="product:price:amount" content="1,299">
+      <meta property="product:price:currency" content="INR">
+      <meta name="description" content="not OpenGraph">
+    </head>"""
+    fields = extract_fast_path_fields(html, "https://www.myntra.com/p/1")
+    assert fields == {
+        "title": "Myntra Headphones", "description": "Free shipping", "image_urls": ["https://www.myntra.com/img/h.jpg"],
+        "price": 1299.0, "currency": "INR",
+    }
+
+def test_amazon_dom_selectors():
+    html = """<body>
+      <span id="productTitle"> boAt Rockerz 450 </span>
+      <a id="bylineInfo">Visit the boAt Store</a>
+      <span class="a-price"><span class="a-offscreen">₹1,499.00</span></span>
+      <span id="acrCustomerReviewText">45,210 ratings</span>
+      <img id="landingImage" data-old-hires="https://m.media-amazon.com/big.jpg" src="data:image/gif;base64,x">
+      <div id="feature-bullets"><li><span class="a-list-item">40mm drivers</span></li></div>
+    </body>"""
+    fields = extract_fast_path_fields(html, "https://www.amazon.in/dp/B07")
+    assert fields["title"] == "boAt Rockerz 450"
+    assert fields["brand"] == "boAt"
+    assert fields["price"] == 1499.0 and fields["currency"] == "INR"
+    assert fields["total_reviews"] == 45210
+    assert fields["image_urls"] == ["https://m.media-amazon.com/big.jpg"]
+    assert fields["features"] == ["40mm drivers"]
+
+def test_dom_selectors_only_for_a_known_site():
+    html = '<span id="productTitle">Title</span>'
+    assert extract_fast_path_fields(html, "https://example.com/p") == {}
+    assert extract_fast_path_fields(html, "https://example.com/p", seller_name="Amazon")["title"] == "Title"
+
+def test_markdown_is_not_read_by_the_fast_path():
+    # A price or image in the rendered text is not evidence enough to skip the LLM
+    assert extract_fast_path_fields("", "https://example.com/") == {}
+
+def test_markdown_hints():
+    markdown = "EMI from ₹125/month\n\n![logo](https://x/logo.svg) ![p](https://x/p.jpg)\n\n4.2 out of 5 — 1,024 ratings"
+    assert fields_from_markdown(markdown) == {
+        "price": 125.0, "currency": "INR", "average_rating": 4.2, "total_reviews": 1024, "image_urls": ["https://x/p.jpg"],
+    }
+
+@pytest.mark.parametrize("value, expected", [(1499, 1499.0), ("₹1,499.00", 1499.0), ("Rs. 99", 99.0), ("0", None), ("free", None), (None, None)])
+def test_parse_price(value, expected):
+    assert parse_price(value) == expected
+
+def test_small_parsers():
+    assert parse_currency("₹1,499") == "INR"
+    assert parse_currency("usd") == "USD"
+    assert parse_currency("") is None
+    assert parse_rating("4.3 out of 5 stars") == 4.3
+    assert parse_rating("45 stars") is None
+    assert parse_count("1,234 reviews") == 1234
+    assert detect_site("https://www.flipkart.com/x") == "flipkart"
+    assert detect_site("https://example.com", "Croma") == "croma"
+    assert detect_site("https://example.com") is None
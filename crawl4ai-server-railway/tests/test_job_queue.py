@@ -0,0 +1,171 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+from job_queue import Job, JobQueue, MemoryJobStore, QueueFullError, SqliteJobStore
+
+def runner_for(log):
+    """Runner that records (endpoint, index) as it goes and returns a successful result per URL"""
+    async def runner(job, indices):
+        for index in indices:
+            log.append((job.endpoint, index))
+            yield index, {"success": True, "url": job.urls[index]}
+    return runner
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_job_round_trips_through_dict():
+    job = Job(["a", "b"], "/scrape", {"cache": "use"}, priority=3)
+    job.results[1] = {"success": False}
+    copy = Job.from_dict(json.loads(json.dumps(job.to_dict())))
+    assert copy.to_dict() == job.to_dict()
+    assert copy.pending_indices() == [0]
+    assert copy.summary()["failed_scrapes"] == 1
+
+def test_higher_priority_jobs_start_first():
+    async def scenario():
+        log = []
+        queue = JobQueue(runner_for(log), workers=1)
+        # Submitted before start so the single worker sees all three at once
+        await queue.submit(["u"], "low", priority=0)
+        await queue.submit(["u"], "high", priority=5)
+        await queue.submit(["u"], "also-low", priority=0)
+        await queue.start()
+        await wait_for(lambda: len(log) == 3)
+        await queue.close()
+        assert [endpoint for endpoint, _ in log] == ["high", "low", "also-low"]
+    asyncio.run(scenario())
+
+def test_submit_rejects_when_queue_is_full():
+    async def scenario():
+        queue = JobQueue(runner_for([]), max_queue_depth=2)
+        await queue.submit(["u"], "/scrape")
+        await queue.submit(["u"], "/scrape")
+        with pytest.raises(QueueFullError):
+            await queue.submit(["u"], "/scrape")
+        assert queue.stats["rejected"] == 1
+    asyncio.run(scenario())
+
+def test_cancel_stops_a_running_job_and_keeps_its_results():
+    async def scenario():
+        never = asyncio.Event()
+
+        async def runner(job, indices):
+            yield indices[0], {"success": True}
+            await never.wait()
+            yield indices[1], {"success": True}
+
+        queue = JobQueue(runner, workers=1)
+        await queue.start()
+        job = await queue.submit(["a", "b", "c"], "/scrape")
+        await wait_for(lambda: job.completed == 1)
+        await queue.cancel(job.id)
+        await wait_for(lambda: not queue._running)
+        assert job.status == "cancelled"
+        assert job.results[0] == {"success": True}
+        assert job.pending_indices() == [1, 2]
+        await queue.close()
+    asyncio.run(scenario())
+
+def test_sqlite_store_writes_one_row_per_result(tmp_path):
+    async def scenario():
+        store = SqliteJobStore(str(tmp_path / "jobs.db"))
+        job = Job(["a", "b", "c"], "/scrape")
+        await store.save(job)
+        for index in range(3):
+            job.results[index] = {"success": True, "index": index}
+            assert await store.save_result(job, index, job.results[index])
+        store.close()
+
+        db = sqlite3.connect(str(tmp_path / "jobs.db"))
+        (data,) = db.execute("SELECT data FROM jobs").fetchone()
+        assert json.loads(data)["results"] is None
+        assert db.execute("SELECT COUNT(*) FROM job_results").fetchone()[0] == 3
+        db.close()
+
+        loaded = await SqliteJobStore(str(tmp_path / "jobs.db")).load(job.id)
+        assert loaded.results == job.results
+    asyncio.run(scenario())
+
+def test_sqlite_store_reports_cancellation_from_another_worker(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        mine, theirs = SqliteJobStore(path), SqliteJobStore(path)
+        job = Job(["a", "b"], "/scrape", status="running")
+        await mine.save(job)
+
+        cancelled = await theirs.load(job.id)
+        cancelled.status = "cancelled"
+        await theirs.save(cancelled)
+
+        assert not await mine.save_result(job, 0, {"success": True})
+        # A stale running copy never overwrites the cancellation
+        assert not await mine.save(job)
+        stored = await theirs.load(job.id)
+        assert stored.status == "cancelled"
+        assert stored.results[0] == {"success": True}
+        mine.close()
+        theirs.close()
+    asyncio.run(scenario())
+
+def test_sqlite_store_deletes_results_with_their_job(tmp_path):
+    async def scenario():
+        store = SqliteJobStore(str(tmp_path / "jobs.db"))
+        old = Job(["a"], "/scrape", status="completed")
+        await store.save(old)
+        await store.save_result(old, 0, {"success": True})
+        await store.delete_finished(before=float("inf"))
+        assert await store.load_all() == []
+        assert store._execute("SELECT COUNT(*) FROM job_results") == [(0,)]
+        store.close()
+    asyncio.run(scenario())
+
+def test_restart_resumes_unfinished_urls_only(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        store = SqliteJobStore(path)
+        job = Job(["a", "b", "c"], "/scrape", status="running")
+        await store.save(job)
+        await store.save_result(job, 1, {"success": True, "url": "b"})
+        store.close()
+
+        log = []
+        queue = JobQueue(runner_for(log), store=SqliteJobStore(path), workers=1)
+        await queue.start()
+        assert queue.stats["resumed"] == 1
+        resumed = queue.get(job.id)
+        await wait_for(lambda: resumed.status == "completed")
+        await queue.close()
+        assert sorted(index for _, index in log) == [0, 2]
+
+        stored = await SqliteJobStore(path).load(job.id)
+        assert stored.status == "completed"
+        assert stored.completed == 3
+    asyncio.run(scenario())
+
+def test_shared_mode_leaves_live_workers_jobs_alone(tmp_path, monkeypatch):
+    async def scenario():
+        path = str(tmp_path / "jobs.db")
+        store = SqliteJobStore(path)
+        live, dead = Job(["a"], "/scrape"), Job(["b"], "/scrape")
+        await store.save(live)
+        await store.save(dead)
+        store._execute("UPDATE jobs SET owner = ? WHERE id = ?", (1, live.id))
+        store._execute("UPDATE jobs SET owner = ? WHERE id = ?", (2, dead.id))
+        store.close()
+
+        monkeypatch.setattr("job_queue._process_alive", lambda pid: pid == 1)
+        claimed = await SqliteJobStore(path).claim_unfinished(owner=99)
+        assert [job.id for job in claimed] == [dead.id]
+    asyncio.run(scenario())
+
+def test_memory_store_is_the_default():
+    queue = JobQueue(runner_for([]))
+    assert isinstance(queue.store, MemoryJobStore)
+    assert queue.status()["store"] == {"type": "memory", "jobs": 0}
@@ -0,0 +1,23 @@
+import os
+
+import metrics
+
+def test_multiproc_dir_is_fresh_for_each_master_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics.tempfile, "gettempdir", lambda: str(tmp_path))
+    monkeypatch.setattr(metrics.os, "getppid", os.getpid)
+    stale = [tmp_path / f"crawl4ai-metrics-{os.getpid()}", tmp_path / f"crawl4ai-metrics-{os.getpid()}-1"]
+    other_master = tmp_path / f"crawl4ai-metrics-{os.getpid()}1-5"
+    for directory in stale + [other_master]:
+        directory.mkdir()
+        (directory / "counter_1.db").write_bytes(b"old run")
+
+    path = metrics._multiproc_dir()
+    assert os.path.isdir(path)
+    assert os.listdir(path) == []
+    assert not any(directory.exists() for directory in stale)
+    assert other_master.exists()
+
+    # A second worker of the same run shares the directory and keeps what the first wrote
+    (tmp_path / os.path.basename(path) / "counter_2.db").write_bytes(b"this run")
+    assert metrics._multiproc_dir() == path
+    assert os.listdir(path) == ["counter_2.db"]
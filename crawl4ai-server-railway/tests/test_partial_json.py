@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import partial_json
+
+PRODUCT = {
+    "title": "boAt Rockerz 450",
+    "price": 1499,
+    "image_urls": ["https://m.media-amazon.com/1.jpg", "https://m.media-amazon.com/2.jpg"],
+    "buying_options": [
+        {"seller_name": "Amazon", "price": 1399, "in_stock": True},
+        {"seller_name": "Flipkart", "price": 1450, "in_stock": False},
+    ],
+    "sample_reviews": [{"rating": 4.5, "review_text": "Great bass"}, {"rating": 3, "review_text": "Okay"}],
+}
+
+def test_valid_json_is_not_marked_repaired():
+    assert partial_json.parse(json.dumps(PRODUCT)) == (PRODUCT, False)
+
+def test_prose_and_code_fences_around_the_json_are_ignored():
+    text = "Here is the product:\n```json\n" + json.dumps(PRODUCT) + "\n```\nLet me know!"
+    assert partial_json.parse(text) == (PRODUCT, False)
+
+def test_no_json_at_all():
+    assert partial_json.parse("Sorry, I cannot help with that.") == (None, False)
+
+@pytest.mark.parametrize("text, expected", [
+    # Top level, cut inside a string value, after ":" and after ","
+    ('{"title": "boAt", "brand": "bo', {"title": "boAt"}),
+    ('{"title": "boAt", "brand":', {"title": "boAt"}),
+    ('{"title": "boAt", "brand": ', {"title": "boAt"}),
+    ('{"title": "boAt",', {"title": "boAt"}),
+    ('{"title": "boAt", "bra', {"title": "boAt"}),
+    # Cut inside a number or bare word: it could have continued ("14" -> "1499", "tru" -> "true")
+    ('{"title": "boAt", "price": 14', {"title": "boAt"}),
+    ('{"title": "boAt", "in_stock": tru', {"title": "boAt"}),
+    # One level down
+    ('{"a": [1,2', {"a": [1]}),
+    ('{"a": [1, 2,', {"a": [1, 2]}),
+    ('{"a": ["x", "y', {"a": ["x"]}),
+    ('{"a": [true, fal', {"a": [True]}),
+    ('{"title": "X", "specs": {"battery": "15h", "weight": 2', {"title": "X", "specs": {"battery": "15h"}}),
+    # Two levels down
+    ('{"title": "X", "buying_options": [{"seller_name": "Amazon", "price": 12',
+     {"title": "X", "buying_options": [{"seller_name": "Amazon"}]}),
+    ('{"title": "X", "sample_reviews": [{"rating": 4.5, "review_text": "Good"}, {"rating": 3',
+     {"title": "X", "sample_reviews": [{"rating": 4.5, "review_text": "Good"}]}),
+    ('{"title": "X", "buying_options": [{"seller_name": "Amazon", "in_stock": tr',
+     {"title": "X", "buying_options": [{"seller_name": "Amazon"}]}),
+    ('{"title": "X", "buying_options": [{"seller_name": "Amazon"}, {"seller_name": "Flip',
+     {"title": "X", "buying_options": [{"seller_name": "Amazon"}]}),
+    ('{"title": "X", "buying_options": [{"seller_name": "Amazon"}, {',
+     {"title": "X", "buying_options": [{"seller_name": "Amazon"}]}),
+    # Three levels down
+    ('{"title": "X", "colors": [{"name": "Black", "images": ["https://a/1.jpg", "https://a/2',
+     {"title": "X", "colors": [{"name": "Black", "images": ["https://a/1.jpg"]}]}),
+    ('{"title": "X", "colors": [{"name": "Black", "images": [1, 2',
+     {"title": "X", "colors": [{"name": "Black", "images": [1]}]}),
+])
+def test_truncation_keeps_completed_values(text, expected):
+    assert partial_json.parse(text) == (expected, True)
+
+def test_every_prefix_of_a_reply_parses_to_a_subset_of_it():
+    text = json.dumps(PRODUCT)
+    for end in range(len(text)):
+        value, repaired = partial_json.parse(text[:end])
+        if value is None:
+            continue
+        assert repaired
+        for key, item in value.items():
+            assert key in PRODUCT
+            if not isinstance(item, (list, dict)):
+                assert item == PRODUCT[key]
+
+def test_truncated_top_level_array_keeps_complete_entries():
+    value, repaired = partial_json.parse('[{"page": 0, "title": "a"}, {"page": 1, "title": "b"}, {"page": 2, "ti')
+    assert repaired
+    assert value == [{"page": 0, "title": "a"}, {"page": 1, "title": "b"}, {"page": 2}]
+
+def test_nothing_complete_before_the_cut():
+    assert partial_json.parse('{"title": "bo') == (None, False)
+    assert partial_json.parse('{"price": 14') == (None, False)
+
+def test_off_spec_json_is_repaired():
+    text = ("{'title': 'bo\\'At', \"features\": [\"a\", \"b\",], \"average_rating\": numeric_rating, "
+            "\"total_reviews\": None, \"in_stock\": True \"brand\": \"boAt\",}")
+    value, repaired = partial_json.parse(text)
+    assert repaired
+    assert value == {"title": "bo'At", "features": ["a", "b"], "average_rating": None,
+                     "total_reviews": None, "in_stock": True, "brand": "boAt"}
+
+def test_empty_containers_that_were_closed_are_kept():
+    assert partial_json.parse('{"a": [], "b": {}, "c": "x') == ({"a": [], "b": {}}, True)
+
+def test_escapes_and_raw_newlines_in_strings():
+    value, _ = partial_json.parse('{"title": "6\\" speaker\nwith \\u20b9 price", "b": 1')
+    assert value == {"title": '6" speaker\nwith ₹ price'}
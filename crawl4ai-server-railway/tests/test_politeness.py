@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+from politeness import PolitenessScheduler, is_block_page, parse_domain_limits
+
+@pytest.mark.parametrize("status_code, content, blocked", [
+    (429, "<html>product</html>", True),
+    (403, None, True),
+    (503, "", True),
+    (200, "Our systems have detected unusual traffic from your computer network.", True),
+    (200, "Type the characters you see below. Enter the characters you see", True),
+    (200, "Before you continue to Google", True),
+    (200, "Great phone. " * 1000 + "No captcha needed to buy.", False),
+    (200, "A normal short product page", False),
+    (200, None, False),
+    (None, None, False),
+])
+def test_is_block_page(status_code, content, blocked):
+    assert is_block_page(status_code, content) is blocked
+
+def test_parse_domain_limits_skips_bad_entries():
+    limits = parse_domain_limits(" Google.com=2:1, amazon.in=3:0.5,bad=3,flipkart.com=x:1,noequals")
+    assert limits == {"google.com": (2, 1.0), "amazon.in": (3, 0.5)}
+    assert parse_domain_limits("") == {}
+
+def test_limits_match_the_most_specific_domain():
+    scheduler = PolitenessScheduler(default_concurrency=4, default_rate=2.0,
+                                    domain_limits={"amazon.in": (1, 0.5), "smile.amazon.in": (2, 1.0)})
+    assert scheduler.limits_for("amazon.in") == (1, 0.5)
+    assert scheduler.limits_for("m.amazon.in") == (1, 0.5)
+    assert scheduler.limits_for("smile.amazon.in") == (2, 1.0)
+    assert scheduler.limits_for("amazon.com") == (4, 2.0)
+
+def test_concurrency_cap_per_host():
+    async def scenario():
+        scheduler = PolitenessScheduler(default_concurrency=2, default_rate=1000)
+        running, peak = 0, 0
+
+        async def crawl(url):
+            nonlocal running, peak
+            async with scheduler.slot(url):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(crawl(f"https://www.amazon.in/dp/{i}") for i in range(6)))
+        assert peak == 2
+        assert scheduler.status()["amazon.in"]["crawls"] == 6
+        assert scheduler.status()["amazon.in"]["in_flight"] == 0
+    asyncio.run(scenario())
+
+def test_hosts_do_not_share_limits():
+    async def scenario():
+        scheduler = PolitenessScheduler(default_concurrency=1, default_rate=1000)
+        async def crawl(url):
+            async with scheduler.slot(url):
+                pass
+
+        async with scheduler.slot("https://amazon.in/a"):
+            # A second host is admitted while the first one's only slot is held
+            await asyncio.wait_for(crawl("https://flipkart.com/b"), timeout=0.5)
+    asyncio.run(scenario())
+
+def test_rate_limits_requests_after_the_burst():
+    async def scenario():
+        scheduler = PolitenessScheduler(default_concurrency=1, default_rate=20)
+        started = time.monotonic()
+        for _ in range(3):
+            async with scheduler.slot("https://amazon.in/a"):
+                pass
+        # One token of burst, then two more at 20/s
+        assert time.monotonic() - started >= 0.09
+    asyncio.run(scenario())
+
+def test_urls_without_a_host_are_not_limited():
+    async def scenario():
+        scheduler = PolitenessScheduler(default_concurrency=1, default_rate=0.001)
+        for _ in range(3):
+            async with scheduler.slot("raw:<html></html>"):
+                pass
+        scheduler.report("raw:<html></html>", blocked=True)
+        assert scheduler.status() == {}
+    asyncio.run(scenario())
+
+def test_blocks_back_off_exponentially_and_halve_the_rate():
+    scheduler = PolitenessScheduler(default_rate=2.0, base_backoff=5.0, max_backoff=12.0, min_rate=0.3)
+    url = "https://www.google.com/search?q=x"
+
+    scheduler.report(url, blocked=True)
+    status = scheduler.status()["google.com"]
+    assert status["rate"] == 1.0
+    assert 4.5 < status["backoff_remaining_s"] <= 5.0
+
+    scheduler.report(url, blocked=True)
+    scheduler.report(url, blocked=True)
+    status = scheduler.status()["google.com"]
+    assert status["rate"] == 0.3  # 0.5 then 0.25, floored at min_rate
+    assert 11.5 < status["backoff_remaining_s"] <= 12.0  # 5, 10, then 20 capped at 12
+    assert status["blocked"] == 3
+
+def test_successes_recover_the_rate_gradually():
+    scheduler = PolitenessScheduler(default_rate=2.0)
+    url = "https://google.com/search?q=x"
+    scheduler.report(url, blocked=True)
+    scheduler.report(url, blocked=False)
+    assert scheduler.status()["google.com"]["rate"] == 1.2
+    for _ in range(20):
+        scheduler.report(url, blocked=False)
+    assert scheduler.status()["google.com"]["rate"] == 2.0
+
+def test_blocked_host_waits_out_its_backoff():
+    async def scenario():
+        scheduler = PolitenessScheduler(default_rate=1000, base_backoff=0.1)
+        scheduler.report("https://amazon.in/a", blocked=True)
+        started = time.monotonic()
+        async with scheduler.slot("https://amazon.in/b"):
+            pass
+        assert time.monotonic() - started >= 0.09
+    asyncio.run(scenario())
+
+def test_idle_hosts_are_forgotten_past_max_hosts():
+    async def scenario():
+        scheduler = PolitenessScheduler(default_rate=1000, max_hosts=2)
+        scheduler.report("https://blocked.com/a", blocked=True)
+        async with scheduler.slot("https://busy.com/a"):
+            for host in ("a.com", "b.com", "c.com"):
+                async with scheduler.slot(f"https://{host}/p"):
+                    pass
+            # Hosts in backoff or with a crawl in flight are kept even past the limit
+            assert list(scheduler.status()) == ["blocked.com", "busy.com", "c.com"]
+        async with scheduler.slot("https://d.com/p"):
+            pass
+        assert list(scheduler.status()) == ["blocked.com", "d.com"]
+    asyncio.run(scenario())
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+class Work:
+    """Counts executions and holds each one until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"calls": self.calls}
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flight, work = SingleFlight("test"), Work()
+        callers = [asyncio.ensure_future(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        assert await asyncio.gather(*callers) == [{"calls": 1}] * 3
+        assert work.calls == 1
+        assert flight.status() == {"executions": 1, "coalesced": 2, "in_flight": 0}
+    asyncio.run(scenario())
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight, work = SingleFlight("test"), Work()
+        work.release.set()
+        await asyncio.gather(flight.do("a", work), flight.do("b", work))
+        assert work.calls == 2
+    asyncio.run(scenario())
+
+def test_followers_get_a_shared_copy():
+    async def scenario():
+        flight, work = SingleFlight("test"), Work()
+        leader = asyncio.ensure_future(flight.do("k", work, share=dict))
+        follower = asyncio.ensure_future(flight.do("k", work, share=dict))
+        await asyncio.sleep(0)
+        work.release.set()
+        first, second = await asyncio.gather(leader, follower)
+        assert first == second
+        assert first is not second
+    asyncio.run(scenario())
+
+def test_finished_calls_are_not_reused():
+    async def scenario():
+        flight, work = SingleFlight("test"), Work()
+        work.release.set()
+        await flight.do("k", work)
+        await flight.do("k", work)
+        assert work.calls == 2
+    asyncio.run(scenario())
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise ValueError("boom")
+
+        callers = [asyncio.ensure_future(flight.do("k", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+        assert [type(outcome) for outcome in outcomes] == [ValueError, ValueError]
+        assert flight.status()["in_flight"] == 0
+    asyncio.run(scenario())
+
+def test_one_cancelled_caller_does_not_stop_the_others():
+    async def scenario():
+        flight, work = SingleFlight("test"), Work()
+        leader = asyncio.ensure_future(flight.do("k", work))
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        work.release.set()
+        assert await follower == {"calls": 1}
+        assert not work.cancelled
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+    asyncio.run(scenario())
+
+def test_last_cancelled_caller_stops_the_work():
+    async def scenario():
+        flight, work = SingleFlight("test"), Work()
+        callers = [asyncio.ensure_future(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert work.cancelled
+        assert flight.status()["in_flight"] == 0
+
+        # The next caller starts afresh instead of joining the cancelled task
+        work.release.set()
+        assert await flight.do("k", work) == {"calls": 2}
+    asyncio.run(scenario())
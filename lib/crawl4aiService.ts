@@ -13,21 +13,68 @@ interface ProductData {
   specifications?: Record<string, string>
 }
 
+// Where the server spent a request's time; stages are summed, so concurrent work can exceed total_ms
+export interface ScrapeTimings {
+  total_ms: number
+  stages: Record<string, number>
+  llm_calls: {
+    model: string
+    latency_ms: number
+    wait_ms: number
+    prompt_tokens: number
+    completion_tokens: number
+    finish_reason?: string | null
+  }[]
+  cache: Record<string, Record<string, number>>
+}
+
 interface ScrapeResponse {
   url: string
   success: boolean
   product_data?: ProductData
   raw_content?: string
   error?: string
+  trace_id?: string
+  timings?: ScrapeTimings
 }
 
 interface BulkScrapeResponse {
   total_urls: number
   successful_scrapes: number
   failed_scrapes: number
+  trace_id?: string
+  timings?: ScrapeTimings
   results: ScrapeResponse[]
 }
 
+interface StreamedScrapeResult extends ScrapeResponse {
+  type: 'result'
+  index: number
+}
+
+interface StreamedScrapeSummary {
+  type: 'summary'
+  trace_id?: string
+  total_urls: number
+  successful_scrapes: number
+  failed_scrapes: number
+}
+
+type ScrapeJobEndpoint = 'scrape' | 'bulk-scrape' | 'scrape-google-shopping' | 'scrape-google-simple'
+
+interface ScrapeJobStatus {
+  job_id: string
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled'
+  endpoint: ScrapeJobEndpoint
+  total_urls: number
+  completed: number
+  successful_scrapes: number
+  failed_scrapes: number
+  progress: number
+  error?: string
+  results?: (ScrapeResponse & { index: number })[]
+}
+
 export class Crawl4AIService {
   private baseUrl: string
 
@@ -84,14 +131,14 @@ export class Crawl4AIService {
     }
   }
 
-  async scrapeMultiplePages(urls: string[], extractStructuredData: boolean = true): Promise<BulkScrapeResponse> {
+  async scrapeMultiplePages(urls: string[], extractStructuredData: boolean = true, traceId?: string): Promise<BulkScrapeResponse> {
     try {
       console.log(`🚀 Starting bulk scrape of ${urls.length} URLs...`)
       
       // If we have many URLs, process in smaller batches to avoid timeout
       if (urls.length > 3) {
         console.log(`📦 Processing in batches due to ${urls.length} URLs...`)
-        return await this.scrapeInBatches(urls, extractStructuredData)
+        return await this.scrapeInBatches(urls, extractStructuredData, 6, traceId)
       }
       
       const response = await fetch(`${this.baseUrl}/bulk-scrape`, {
@@ -101,7 +148,8 @@ export class Crawl4AIService {
         },
         body: JSON.stringify({
           urls,
-          extract_structured_data: extractStructuredData
+          extract_structured_data: extractStructuredData,
+          trace_id: traceId
         }),
         // Increase timeout for bulk operations
         signal: AbortSignal.timeout(300000) // 5 minutes timeout
@@ -121,10 +169,121 @@ export class Crawl4AIService {
     }
   }
 
+  /**
+   * Stream bulk results as NDJSON so each product can be rendered as soon as its URL completes
+   */
+  async scrapeMultiplePagesStream(
+    urls: string[],
+    onResult: (result: ScrapeResponse, index: number) => void,
+    extractStructuredData: boolean = true
+  ): Promise<BulkScrapeResponse> {
+    const results: ScrapeResponse[] = new Array(urls.length)
+    let summary: StreamedScrapeSummary | null = null
+
+    const response = await fetch(`${this.baseUrl}/bulk-scrape/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'application/x-ndjson',
+      },
+      body: JSON.stringify({
+        urls,
+        extract_structured_data: extractStructuredData
+      }),
+      signal: AbortSignal.timeout(300000) // 5 minutes for the whole stream
+    })
+
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return
+      const record = JSON.parse(line) as StreamedScrapeResult | StreamedScrapeSummary
+      if (record.type === 'summary') {
+        summary = record
+        return
+      }
+      const { type: _type, index, ...result } = record
+      results[index] = result
+      onResult(result, index)
+    }
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop() || ''
+      lines.forEach(handleLine)
+    }
+    handleLine(buffer)
+
+    const finalResults = results.filter(Boolean)
+    const successful = finalResults.filter(r => r.success).length
+    const finalSummary: StreamedScrapeSummary = summary || {
+      type: 'summary',
+      total_urls: urls.length,
+      successful_scrapes: successful,
+      failed_scrapes: urls.length - successful
+    }
+    console.log(`✅ Streamed bulk scrape completed: ${finalSummary.successful_scrapes}/${finalSummary.total_urls} successful`)
+
+    return {
+      total_urls: finalSummary.total_urls,
+      successful_scrapes: finalSummary.successful_scrapes,
+      failed_scrapes: finalSummary.failed_scrapes,
+      results: finalResults
+    }
+  }
+
+  /**
+   * Queue a long-running scrape on the server; poll it with getScrapeJob
+   */
+  async submitScrapeJob(
+    urls: string[],
+    endpoint: ScrapeJobEndpoint = 'bulk-scrape',
+    priority: number = 0,
+    extractStructuredData: boolean = true
+  ): Promise<ScrapeJobStatus> {
+    const response = await fetch(`${this.baseUrl}/jobs`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ urls, endpoint, priority, extract_structured_data: extractStructuredData }),
+      signal: AbortSignal.timeout(30000)
+    })
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return await response.json()
+  }
+
+  async getScrapeJob(jobId: string, includeResults: boolean = true): Promise<ScrapeJobStatus> {
+    const response = await fetch(`${this.baseUrl}/jobs/${jobId}?include_results=${includeResults}`, {
+      signal: AbortSignal.timeout(30000)
+    })
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return await response.json()
+  }
+
+  async cancelScrapeJob(jobId: string): Promise<ScrapeJobStatus> {
+    const response = await fetch(`${this.baseUrl}/jobs/${jobId}`, { method: 'DELETE' })
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+    return await response.json()
+  }
+
   /**
    * Process URLs in smaller batches to avoid timeout issues
    */
-  async scrapeInBatches(urls: string[], extractStructuredData: boolean = true, batchSize: number = 6): Promise<BulkScrapeResponse> {
+  async scrapeInBatches(urls: string[], extractStructuredData: boolean = true, batchSize: number = 6, traceId?: string): Promise<BulkScrapeResponse> {
     console.log(`📦 Processing ${urls.length} URLs in batches of ${batchSize}...`)
     
     const allResults: any[] = []
@@ -150,7 +309,8 @@ export class Crawl4AIService {
           },
           body: JSON.stringify({
             urls: batch,
-            extract_structured_data: extractStructuredData
+            extract_structured_data: extractStructuredData,
+            trace_id: traceId
           }),
           // Aggressive timeout for Railway (it's faster and more stable)
           signal: AbortSignal.timeout(60000) // 1 minute timeout per batch
@@ -211,11 +371,30 @@ export class Crawl4AIService {
       total_urls: urls.length,
       successful_scrapes: totalSuccessful,
       failed_scrapes: urls.length - totalSuccessful,
+      trace_id: traceId,
       results: allResults
     }
   }
 
-  async scrapeSerperProducts(serperProducts: any[]): Promise<ProductData[]> {
+  /**
+   * One-line summary of where a scrape spent its time, slowest stages first
+   */
+  describeTimings(timings?: ScrapeTimings): string {
+    if (!timings) {
+      return 'no timings'
+    }
+    const stages = Object.entries(timings.stages)
+      .sort(([, a], [, b]) => b - a)
+      .map(([stage, ms]) => `${stage}=${Math.round(ms)}ms`)
+      .join(' ')
+    const tokens = timings.llm_calls.reduce((sum, call) => sum + call.prompt_tokens + call.completion_tokens, 0)
+    const cache = Object.entries(timings.cache)
+      .map(([stage, counts]) => `${stage}:${Object.entries(counts).map(([status, n]) => `${status}${n > 1 ? `x${n}` : ''}`).join('/')}`)
+      .join(' ')
+    return `${Math.round(timings.total_ms)}ms total | ${stages || 'no stages'} | ${timings.llm_calls.length} LLM calls, ${tokens} tokens | ${cache || 'no cache lookups'}`
+  }
+
+  async scrapeSerperProducts(serperProducts: any[], traceId?: string): Promise<ProductData[]> {
     try {
       console.log(`🚀 Starting scrapeSerperProducts with ${serperProducts.length} products`)
       
@@ -232,9 +411,14 @@ export class Crawl4AIService {
       
       // Scrape all URLs
       console.log(`📡 Calling scrapeMultiplePages...`)
-      const bulkResult = await this.scrapeMultiplePages(urls, true)
+      const bulkResult = await this.scrapeMultiplePages(urls, true, traceId)
       console.log(`📊 Bulk result: ${bulkResult.successful_scrapes}/${bulkResult.total_urls} successful`)
       
+      // Per-URL breakdown so a slow search can be diagnosed from the logs alone
+      for (const result of bulkResult.results) {
+        console.log(`⏱️ [${result.trace_id || traceId || '-'}] ${result.url}: ${this.describeTimings(result.timings)}`)
+      }
+      
       // Extract successful product data
       const productData: ProductData[] = []
       